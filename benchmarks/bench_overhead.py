@@ -0,0 +1,230 @@
+"""
+Measure the per-test overhead of pytest-fail-slow by running synthetic test
+suites with the plugin enabled and disabled.  For each scenario & suite size,
+the total time taken by `pytest.main()` and the mean time per test spent in
+the `pytest_runtest_setup` & `pytest_runtest_makereport` hooks are recorded,
+and the results are saved as JSON.  Pass ``--compare`` with the JSON output of
+an earlier run to show how the plugin's overhead has changed since then.
+
+Usage: python benchmarks/bench_overhead.py [-s SIZE ...] [-S SCENARIO ...]
+           [-r REPEAT] [-o OUTFILE] [--compare OLDFILE]
+"""
+
+from __future__ import annotations
+import argparse
+from collections.abc import Callable
+from importlib.metadata import version
+import json
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+from typing import Any
+import pytest
+
+#: Number of tests in each generated module
+TESTS_PER_MODULE = 100
+
+MARKERS = (
+    "fail_slow",
+    "fail_slow_setup",
+    "fail_slow_teardown",
+    "fail_slow_combined",
+    "fail_fat",
+    "fail_slow_total",
+)
+
+#: Hooks whose time per call is measured
+HOOKS = ("pytest_runtest_setup", "pytest_runtest_makereport")
+
+
+def plain_module(decor: str = "") -> str:
+    return "".join(
+        f"{decor}def test_{i}():\n    pass\n\n" for i in range(TESTS_PER_MODULE)
+    )
+
+
+def class_module() -> str:
+    return "import pytest\n\n@pytest.mark.fail_slow('5s')\nclass TestClass:\n" + (
+        "".join(
+            f"    def test_{i}(self):\n        pass\n\n"
+            for i in range(TESTS_PER_MODULE)
+        )
+    )
+
+
+#: Scenarios mapped to functions returning the source of a test module and the
+#: command-line options to pass when the plugin is enabled
+SCENARIOS: dict[str, Callable[[], tuple[str, list[str]]]] = {
+    "no-markers": lambda: (plain_module(), []),
+    "marker": lambda: (
+        "import pytest\n\n" + plain_module("@pytest.mark.fail_slow('5s')\n"),
+        [],
+    ),
+    "condition": lambda: (
+        "import pytest\n\n"
+        + plain_module(
+            "@pytest.mark.fail_slow('5s', enabled=\"sys.platform != 'nope'\")\n"
+        ),
+        [],
+    ),
+    "class-marker": lambda: (class_module(), []),
+    "module-marker": lambda: (
+        "import pytest\n\npytestmark = pytest.mark.fail_slow('5s')\n\n"
+        + plain_module(),
+        [],
+    ),
+    "options": lambda: (
+        plain_module(),
+        ["--fail-slow=5s", "--fail-slow-setup=5s", "--fail-slow-teardown=5s"],
+    ),
+}
+
+
+class HookTimer:
+    """Plugin that adds up the time spent in calls to each of `HOOKS`"""
+
+    def __init__(self) -> None:
+        self.totals = dict.fromkeys(HOOKS, 0.0)
+        self.calls = dict.fromkeys(HOOKS, 0)
+        self.starts: list[float] = []
+
+    def pytest_configure(self, config: pytest.Config) -> None:
+        config.pluginmanager.add_hookcall_monitoring(self.before, self.after)
+
+    def before(self, hook_name: str, _impls: Any, _kwargs: Any) -> None:
+        if hook_name in self.totals:
+            self.starts.append(perf_counter())
+
+    def after(self, _outcome: Any, hook_name: str, _impls: Any, _kwargs: Any) -> None:
+        if hook_name in self.totals:
+            self.totals[hook_name] += perf_counter() - self.starts.pop()
+            self.calls[hook_name] += 1
+
+
+def run_one(suite: Path, args: list[str]) -> None:
+    """
+    Run pytest on ``suite`` in this process and print the timings as JSON; this
+    is run in a fresh subprocess for each measurement
+    """
+    timer = HookTimer()
+    start = perf_counter()
+    rc = pytest.main(
+        ["-q", "-p", "no:cacheprovider", "--no-summary", *args, str(suite)],
+        plugins=[timer],
+    )
+    total = perf_counter() - start
+    if rc != 0:
+        sys.exit(f"pytest exited with status {rc}")
+    result: dict[str, float] = {"total": total}
+    for hook in HOOKS:
+        result[hook] = timer.totals[hook] / max(timer.calls[hook], 1)
+    print(json.dumps(result))
+
+
+def measure(suite: Path, args: list[str], repeat: int) -> dict[str, float]:
+    """Run pytest on ``suite`` ``repeat`` times and return the best timings"""
+    best: dict[str, float] = {}
+    for _ in range(repeat):
+        r = subprocess.run(
+            [sys.executable, __file__, "--run-one", str(suite), *args],
+            stdout=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+        timings = json.loads(r.stdout.strip().splitlines()[-1])
+        for k, v in timings.items():
+            best[k] = min(best.get(k, v), v)
+    return best
+
+
+def generate(root: Path, scenario: str, size: int) -> tuple[Path, list[str]]:
+    src, args = SCENARIOS[scenario]()
+    suite = root / f"{scenario}-{size}"
+    suite.mkdir()
+    (suite / "pytest.ini").write_text(
+        "[pytest]\nmarkers =\n" + "".join(f"    {m}\n" for m in MARKERS)
+    )
+    for i in range(-(-size // TESTS_PER_MODULE)):
+        (suite / f"test_{i}.py").write_text(src)
+    return suite, args
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> None:
+    previous = {(r["scenario"], r["tests"]): r for r in old["results"]}
+    print()
+    print(f"Change in overhead since {old['plugin_version']}:")
+    for r in new["results"]:
+        if (p := previous.get((r["scenario"], r["tests"]))) is None:
+            continue
+        changes = "  ".join(
+            f"{h.removeprefix('pytest_runtest_')}:"
+            f" {p['overhead'][h] * 1e6:+.1f} -> {r['overhead'][h] * 1e6:+.1f}us"
+            for h in HOOKS
+        )
+        print(f"{r['scenario']:>14} {r['tests']:>7}  {changes}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument(
+        "-s", "--size", type=int, action="append", help="Number of tests in a suite"
+    )
+    parser.add_argument("-S", "--scenario", choices=list(SCENARIOS), action="append")
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("-o", "--outfile", type=Path, default=Path("overhead.json"))
+    parser.add_argument("--compare", type=Path, metavar="OLDFILE")
+    parser.add_argument("--run-one", type=Path, help=argparse.SUPPRESS)
+    args, extra = parser.parse_known_args()
+    if args.run_one is not None:
+        run_one(args.run_one, extra)
+        return
+    data: dict[str, Any] = {
+        "python": platform.python_version(),
+        "pytest_version": pytest.__version__,
+        "plugin_version": version("pytest-fail-slow"),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    print(
+        f"{'scenario':>14} {'tests':>7}  {'total':>9}  {'baseline':>9}"
+        + "".join(f"  {h.removeprefix('pytest_runtest_'):>12}" for h in HOOKS)
+        + f"  {'per test':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in args.size or [1000, 10000]:
+            for scenario in args.scenario or list(SCENARIOS):
+                suite, opts = generate(Path(tmpdir), scenario, size)
+                plugin = measure(suite, opts, args.repeat)
+                baseline = measure(suite, ["-p", "no:fail-slow"], args.repeat)
+                overhead = {k: plugin[k] - baseline[k] for k in plugin}
+                overhead_per_item = overhead["total"] / size
+                data["results"].append(
+                    {
+                        "scenario": scenario,
+                        "tests": size,
+                        "plugin": plugin,
+                        "baseline": baseline,
+                        "overhead": overhead,
+                        "overhead_per_item": overhead_per_item,
+                    }
+                )
+                print(
+                    f"{scenario:>14} {size:>7}  {plugin['total']:8.3f}s"
+                    f"  {baseline['total']:8.3f}s"
+                    + "".join(f"  {overhead[h] * 1e6:+10.1f}us" for h in HOOKS)
+                    + f"  {overhead_per_item * 1e6:+8.1f}us"
+                )
+    with args.outfile.open("w") as fp:
+        json.dump(data, fp, indent=4)
+        print(file=fp)
+    print(f"Results saved to {args.outfile}")
+    if args.compare is not None:
+        with args.compare.open() as fp:
+            compare(json.load(fp), data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare the speed of `pytest_fail_slow.parse_duration()` against the
+implementation in v0.6.0, which ran an uncompiled regex on every call
+
+Usage: python benchmarks/bench_parse_duration.py [-n NUMBER]
+"""
+
+from __future__ import annotations
+import argparse
+import re
+from timeit import timeit
+from pytest_fail_slow import TIME_UNITS, _parse_duration_str, parse_duration
+
+INPUTS = ["5", "2.5", "5s", "250ms", "3 min", "1.5 hours", "100us", "2 seconds"]
+
+
+def legacy_parse_duration(s: str | int | float) -> int | float:
+    if isinstance(s, (int, float)):
+        return s
+    m = re.search(
+        r"""
+        (?<=[\d\s.])
+        (?:
+            (?P<hour>h(ours?)?)
+            |(?P<min>m(in(ute)?s?)?)
+            |(?P<sec>s(ec(ond)?s?)?)
+            |(?P<ms>m(illi)?s(ec(ond)?s?)?|milli)
+            |(?P<us>(μ|u|micro)s(ec(ond)?s?)?|micro)
+        )\s*$
+    """,
+        s,
+        flags=re.I | re.X,
+    )
+    if m:
+        (unit,) = (k for k, v in m.groupdict().items() if v is not None)
+        mul = TIME_UNITS[unit.lower()]
+        s = s[: m.start()]
+    else:
+        mul = 1.0
+    return float(s) * mul
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100_000)
+    args = parser.parse_args()
+    # The "uncached" column bypasses the LRU cache in order to show the
+    # effect of the precompiled regex & fast path on their own.
+    uncached_parse = _parse_duration_str.__wrapped__
+    print(f"{'input':>12}  {'legacy':>10}  {'uncached':>10}  {'cached':>10}  speedup")
+    for s in INPUTS:
+        assert parse_duration(s) == legacy_parse_duration(s)
+        times = [
+            timeit(lambda func=func, s=s: func(s), number=args.number)
+            / args.number
+            * 1e9
+            for func in (legacy_parse_duration, uncached_parse, parse_duration)
+        ]
+        print(
+            f"{s!r:>12}  {times[0]:8.0f}ns  {times[1]:8.0f}ns  {times[2]:8.0f}ns"
+            f"  {times[0] / times[2]:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
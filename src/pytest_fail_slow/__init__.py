@@ -3,8 +3,8 @@ Fail tests that take too long to run
 
 ``pytest-fail-slow`` is a pytest_ plugin for treating tests as failed if they
 took too long to run.  It adds markers for failing tests if they or their setup
-stages run for longer than a given duration, along with command-line options
-for applying the same cutoff to all tests.
+or teardown stages run for longer than a given duration, along with
+command-line options for applying the same cutoff to all tests.
 
 Note that slow tests will still be run to completion; if you want them to
 instead be stopped early, use pytest-timeout_.
@@ -16,14 +16,60 @@ Visit <https://github.com/jwodder/pytest-fail-slow> for more information.
 """
 
 from __future__ import annotations
-from collections.abc import Generator, Mapping
+from collections import Counter
+from collections.abc import Callable, Generator, Iterator, Mapping
+import cProfile
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import lru_cache
+import math
 import os
+from pathlib import Path
 import platform
 import re
+import statistics
 import sys
+from time import perf_counter, time
 import traceback
-from typing import Union
+import tracemalloc
+from types import CodeType
+from typing import TYPE_CHECKING, Any, NamedTuple, Union
+from _pytest.outcomes import Exit, Failed, OutcomeException
 import pytest
+from ._blocking import BlockingMonitor, format_offenders
+from ._budgets import BudgetIndex, parse_budget_index
+from ._calibrate import get_benchmark_time
+from ._cpu import CLOCKS, children_supported, get_clock
+from ._deadline import SessionDeadline
+from ._fixtures import FixtureTimer, format_breakdown, parse_budgets
+from ._gc import GCMonitor, format_gc
+from ._history import DurationHistory, HistoryStarter
+from ._load import load_factor, load_supported
+from ._order import estimate_durations, slowest_first
+from ._profile import format_top, save_profile, start_profiler
+from ._record import RecordWriter
+from ._resources import (
+    BUDGETS,
+    SIZE_BUDGETS,
+    budget_values,
+    format_usage,
+    snapshot,
+    usage_since,
+)
+from ._scaling import (
+    COMPLEXITIES,
+    ScalingGroup,
+    ScalingTracker,
+    parse_complexity,
+    size_of,
+)
+from ._sketch import QUANTILES
+from ._summary import HeadroomSummary, SlowSummary
+from ._totals import TotalsTracker
+from ._watchdog import Watchdog, format_samples
+
+if TYPE_CHECKING:
+    from _pytest.capture import CaptureManager
+    from _pytest.nodes import Node
 
 __version__ = "0.7.0.dev1"
 __author__ = "John Thorvald Wodder II"
@@ -39,37 +85,193 @@ TIME_UNITS = {
     "us": 0.000001,
 }
 
+SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 1000,
+    "kb": 1000,
+    "ki": 1024,
+    "kib": 1024,
+    "m": 1000**2,
+    "mb": 1000**2,
+    "mi": 1024**2,
+    "mib": 1024**2,
+    "g": 1000**3,
+    "gb": 1000**3,
+    "gi": 1024**3,
+    "gib": 1024**3,
+}
+
 setup_timeout_key = pytest.StashKey[Union[int, float, None]]()
 call_timeout_key = pytest.StashKey[Union[int, float, None]]()
+teardown_timeout_key = pytest.StashKey[Union[int, float, None]]()
+combined_timeout_key = pytest.StashKey[Union[int, float, None]]()
+setup_percentiles_key = pytest.StashKey[tuple[tuple[str, float], ...]]()
+call_percentiles_key = pytest.StashKey[tuple[tuple[str, float], ...]]()
+teardown_percentiles_key = pytest.StashKey[tuple[tuple[str, float], ...]]()
+combined_percentiles_key = pytest.StashKey[tuple[tuple[str, float], ...]]()
+setup_clock_key = pytest.StashKey[str]()
+call_clock_key = pytest.StashKey[str]()
+teardown_clock_key = pytest.StashKey[str]()
+combined_clock_key = pytest.StashKey[str]()
+memory_limit_key = pytest.StashKey[Union[int, float, None]]()
+#: Peak memory allocated during a test's call phase, in bytes
+peak_memory_key = pytest.StashKey[int]()
+blocking_limit_key = pytest.StashKey[Union[int, float, None]]()
+#: Callbacks that blocked the event loop during a test's call
+blocking_key = pytest.StashKey[BlockingMonitor]()
+#: Where the fixed thresholds of a test come from (see `Limits.source`), keyed
+#: by marker name
+threshold_sources_key = pytest.StashKey[dict[str, str]]()
+#: Profiles of the phases of a test, keyed by phase
+profiles_key = pytest.StashKey[dict[str, cProfile.Profile]]()
+#: Threshold at which the watchdog started sampling each phase of a test and
+#: the stack samples it took, keyed by phase
+stack_samples_key = pytest.StashKey[dict[str, tuple[float, Counter[str]]]]()
+#: Budgets set by a test's ``fail_slow_io`` marker, keyed by counter
+io_budgets_key = pytest.StashKey[dict[str, Union[int, float]]]()
+#: Resource usage of the phases of a test, keyed by phase and then by counter
+resources_key = pytest.StashKey[dict[str, dict[str, int]]]()
+#: Garbage collections during the phases of a test, keyed by phase
+gc_key = pytest.StashKey[dict[str, GCMonitor]]()
+#: CPU times of the phases of a test, keyed by phase and then by clock
+cpu_times_key = pytest.StashKey[dict[str, dict[str, float]]]()
+#: Durations of the phases of a test that have passed so far, keyed by phase
+durations_key = pytest.StashKey[dict[str, float]]()
+
+
+class ConditionCache:
+    """
+    Per-session cache used when evaluating ``enabled=`` condition strings.
+
+    Compiled code objects are keyed by marker name & condition string.
+    Evaluation namespaces are keyed by the item's path (which determines the
+    ``conftest.py`` files consulted by ``pytest_markeval_namespace()``) and the
+    identity of its module's globals, and condition results are memoized per
+    condition & namespace.
+    """
+
+    def __init__(self) -> None:
+        self.code: dict[tuple[str, str], CodeType] = {}
+        self.namespaces: dict[tuple[Path, int], dict[str, Any]] = {}
+        self.results: dict[tuple[str, str, Path, int], bool] = {}
+
+
+condition_cache_key = pytest.StashKey[ConditionCache]()
+history_key = pytest.StashKey[DurationHistory]()
+relative_min_key = pytest.StashKey[float]()
+#: Factor by which fixed duration thresholds are multiplied to account for the
+#: speed of the current host
+speed_factor_key = pytest.StashKey[float]()
+#: The host's benchmark time, if calibration is enabled
+benchmark_time_key = pytest.StashKey[float]()
+watchdog_key = pytest.StashKey[Watchdog]()
+deadline_key = pytest.StashKey[SessionDeadline]()
+fixture_timer_key = pytest.StashKey[FixtureTimer]()
+#: Total budgets set by the ``fail_slow_total`` ini option, keyed by node ID
+ini_totals_key = pytest.StashKey[dict[str, float]]()
+#: Budgets set with the ``fail_slow_budgets`` ini option, keyed by marker name
+budgets_key = pytest.StashKey[dict[str, BudgetIndex]]()
+#: Node IDs & total budgets of a node and those of its ancestors that have
+#: total budgets, outermost first
+total_budgets_key = pytest.StashKey[tuple[tuple[str, float], ...]]()
+
+
+DURATION_RGX = re.compile(
+    r"""
+    (?<=[\d\s.])
+    (?:
+        (?P<hour>h(ours?)?)
+        |(?P<min>m(in(ute)?s?)?)
+        |(?P<sec>s(ec(ond)?s?)?)
+        |(?P<ms>m(illi)?s(ec(ond)?s?)?|milli)
+        |(?P<us>(μ|u|micro)s(ec(ond)?s?)?|micro)
+    )\s*$
+    """,
+    flags=re.I | re.X,
+)
+
+#: Unit suffixes that `parse_duration()` checks for before falling back to
+#: `DURATION_RGX`.  Longer suffixes must come before their own suffixes.
+COMMON_SUFFIXES = [
+    ("ms", TIME_UNITS["ms"]),
+    ("us", TIME_UNITS["us"]),
+    ("s", TIME_UNITS["sec"]),
+    ("m", TIME_UNITS["min"]),
+    ("h", TIME_UNITS["hour"]),
+]
 
 
 def parse_duration(s: str | int | float) -> int | float:
     if isinstance(s, (int, float)):
         return s
-    m = re.search(
-        r"""
-        (?<=[\d\s.])
-        (?:
-            (?P<hour>h(ours?)?)
-            |(?P<min>m(in(ute)?s?)?)
-            |(?P<sec>s(ec(ond)?s?)?)
-            |(?P<ms>m(illi)?s(ec(ond)?s?)?|milli)
-            |(?P<us>(μ|u|micro)s(ec(ond)?s?)?|micro)
-        )\s*$
-    """,
-        s,
-        flags=re.I | re.X,
-    )
+    return _parse_duration_str(s)
+
+
+@lru_cache(maxsize=512)
+def _parse_duration_str(s: str) -> float:
+    # Fast path: bare numbers and common units attached to plain numbers
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    lowered = s.rstrip().lower()
+    for suffix, mul in COMMON_SUFFIXES:
+        if lowered.endswith(suffix):
+            number = lowered[: -len(suffix)]
+            if number and (number[-1].isdecimal() or number[-1] in " ."):
+                try:
+                    return float(number) * mul
+                except ValueError:
+                    pass
+            break
+    m = DURATION_RGX.search(s)
     if m:
-        (unit,) = (k for k, v in m.groupdict().items() if v is not None)
-        mul = TIME_UNITS[unit.lower()]
+        unit = m.lastgroup
+        assert unit is not None
+        mul = TIME_UNITS[unit]
         s = s[: m.start()]
     else:
         mul = 1.0
     return float(s) * mul
 
 
+SIZE_RGX = re.compile(
+    r"\s*(?P<number>(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)\s*(?P<unit>[kmg]?i?b?)\s*",
+    flags=re.I,
+)
+
+
+def parse_size(s: str | int | float) -> int | float:
+    """
+    Parse a memory size like ``"200MB"`` or ``"1.5 GiB"`` into a number of
+    bytes
+    """
+    if isinstance(s, (int, float)):
+        return s
+    return _parse_size_str(s)
+
+
+@lru_cache(maxsize=512)
+def _parse_size_str(s: str) -> float:
+    m = SIZE_RGX.fullmatch(s)
+    if m is None or m["unit"].lower() not in SIZE_UNITS:
+        raise ValueError(f"Invalid size: {s!r}")
+    return float(m["number"]) * SIZE_UNITS[m["unit"].lower()]
+
+
+def parse_factor(s: str | int | float) -> float:
+    """Parse a multiplier like ``"3"``, ``"3x"``, or ``"2.5×"``"""
+    if isinstance(s, str):
+        s = s.strip().rstrip("xX×").rstrip()
+    factor = float(s)
+    if not factor > 0:
+        raise ValueError(f"Factor must be positive: {s!r}")
+    return factor
+
+
 def pytest_configure(config: pytest.Config) -> None:
+    config.stash[condition_cache_key] = ConditionCache()
     config.addinivalue_line(
         "markers",
         "fail_slow(duration): Fail test if it takes more than this long to run",
@@ -81,6 +283,221 @@ def pytest_configure(config: pytest.Config) -> None:
             " Fail test if it takes more than this long to set up"
         ),
     )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_slow_teardown(duration):"
+            " Fail test if it takes more than this long to tear down"
+        ),
+    )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_slow_combined(duration):"
+            " Fail test if its setup, call, and teardown take more than this"
+            " long to run combined"
+        ),
+    )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_fat(size): Fail test if it allocates more than this much"
+            " memory at once while running"
+        ),
+    )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_slow_blocking(duration): Fail test if any asyncio callback run"
+            " while it runs blocks the event loop for more than this long"
+        ),
+    )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_slow_io(read=size, write=size, ...): Fail test if it reads or"
+            " writes more than this much or exceeds other resource budgets"
+            " while running"
+        ),
+    )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_slow_total(duration): Report (and optionally fail the run)"
+            " if the tests in this module or class take more than this long to"
+            " run in total"
+        ),
+    )
+    config.addinivalue_line(
+        "markers",
+        (
+            "fail_slow_scaling(param, complexity): Fail the last of a set of"
+            " parametrized tests to finish if their durations grow faster with"
+            " the given parameter than the given complexity class allows"
+        ),
+    )
+    try:
+        config.stash[relative_min_key] = parse_duration(
+            config.getini("fail_slow_relative_min")
+        )
+    except ValueError:
+        raise pytest.UsageError(
+            "Invalid fail_slow_relative_min duration:"
+            f" {config.getini('fail_slow_relative_min')!r}"
+        )
+    config.stash[speed_factor_key] = 1.0
+    if config.getoption("--fail-slow-calibrate") or config.getini(
+        "fail_slow_calibrate"
+    ):
+        calibrate(config)
+    # Only registered once collection shows that it's needed; see
+    # `register_fixture_timer()`
+    config.stash[fixture_timer_key] = FixtureTimer(
+        scale_budgets(
+            config, parse_budgets(config, "fail_slow_fixture_setup", parse_duration)
+        ),
+        scale_budgets(
+            config,
+            parse_budgets(config, "fail_slow_fixture_teardown", parse_duration),
+        ),
+    )
+    config.stash[ini_totals_key] = scale_budgets(
+        config, parse_budgets(config, "fail_slow_total", parse_duration)
+    )
+    config.stash[budgets_key] = {
+        PHASES[when].mark_name: index
+        for when, index in parse_budget_index(
+            config, "fail_slow_budgets", list(PHASES), parse_duration
+        ).items()
+    }
+    if config.getoption("--fail-slow-cpu-children") and not children_supported():
+        raise pytest.UsageError(
+            "--fail-slow-cpu-children is not supported on this platform"
+        )
+    if config.getoption("--fail-slow-normalize-load") and not load_supported():
+        raise pytest.UsageError(
+            "--fail-slow-normalize-load is not supported on this platform"
+        )
+    if not hasattr(config, "workerinput"):
+        # Under xdist, totals are added up & slow tests are summarized by the
+        # controller from the reports sent by workers.
+        config.pluginmanager.register(SlowSummary(), "fail-slow-summary")
+        config.pluginmanager.register(
+            ScalingTracker(fail_report), "fail-slow-scaling"
+        )
+        if (top := config.getoption("--fail-slow-headroom")) > 0:
+            config.pluginmanager.register(
+                HeadroomSummary(top), "fail-slow-headroom"
+            )
+        if (record := config.getoption("--fail-slow-record")) is not None:
+            config.pluginmanager.register(
+                RecordWriter(
+                    config.invocation_params.dir / record,
+                    config.getoption("--fail-slow-record-format"),
+                ),
+                "fail-slow-record",
+            )
+        session_budget = config.getoption("--fail-slow-session")
+        if session_budget is not None:
+            session_budget *= config.stash[speed_factor_key]
+        config.pluginmanager.register(
+            TotalsTracker(
+                session_budget,
+                config.getoption("--fail-slow-strict-totals"),
+            ),
+            "fail-slow-totals",
+        )
+    if (
+        config.getoption("--fail-slow-regression") is not None
+        or config.getoption("--fail-slow-order") != "none"
+        or config.getini("fail_slow_history")
+    ):
+        get_history(config)
+    elif not hasattr(config, "workerinput"):
+        # Percentile thresholds are only found when tests are collected, which
+        # under xdist happens on the workers rather than on the controller.
+        config.pluginmanager.register(
+            HistoryStarter(config, get_history), "fail-slow-history-starter"
+        )
+    # Unlike the other budgets, this one isn't scaled by the speed factor, as
+    # it's a limit on how long the run may take (e.g., to stay within a CI
+    # job's time limit) rather than an expectation of how fast tests are.
+    if (budget := config.getoption("--fail-slow-session-budget")) is not None:
+        if hasattr(config, "workerinput"):
+            # Under xdist, the budget is counted from when the controller
+            # started rather than from when each worker did.
+            deadline = config.workerinput["fail_slow_deadline"]
+        else:
+            deadline = time() + budget
+        plugin = config.stash[deadline_key] = SessionDeadline(deadline, budget)
+        config.pluginmanager.register(plugin, "fail-slow-deadline")
+    if (interval := config.getoption("--fail-slow-sample")) is not None:
+        watchdog = config.stash[watchdog_key] = Watchdog(
+            interval, str(config.rootpath)
+        )
+        config.add_cleanup(watchdog.close)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node: Any) -> None:
+    if (plugin := node.config.stash.get(deadline_key, None)) is not None:
+        node.workerinput["fail_slow_deadline"] = plugin.deadline
+
+
+def calibrate(config: pytest.Config) -> None:
+    """
+    Set the factor by which to scale thresholds based on the host's benchmark
+    time relative to that of the reference machine
+    """
+    # Under xdist, the controller re-runs the benchmark (if requested) before
+    # the workers start, and the workers then use its result.
+    rerun = config.getoption("--fail-slow-calibrate") and not hasattr(
+        config, "workerinput"
+    )
+    bench = config.stash[benchmark_time_key] = get_benchmark_time(config, rerun)
+    refstr = config.getini("fail_slow_calibration_reference")
+    if not refstr:
+        # There's no meaningful default, as the reference has to come from the
+        # machine on which the thresholds were chosen
+        raise pytest.UsageError(
+            "fail_slow_calibrate requires fail_slow_calibration_reference to be"
+            " set to the benchmark time on the machine for which thresholds were"
+            f" written (the benchmark time on this host is {bench:.3f}s)"
+        )
+    try:
+        reference = parse_duration(refstr)
+        if not reference > 0:
+            raise ValueError(reference)
+    except ValueError:
+        raise pytest.UsageError(
+            f"Invalid fail_slow_calibration_reference duration: {refstr!r}"
+        )
+    config.stash[speed_factor_key] = bench / reference
+
+
+def pytest_report_header(config: pytest.Config) -> str | None:
+    bench = config.stash.get(benchmark_time_key, None)
+    if bench is None:
+        return None
+    return (
+        f"fail-slow: host benchmark time {bench:.3f}s; duration thresholds scaled"
+        f" {config.stash[speed_factor_key]:.2f}x"
+    )
+
+
+def get_history(config: pytest.Config) -> DurationHistory:
+    """
+    Returns the session's duration history, loading it and starting to record
+    durations on first use
+    """
+    history = config.stash.get(history_key, None)
+    if history is None:
+        history = config.stash[history_key] = DurationHistory.load(config)
+        if not hasattr(config, "workerinput"):
+            # Under xdist, durations are recorded by the controller from the
+            # reports sent by workers.
+            config.pluginmanager.register(history, "fail-slow-history")
+    return history
 
 
 def pytest_addoption(parser: pytest.Parser) -> None:
@@ -96,62 +513,1087 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         metavar="DURATION",
         help="Fail tests that take more than this long to set up",
     )
+    parser.addoption(
+        "--fail-slow-teardown",
+        type=parse_duration,
+        metavar="DURATION",
+        help="Fail tests that take more than this long to tear down",
+    )
+    parser.addoption(
+        "--fail-slow-combined",
+        type=parse_duration,
+        metavar="DURATION",
+        help=(
+            "Fail tests whose setup, call, and teardown take more than this"
+            " long to run combined"
+        ),
+    )
+    parser.addoption(
+        "--fail-fat",
+        type=parse_size,
+        metavar="SIZE",
+        help=(
+            "Fail tests whose peak memory allocation while running exceeds this"
+            " size"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-blocking",
+        type=parse_duration,
+        metavar="DURATION",
+        help=(
+            "Fail tests during whose calls any asyncio callback blocks the event"
+            " loop for longer than this"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-clock",
+        choices=list(CLOCKS),
+        default="wall",
+        help=(
+            "Check fixed thresholds against wall-clock time (the default), the"
+            " CPU time used by the process, or the CPU time used by the thread"
+            " running the test"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-cpu-children",
+        action="store_true",
+        help=(
+            "Include CPU time used by terminated child processes when checking"
+            " thresholds against CPU time"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-normalize-load",
+        action="store_true",
+        help=(
+            "Scale fixed wall-clock thresholds by how oversubscribed the"
+            " machine's CPUs are (e.g., by pytest-xdist workers)"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-confirm",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "Re-run tests that take too long to run up to N times, and only fail"
+            " them if they're still too slow when judged by --fail-slow-judge"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-judge",
+        choices=["min", "median"],
+        default="min",
+        help=(
+            "Statistic of the durations of a test's runs that --fail-slow-confirm"
+            " checks against its thresholds (default: min)"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-exclude-gc",
+        action="store_true",
+        help=(
+            "Check wall-clock durations against cutoffs after subtracting the"
+            " time spent in garbage collection"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-resources",
+        action="store_true",
+        help=(
+            "Include the I/O, context switches, and page faults of test stages"
+            " that exceed their cutoffs in failure messages"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-headroom",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "List the N test stages that came closest to (or went furthest"
+            " over) their thresholds at the end of the run"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-profile",
+        metavar="DIR",
+        help=(
+            "Profile test stages that have thresholds, and save the profiles of"
+            " those that exceed them to DIR"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-sample",
+        type=parse_duration,
+        metavar="INTERVAL",
+        help=(
+            "Sample the stack of each test setup or call that runs past its"
+            " threshold every INTERVAL until it finishes, and show the samples"
+            " if it fails for being slow"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-record",
+        metavar="PATH",
+        help=(
+            "Write a record of the duration, threshold, and outcome of each"
+            " test stage to PATH as the tests are run"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-record-format",
+        choices=["jsonl", "binary"],
+        default="jsonl",
+        help="Format of the --fail-slow-record file (default: jsonl)",
+    )
+    parser.addoption(
+        "--fail-slow-calibrate",
+        action="store_true",
+        help=(
+            "Re-run the host speed benchmark and scale duration thresholds by"
+            " its result (implies fail_slow_calibrate)"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-session",
+        type=parse_duration,
+        metavar="DURATION",
+        help="Report if all tests combined take more than this long to run",
+    )
+    parser.addoption(
+        "--fail-slow-session-budget",
+        type=parse_duration,
+        metavar="DURATION",
+        help=(
+            "Once this long has passed since pytest started, skip the remaining"
+            " tests instead of running them"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-strict-totals",
+        action="store_true",
+        help=(
+            "Fail the run if the session or any module, class, or directory"
+            " exceeds its total budget"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-regression",
+        type=parse_factor,
+        metavar="FACTOR",
+        help=(
+            "Fail tests whose setup, call, or teardown takes more than FACTOR"
+            " times as long as its historical baseline (implies"
+            " fail_slow_history)"
+        ),
+    )
+    parser.addoption(
+        "--fail-slow-order",
+        choices=["none", "slowest-first"],
+        default="none",
+        help=(
+            "Run tests in order of their historical durations, slowest first,"
+            " and, under pytest-xdist's --dist load, hand them out to whichever"
+            " worker is free first (implies fail_slow_history; default: none)"
+        ),
+    )
+    parser.addini(
+        "fail_slow_history",
+        type="bool",
+        default=False,
+        help=(
+            "Record the durations of test setups, calls, & teardowns in"
+            " pytest's cache directory for use by --fail-slow-regression and"
+            " --fail-slow-order"
+        ),
+    )
+    parser.addini(
+        "fail_slow_calibrate",
+        type="bool",
+        default=False,
+        help=(
+            "Scale duration thresholds & budgets by the time taken by a short"
+            " benchmark on the current host, cached in pytest's cache directory,"
+            " relative to fail_slow_calibration_reference"
+        ),
+    )
+    parser.addini(
+        "fail_slow_calibration_reference",
+        help=(
+            "The time taken by the calibration benchmark on the machine for"
+            " which thresholds were written (required by fail_slow_calibrate)"
+        ),
+    )
+    parser.addini(
+        "fail_slow_relative_min",
+        default="100ms",
+        help=(
+            "Test phases that take less than this long are never failed by"
+            " thresholds relative to their history (default: 100ms)"
+        ),
+    )
+    parser.addini(
+        "fail_slow_fixture_setup",
+        type="linelist",
+        help=(
+            "Lines of the form 'NAME = DURATION'; fail tests whose setup of the"
+            " given fixture takes more than the given duration"
+        ),
+    )
+    parser.addini(
+        "fail_slow_fixture_teardown",
+        type="linelist",
+        help=(
+            "Lines of the form 'NAME = DURATION'; fail tests during whose"
+            " teardown the given fixture takes more than the given duration to"
+            " finalize"
+        ),
+    )
+    parser.addini(
+        "fail_slow_budgets",
+        type="linelist",
+        help=(
+            "Lines of the form 'PATTERN = DURATION' or 'PATTERN = PHASE:"
+            " DURATION, ...'; fail tests without markers whose node IDs match"
+            " PATTERN and whose call (or the given phase) takes more than the"
+            " given duration"
+        ),
+    )
+    parser.addini(
+        "fail_slow_total",
+        type="linelist",
+        help=(
+            "Lines of the form 'NODEID = DURATION'; report if the tests in the"
+            " given directory, module, or class take more than the given"
+            " duration to run in total"
+        ),
+    )
+
+
+class Limits(NamedTuple):
+    """The thresholds that apply to a test phase"""
+
+    #: Fixed threshold in seconds
+    timeout: int | float | None = None
+
+    #: Pairs of percentile names (keys of `QUANTILES`) and the multiples of
+    #: the phase's historical value for that percentile that it may not exceed
+    percentiles: tuple[tuple[str, float], ...] = ()
+
+    #: The clock (a key of `CLOCKS`) that `timeout` is checked against, or
+    #: `None` to use the one given by ``--fail-slow-clock``
+    clock: str | None = None
+
+    #: Where the limits come from: ``"marker"``, ``"budget"`` (the
+    #: ``fail_slow_budgets`` ini option), or ``"option"``
+    source: str = "option"
+
+
+class Threshold(NamedTuple):
+    """A threshold that applies to a test phase and the value checked against it"""
+
+    #: The clock (a key of `CLOCKS`) on which `measured` was measured
+    clock: str
+
+    #: The duration or CPU time of the test phase
+    measured: float
+
+    #: The threshold in seconds
+    limit: float
+
+    #: Where the threshold comes from: ``"marker"``, ``"budget"``,
+    #: ``"option"``, or ``"history"``
+    source: str
+
+    #: Explanation of the threshold or measurement for failure messages
+    note: str | None = None
+
+    def exceeded(self) -> bool:
+        return self.measured > self.limit
+
+    def message(self, phase: Phase) -> str:
+        msg = (
+            f"{phase.label} passed but took too long to run:"
+            f" {CLOCKS[self.clock]} {self.measured}s > {self.limit}s"
+        )
+        if self.note is not None:
+            msg += f" ({self.note})"
+        return msg
+
+
+class Phase(NamedTuple):
+    """How thresholds are set, stored, and reported for a test phase"""
+
+    label: str
+    mark_name: str
+    option_name: str
+    timeout_key: pytest.StashKey[int | float | None]
+    percentiles_key: pytest.StashKey[tuple[tuple[str, float], ...]]
+    clock_key: pytest.StashKey[str]
+
+
+PHASES = {
+    "setup": Phase(
+        "Setup",
+        "fail_slow_setup",
+        "--fail-slow-setup",
+        setup_timeout_key,
+        setup_percentiles_key,
+        setup_clock_key,
+    ),
+    "call": Phase(
+        "Test",
+        "fail_slow",
+        "--fail-slow",
+        call_timeout_key,
+        call_percentiles_key,
+        call_clock_key,
+    ),
+    "teardown": Phase(
+        "Teardown",
+        "fail_slow_teardown",
+        "--fail-slow-teardown",
+        teardown_timeout_key,
+        teardown_percentiles_key,
+        teardown_clock_key,
+    ),
+}
+
+#: The budget for the setup, call, and teardown of a test combined, checked
+#: when the teardown is reported.  Percentiles are not supported for it.
+COMBINED = Phase(
+    "Setup, call, and teardown",
+    "fail_slow_combined",
+    "--fail-slow-combined",
+    combined_timeout_key,
+    combined_percentiles_key,
+    combined_clock_key,
+)
+
+#: The scaling group that a test belongs to, if any
+scaling_key = pytest.StashKey[ScalingGroup]()
+
+#: Limits resolved for a node (and thus also for any of its descendants that
+#: don't have markers of their own), or the error raised while resolving them,
+#: keyed by marker name & the path of the module the limits were resolved for.
+#: ``enabled=`` conditions are evaluated in the namespace of a test's module,
+#: so limits resolved on a package or directory can't be shared across modules.
+node_limits_key = pytest.StashKey[
+    dict[tuple[str, Path], Union[Limits, pytest.UsageError, Failed]]
+]()
+
+
+#: Parsers & descriptions of the positional arguments of markers that don't
+#: take durations
+MARKER_VALUES: dict[str, tuple[Callable[[Any], int | float], str]] = {
+    "fail_fat": (parse_size, "size"),
+}
+
+
+class DeferredCondition(Exception):
+    """
+    Raised during collection when a threshold depends on an ``enabled=``
+    condition that has to be evaluated separately for each test
+    """
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    # Resolve thresholds up front so that per-test overhead is minimal and so
+    # that misused markers are reported before any tests are run
+    keep = []
+    # Errors cached by `get_fail_slow_limits()` are raised again for every test
+    # that a misused marker applies to, but they're only reported once
+    reported: set[int] = set()
+    for item in items:
+        try:
+            resolve_timeouts(item, collecting=True)
+            resolve_scaling(item)
+            resolve_io_budgets(item)
+        except pytest.UsageError as exc:
+            if id(exc) not in reported:
+                reported.add(id(exc))
+                report_bad_item(
+                    config, item, "".join(traceback.format_exception_only(exc))
+                )
+        except Failed as exc:
+            if id(exc) not in reported:
+                reported.add(id(exc))
+                report_bad_item(config, item, str(exc))
+        else:
+            keep.append(item)
+    items[:] = keep
+    register_fixture_timer(config, keep)
+    # Groups are only complete once all deselected & bad tests are removed
+    group_scaling_tests(keep)
+    if config.getoption("--fail-slow-order") == "slowest-first":
+        estimates = estimate_durations(
+            get_history(config), [item.nodeid for item in items]
+        )
+        items[:] = [items[i] for i in slowest_first(estimates)]
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config: pytest.Config, log: Any) -> Any:
+    if (
+        config.getoption("--fail-slow-order") != "slowest-first"
+        or config.getoption("dist") != "load"
+    ):
+        return None
+    # Only imported here, as pytest-xdist is an optional dependency that is
+    # installed whenever this hook is called
+    from ._xdist import SlowestFirstScheduling
+
+    history = get_history(config)
+    return SlowestFirstScheduling(
+        config, log, lambda nodeids: estimate_durations(history, nodeids)
+    )
+
+
+def register_fixture_timer(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """
+    Register the `FixtureTimer` if any fixture budgets are configured or if
+    any of ``items`` has thresholds whose failure messages would list fixture
+    durations.  Timing every fixture is not free, so it's skipped otherwise.
+    """
+    timer = config.stash[fixture_timer_key]
+    if (
+        any(timer.budgets.values())
+        or any(
+            phase.timeout_key not in item.stash or has_thresholds(item, when)
+            for item in items
+            for when, phase in PHASES.items()
+        )
+    ) and not config.pluginmanager.is_registered(timer):
+        config.pluginmanager.register(timer, "fail-slow-fixture-timer")
 
 
-def pytest_runtest_setup(item: pytest.Item) -> None:
-    item.stash[setup_timeout_key] = get_fail_slow_timeout(
-        item, "fail_slow_setup", "--fail-slow-setup"
+def resolve_scaling(item: pytest.Item) -> None:
+    """
+    Determine the scaling group, if any, that ``item`` belongs to by virtue of
+    a ``fail_slow_scaling`` marker.  The group's size is filled in later.
+    """
+    m = item.get_closest_marker("fail_slow_scaling")
+    if m is None:
+        return
+    if len(m.args) != 2:
+        raise pytest.UsageError(
+            "@pytest.mark.fail_slow_scaling() takes exactly two positional"
+            " arguments"
+        )
+    param, complexity = m.args
+    try:
+        complexity = parse_complexity(complexity)
+    except (AttributeError, ValueError):
+        raise pytest.UsageError(
+            f"@pytest.mark.fail_slow_scaling(): unsupported complexity"
+            f" {complexity!r}; supported complexities are"
+            f" {', '.join(COMPLEXITIES)}"
+        )
+    tolerance = m.kwargs.get("tolerance", 0.5)
+    if not isinstance(tolerance, (int, float)) or not tolerance >= 0:
+        raise pytest.UsageError(
+            f"@pytest.mark.fail_slow_scaling(): invalid tolerance {tolerance!r}"
+        )
+    enabled = m.kwargs.get("enabled", True)
+    if isinstance(enabled, str):
+        enabled = evaluate_enabled(item, "fail_slow_scaling", enabled)
+    if not enabled:
+        return
+    callspec = getattr(item, "callspec", None)
+    if callspec is None or param not in callspec.params:
+        raise pytest.UsageError(
+            f"@pytest.mark.fail_slow_scaling(): test is not parametrized by"
+            f" {param!r}"
+        )
+    value = callspec.params[param]
+    try:
+        size = size_of(value)
+    except (TypeError, ValueError):
+        raise pytest.UsageError(
+            f"@pytest.mark.fail_slow_scaling(): invalid size {value!r} for"
+            f" {param!r}"
+        )
+    # Strip the "[ID]" suffix of the parametrized test's node ID; the test's
+    # other parameters are taken into account by `group_scaling_tests()`.
+    base = item.nodeid[: -len(callspec.id) - 2]
+    item.stash[scaling_key] = ScalingGroup(
+        base, param, complexity, tolerance, size, 0
     )
-    item.stash[call_timeout_key] = get_fail_slow_timeout(
-        item, "fail_slow", "--fail-slow"
+
+
+def resolve_io_budgets(item: pytest.Item) -> None:
+    """
+    Determine the resource budgets, if any, set for ``item``'s call phase by a
+    ``fail_slow_io`` marker
+    """
+    m = item.get_closest_marker("fail_slow_io")
+    if m is None:
+        return
+    if m.args:
+        raise pytest.UsageError(
+            "@pytest.mark.fail_slow_io() takes no positional arguments"
+        )
+    enabled = m.kwargs.get("enabled", True)
+    if isinstance(enabled, str):
+        enabled = evaluate_enabled(item, "fail_slow_io", enabled)
+    if not enabled:
+        return
+    budgets: dict[str, int | float] = {}
+    for name, value in m.kwargs.items():
+        if name in ("enabled", "cache_condition"):
+            continue
+        if name not in BUDGETS:
+            raise pytest.UsageError(
+                f"@pytest.mark.fail_slow_io(): unknown budget {name!r}; supported"
+                f" budgets are {', '.join(BUDGETS)}"
+            )
+        try:
+            if name in SIZE_BUDGETS:
+                budgets[name] = parse_size(value)
+            elif isinstance(value, int) and not isinstance(value, bool):
+                if value < 0:
+                    raise ValueError(value)
+                budgets[name] = value
+            else:
+                raise ValueError(value)
+        except ValueError:
+            raise pytest.UsageError(
+                f"@pytest.mark.fail_slow_io(): invalid {name} budget {value!r}"
+            )
+    if not budgets:
+        raise pytest.UsageError(
+            "@pytest.mark.fail_slow_io() requires at least one budget"
+        )
+    item.stash[io_budgets_key] = budgets
+
+
+def group_scaling_tests(items: list[pytest.Item]) -> None:
+    """
+    Split the tests of each function with a ``fail_slow_scaling`` marker into
+    groups of tests with equal values for all parameters other than the one
+    that the durations scale with, and fill in the group IDs & sizes.  Groups
+    are numbered in collection order, which is the same on all xdist workers.
+    """
+    #: Other parameters of the first test in each group, keyed by base node ID
+    firsts: dict[str, list[dict[str, Any]]] = {}
+    grouped = []
+    for item in items:
+        if (sg := item.stash.get(scaling_key, None)) is None:
+            continue
+        params = item.callspec.params  # type: ignore[attr-defined]
+        others = {k: v for k, v in params.items() if k != sg.param}
+        candidates = firsts.setdefault(sg.group, [])
+        i = next(
+            (i for i, o in enumerate(candidates) if params_equal(o, others)), None
+        )
+        if i is None:
+            i = len(candidates)
+            candidates.append(others)
+        grouped.append((item, sg._replace(group=f"{sg.group}#{i}")))
+    sizes = Counter(sg.group for _, sg in grouped)
+    for item, sg in grouped:
+        item.stash[scaling_key] = sg._replace(n_tests=sizes[sg.group])
+
+
+def params_equal(a: dict[str, Any], b: dict[str, Any]) -> bool:
+    try:
+        return bool(a == b)
+    except Exception:
+        # E.g., comparing NumPy arrays
+        return False
+
+
+def report_bad_item(config: pytest.Config, item: pytest.Item, msg: str) -> None:
+    report = pytest.CollectReport(item.nodeid, "failed", longrepr=msg, result=[])
+    config.hook.pytest_collectreport(report=report)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_setup(item: pytest.Item) -> Generator[None, None, None]:
+    resolve_timeouts(item)
+    with (
+        measure_cpu(item, "setup"),
+        measure_gc(item, "setup"),
+        measure_resources(item, "setup"),
+        profile_phase(item, "setup"),
+        watch_phase(item, "setup"),
+    ):
+        return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Generator[None, None, None]:
+    with (
+        measure_cpu(item, "call"),
+        measure_gc(item, "call"),
+        measure_resources(item, "call"),
+        measure_memory(item),
+        measure_blocking(item),
+        profile_phase(item, "call"),
+        watch_phase(item, "call"),
+    ):
+        return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_teardown(item: pytest.Item) -> Generator[None, None, None]:
+    with (
+        measure_cpu(item, "teardown"),
+        measure_gc(item, "teardown"),
+        measure_resources(item, "teardown"),
+        profile_phase(item, "teardown"),
+    ):
+        return (yield)
+
+
+@contextmanager
+def profile_phase(item: pytest.Item, when: str) -> Iterator[None]:
+    """
+    Profile the given phase of ``item`` if ``--fail-slow-profile`` was given
+    and the phase has any thresholds
+    """
+    if (
+        item.config.getoption("--fail-slow-profile") is None
+        or not has_thresholds(item, when)
+        or (profiler := start_profiler()) is None
+    ):
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        item.stash.setdefault(profiles_key, {})[when] = profiler
+
+
+def has_thresholds(item: pytest.Item, when: str) -> bool:
+    phase = PHASES[when]
+    return (
+        item.stash.get(phase.timeout_key, None) is not None
+        or bool(item.stash.get(phase.percentiles_key, ()))
+        or item.stash.get(COMBINED.timeout_key, None) is not None
+        or item.config.getoption("--fail-slow-regression") is not None
+        or (
+            when == "call"
+            and (
+                item.stash.get(memory_limit_key, None) is not None
+                or item.stash.get(blocking_limit_key, None) is not None
+                or io_budgets_key in item.stash
+            )
+        )
     )
 
 
+@contextmanager
+def watch_phase(item: pytest.Item, when: str) -> Iterator[None]:
+    """
+    If ``--fail-slow-sample`` was given, have the watchdog sample the stack of
+    the given phase of ``item`` once it runs past its lowest threshold
+    """
+    watchdog = item.config.stash.get(watchdog_key, None)
+    if watchdog is None or (limit := lowest_limit(item, when)) is None:
+        yield
+        return
+    watchdog.arm(limit)
+    try:
+        yield
+    finally:
+        item.stash.setdefault(stack_samples_key, {})[when] = (
+            limit,
+            watchdog.disarm(),
+        )
+
+
+def lowest_limit(item: pytest.Item, when: str) -> float | None:
+    """
+    Returns the lowest of the fixed and historical thresholds of the given
+    phase of ``item``, if it has any, without regard to the thresholds' clocks
+    """
+    limits = [t.limit for t in history_thresholds(item, when, 0)]
+    if (timeout := item.stash.get(PHASES[when].timeout_key, None)) is not None:
+        limits.append(timeout)
+    return min(limits, default=None)
+
+
+@contextmanager
+def measure_blocking(item: pytest.Item) -> Iterator[None]:
+    """
+    Record the asyncio callbacks that block the event loop for longer than the
+    blocking limit of ``item``'s call phase, if it has one
+    """
+    limit = item.stash.get(blocking_limit_key, None)
+    if limit is None:
+        yield
+        return
+    with BlockingMonitor(limit, str(item.config.rootpath)) as monitor:
+        yield
+    item.stash[blocking_key] = monitor
+
+
+@contextmanager
+def measure_memory(item: pytest.Item) -> Iterator[None]:
+    """
+    Record the peak memory allocated by ``item``'s call phase, if it has a
+    memory limit.  Memory allocations are only traced while this is done.
+    """
+    if item.stash.get(memory_limit_key, None) is None:
+        yield
+        return
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+        item.stash[peak_memory_key] = max(peak - baseline, 0)
+
+
+@contextmanager
+def measure_resources(item: pytest.Item, when: str) -> Iterator[None]:
+    """
+    Record the resource usage of the given phase of ``item`` if the phase has
+    resource budgets or if ``--fail-slow-resources`` was given and the phase
+    has any thresholds
+    """
+    if not (
+        (when == "call" and io_budgets_key in item.stash)
+        or (
+            item.config.getoption("--fail-slow-resources")
+            and has_thresholds(item, when)
+        )
+    ):
+        yield
+        return
+    start = snapshot()
+    yield
+    item.stash.setdefault(resources_key, {})[when] = usage_since(start)
+
+
+@contextmanager
+def measure_gc(item: pytest.Item, when: str) -> Iterator[None]:
+    """
+    Record the garbage collections during the given phase of ``item``, if the
+    phase has any thresholds
+    """
+    if not has_thresholds(item, when):
+        yield
+        return
+    with GCMonitor() as monitor:
+        yield
+    item.stash.setdefault(gc_key, {})[when] = monitor
+
+
+@contextmanager
+def measure_cpu(item: pytest.Item, when: str) -> Iterator[None]:
+    """
+    Record the CPU time used by the given phase of ``item`` on each clock that
+    one of its thresholds is checked against, if any
+    """
+    clocks = {
+        item.stash.get(PHASES[when].clock_key, "wall"),
+        item.stash.get(COMBINED.clock_key, "wall"),
+    }
+    clocks.discard("wall")
+    if not clocks:
+        yield
+        return
+    children = item.config.getoption("--fail-slow-cpu-children")
+    funcs = {c: get_clock(c, children) for c in clocks}
+    start = {c: f() for c, f in funcs.items()}
+    try:
+        yield
+    finally:
+        item.stash.setdefault(cpu_times_key, {})[when] = {
+            c: f() - start[c] for c, f in funcs.items()
+        }
+
+
+def resolve_timeouts(item: pytest.Item, collecting: bool = False) -> None:
+    get_total_budgets(item, item)
+    if memory_limit_key not in item.stash:
+        try:
+            limits = get_fail_slow_limits(
+                item, "fail_fat", "--fail-fat", collecting=collecting
+            )
+        except DeferredCondition:
+            pass
+        else:
+            if limits.percentiles or limits.clock is not None:
+                raise pytest.UsageError(
+                    "@pytest.mark.fail_fat() does not support percentile"
+                    " thresholds or the 'clock' argument"
+                )
+            item.stash[memory_limit_key] = limits.timeout
+    if blocking_limit_key not in item.stash:
+        try:
+            limits = get_fail_slow_limits(
+                item,
+                "fail_slow_blocking",
+                "--fail-slow-blocking",
+                collecting=collecting,
+            )
+        except DeferredCondition:
+            pass
+        else:
+            if limits.percentiles or limits.clock is not None:
+                raise pytest.UsageError(
+                    "@pytest.mark.fail_slow_blocking() does not support"
+                    " percentile thresholds or the 'clock' argument"
+                )
+            item.stash[blocking_limit_key] = limits.timeout
+    for phase in [*PHASES.values(), COMBINED]:
+        if phase.timeout_key in item.stash:
+            continue
+        try:
+            limits = get_fail_slow_limits(
+                item, phase.mark_name, phase.option_name, collecting=collecting
+            )
+        except DeferredCondition:
+            continue
+        if limits.percentiles and phase is COMBINED:
+            raise pytest.UsageError(
+                f"@pytest.mark.{phase.mark_name}() does not support percentile"
+                " thresholds"
+            )
+        item.stash[phase.timeout_key] = limits.timeout
+        item.stash[phase.percentiles_key] = limits.percentiles
+        item.stash[phase.clock_key] = limits.clock or item.config.getoption(
+            "--fail-slow-clock"
+        )
+        item.stash.setdefault(threshold_sources_key, {})[
+            phase.mark_name
+        ] = limits.source
+        if limits.percentiles:
+            get_history(item.config)
+
+
 def get_fail_slow_timeout(
-    item: pytest.Item, mark_name: str, option_name: str
+    item: pytest.Item, mark_name: str, option_name: str, collecting: bool = False
 ) -> int | float | None:
-    m = item.get_closest_marker(mark_name)
-    if m is None:
+    return get_fail_slow_limits(
+        item, mark_name, option_name, collecting=collecting
+    ).timeout
+
+
+def get_fail_slow_limits(
+    item: pytest.Item, mark_name: str, option_name: str, collecting: bool = False
+) -> Limits:
+    # Walk up the node chain looking for either cached limits or the closest
+    # marker.  The result is then cached on every node passed through on the
+    # way, so that sibling tests can reuse it from their parent.  Errors are
+    # cached as well, so that a misused marker is only reported once rather
+    # than once for every test it applies to.
+    key = (mark_name, item.path)
+    uncached: list[Node] = []
+    node: Node | None = item
+    result: Limits | pytest.UsageError | Failed
+    while node is not None:
+        cache = node.stash.get(node_limits_key, None)
+        if cache is not None and key in cache:
+            result = cache[key]
+            break
+        m = next((m for m in node.own_markers if m.name == mark_name), None)
+        if m is not None:
+            try:
+                limits, cacheable = limits_from_marker(
+                    item, m, mark_name, collecting=collecting
+                )
+            except (pytest.UsageError, Failed) as exc:
+                result = exc
+            else:
+                result = scale_limits(item.config, mark_name, limits)
+                if not cacheable:
+                    return result
+            uncached.append(node)
+            break
+        uncached.append(node)
+        node = node.parent
+    else:
         timeout = item.config.getoption(option_name)
         assert isinstance(timeout, (int, float)) or timeout is None
-        return timeout
-    try:
-        (duration,) = m.args
-    except ValueError:
+        result = scale_limits(item.config, mark_name, Limits(timeout))
+    for n in uncached:
+        n.stash.setdefault(node_limits_key, {})[key] = result
+    if not isinstance(result, Limits):
+        raise result
+    limits = result
+    if limits.source == "option" and (
+        index := item.config.stash[budgets_key].get(mark_name)
+    ):
+        # Budgets are matched against each test's own node ID, so they're
+        # looked up after (and not cached along with) the marker-less limits.
+        if (budget := index.lookup(item.nodeid)) is not None:
+            limits = Limits(budget, source="budget")
+            return scale_limits(item.config, mark_name, limits)
+    return limits
+
+
+def scale_limits(config: pytest.Config, mark_name: str, limits: Limits) -> Limits:
+    """Scale a fixed duration threshold by the host's speed factor"""
+    speed = config.stash[speed_factor_key]
+    if speed == 1 or limits.timeout is None or mark_name in MARKER_VALUES:
+        return limits
+    return limits._replace(timeout=limits.timeout * speed)
+
+
+def scale_budgets(
+    config: pytest.Config, budgets: dict[str, float]
+) -> dict[str, float]:
+    """Scale the durations of a mapping of budgets by the host's speed factor"""
+    speed = config.stash[speed_factor_key]
+    if speed == 1:
+        return budgets
+    return {k: v * speed for k, v in budgets.items()}
+
+
+def limits_from_marker(
+    item: pytest.Item, m: pytest.Mark, mark_name: str, collecting: bool = False
+) -> tuple[Limits, bool]:
+    """
+    Returns the limits set by marker ``m`` along with a `bool` indicating
+    whether they can be reused for other tests that the marker applies to
+    """
+    percentiles = []
+    for k, v in m.kwargs.items():
+        if re.fullmatch(r"p\d+", k):
+            if k not in QUANTILES:
+                raise pytest.UsageError(
+                    f"@pytest.mark.{mark_name}(): unsupported percentile {k!r};"
+                    f" supported percentiles are {', '.join(QUANTILES)}"
+                )
+            try:
+                percentiles.append((k, parse_factor(v)))
+            except (TypeError, ValueError):
+                raise pytest.UsageError(
+                    f"@pytest.mark.{mark_name}(): invalid factor {v!r} for {k}"
+                )
+    if percentiles:
+        if len(m.args) > 1:
+            raise pytest.UsageError(
+                f"@pytest.mark.{mark_name}() takes at most one positional"
+                " argument"
+            )
+    elif len(m.args) != 1:
         raise pytest.UsageError(
             f"@pytest.mark.{mark_name}() takes exactly one positional argument"
         )
+    if m.args:
+        (duration,) = m.args
+        parse, what = MARKER_VALUES.get(mark_name, (parse_duration, "duration"))
+        try:
+            timeout = parse(duration)
+        except (TypeError, ValueError):
+            raise pytest.UsageError(
+                f"@pytest.mark.{mark_name}(): invalid {what} {duration!r}"
+            )
+    else:
+        timeout = None
+    clock = m.kwargs.get("clock")
+    if clock is not None and clock not in CLOCKS:
+        raise pytest.UsageError(
+            f"@pytest.mark.{mark_name}(): invalid clock {clock!r}; supported"
+            f" clocks are {', '.join(CLOCKS)}"
+        )
     enabled = m.kwargs.get("enabled", True)
+    cacheable = True
     if isinstance(enabled, str):
-        enabled = evaluate_enabled(item, mark_name, enabled)
+        cacheable = bool(m.kwargs.get("cache_condition", True))
+        if not cacheable and collecting:
+            raise DeferredCondition()
+        enabled = evaluate_enabled(item, mark_name, enabled, cache=cacheable)
     if not enabled:
-        return None
-    return parse_duration(duration)
+        return (Limits(source="marker"), cacheable)
+    return (Limits(timeout, tuple(percentiles), clock, "marker"), cacheable)
 
 
-def evaluate_enabled(item: pytest.Item, mark_name: str, condition: str) -> bool:
-    # Based on evaluate_condition() in _pytest/skipping.py
-    ctx = {
-        "os": os,
-        "sys": sys,
-        "platform": platform,
-        "config": item.config,
-    }
-    for dictionary in reversed(
-        item.ihook.pytest_markeval_namespace(config=item.config)
-    ):
-        if not isinstance(dictionary, Mapping):  # pragma: no cover
-            raise ValueError(
-                "pytest_markeval_namespace() needs to return a dict, got"
-                f" {dictionary!r}"
+def get_total_budgets(
+    item: pytest.Item, node: Node
+) -> tuple[tuple[str, float], ...]:
+    """
+    Returns the node IDs & total budgets of ``node`` and of those of its
+    ancestors that have total budgets.  The result is cached on each node, and
+    so any ``enabled=`` conditions are only evaluated for the first test in a
+    node.
+    """
+    budgets = node.stash.get(total_budgets_key, None)
+    if budgets is None:
+        if node.parent is None:
+            # The session's budget is handled by `TotalsTracker` itself
+            budgets = ()
+        else:
+            budgets = get_total_budgets(item, node.parent)
+            m = next(
+                (m for m in node.own_markers if m.name == "fail_slow_total"), None
             )
-        ctx.update(dictionary)
+            if m is not None:
+                limits, _ = limits_from_marker(item, m, "fail_slow_total")
+                limits = scale_limits(item.config, "fail_slow_total", limits)
+                if limits.percentiles:
+                    raise pytest.UsageError(
+                        "@pytest.mark.fail_slow_total() does not support"
+                        " percentile thresholds"
+                    )
+                if limits.clock is not None:
+                    raise pytest.UsageError(
+                        "@pytest.mark.fail_slow_total() does not support the"
+                        " 'clock' argument"
+                    )
+                budget = limits.timeout
+            else:
+                budget = item.config.stash[ini_totals_key].get(node.nodeid)
+            if budget is not None:
+                budgets = (*budgets, (node.nodeid, budget))
+        node.stash[total_budgets_key] = budgets
+    return budgets
+
+
+def evaluate_enabled(
+    item: pytest.Item, mark_name: str, condition: str, cache: bool = True
+) -> bool:
+    # Based on evaluate_condition() in _pytest/skipping.py
+    #
+    # Compiled conditions are always reused.  Unless `cache` is false, the
+    # evaluation namespace and the result are also reused across items in the
+    # same module, as they can only differ if the module's globals are mutated
+    # while tests are running.
+    ccache = item.config.stash[condition_cache_key]
     if hasattr(item, "obj"):
-        ctx.update(item.obj.__globals__)
+        globs = item.obj.__globals__
+    else:
+        globs = None
+    nskey = (item.path, id(globs))
+    reskey = (mark_name, condition, *nskey)
+    if cache:
+        if (cached := ccache.results.get(reskey)) is not None:
+            return cached
+        ctx = ccache.namespaces.get(nskey)
+        if ctx is None:
+            ctx = ccache.namespaces[nskey] = build_namespace(item, globs)
+    else:
+        ctx = build_namespace(item, globs)
     try:
-        filename = f"<{mark_name} enabled>"
-        code = compile(condition, filename, "eval")
-        return bool(eval(code, ctx))
+        code = ccache.code.get((mark_name, condition))
+        if code is None:
+            filename = f"<{mark_name} enabled>"
+            code = compile(condition, filename, "eval")
+            ccache.code[mark_name, condition] = code
+        # eval() adds `__builtins__` to the namespace it's given, so pass a
+        # copy in order to keep cached namespaces unmodified
+        result = bool(eval(code, dict(ctx)))
     except SyntaxError as exc:
         msglines = [
             f"Error evaluating {mark_name!r} condition",
@@ -167,6 +1609,32 @@ def evaluate_enabled(item: pytest.Item, mark_name: str, condition: str) -> bool:
             *traceback.format_exception_only(type(exc), exc),
         ]
         pytest.fail("\n".join(msglines), pytrace=False)
+    if cache:
+        ccache.results[reskey] = result
+    return result
+
+
+def build_namespace(
+    item: pytest.Item, globs: dict[str, Any] | None
+) -> dict[str, Any]:
+    ctx = {
+        "os": os,
+        "sys": sys,
+        "platform": platform,
+        "config": item.config,
+    }
+    for dictionary in reversed(
+        item.ihook.pytest_markeval_namespace(config=item.config)
+    ):
+        if not isinstance(dictionary, Mapping):  # pragma: no cover
+            raise ValueError(
+                "pytest_markeval_namespace() needs to return a dict, got"
+                f" {dictionary!r}"
+            )
+        ctx.update(dictionary)
+    if globs is not None:
+        ctx.update(globs)
+    return ctx
 
 
 @pytest.hookimpl(wrapper=True)
@@ -174,22 +1642,338 @@ def pytest_runtest_makereport(
     item: pytest.Item, call: pytest.CallInfo
 ) -> Generator[None, pytest.TestReport, pytest.TestReport]:
     report = yield
-    if report.outcome != "passed":
+    if (sg := item.stash.get(scaling_key, None)) is not None:
+        # Read by `ScalingTracker`
+        report.fail_slow_scaling = tuple(sg)  # type: ignore[attr-defined]
+    if containers := item.stash.get(total_budgets_key, ()):
+        # Read by `TotalsTracker`
+        report.fail_slow_containers = containers  # type: ignore[attr-defined]
+    if item.stash.get(PHASES[report.when].percentiles_key, ()):
+        # Read by `DurationHistory` & `HistoryStarter`
+        report.fail_slow_percentiles = True  # type: ignore[attr-defined]
+    recording = item.config.getoption("--fail-slow-record") is not None
+    if recording:
+        add_worker_id(item, report)
+    profiler = item.stash.get(profiles_key, {}).pop(report.when, None)
+    samples = item.stash.get(stack_samples_key, {}).pop(report.when, None)
+    gc_monitor = item.stash.get(gc_key, {}).pop(report.when, None)
+    usage = item.stash.get(resources_key, {}).pop(report.when, None)
+    if report.outcome != "passed" or report.when not in PHASES:
         return report
-    if report.when == "setup":
-        timeout = item.stash[setup_timeout_key]
-        if timeout is not None and call.duration > timeout:
-            report.outcome = "failed"
-            report.longrepr = (
-                "Setup passed but took too long to run:"
-                f" Duration {call.duration}s > {timeout}s"
-            )
-    elif report.when == "call":
-        timeout = item.stash[call_timeout_key]
-        if timeout is not None and call.duration > timeout:
-            report.outcome = "failed"
-            report.longrepr = (
-                "Test passed but took too long to run:"
-                f" Duration {call.duration}s > {timeout}s"
+    duration = call.duration
+    exclude_gc = item.config.getoption("--fail-slow-exclude-gc")
+    if exclude_gc and gc_monitor is not None:
+        duration -= gc_monitor.duration
+    if item.config.getoption("--fail-slow-normalize-load"):
+        load = load_factor()
+    else:
+        load = None
+    if item.config.getoption("--fail-slow-headroom") > 0 or recording:
+        # Read by `HeadroomSummary` & `RecordWriter`
+        closest = max(
+            iter_thresholds(item, report.when, duration, load),
+            key=lambda t: t.measured / t.limit if t.limit > 0 else math.inf,
+            default=None,
+        )
+        if closest is not None:
+            report.fail_slow_closest = closest[:4]  # type: ignore[attr-defined]
+    msg = check_phase(item, report.when, duration, load)
+    if (
+        msg is not None
+        and report.when == "call"
+        and (reruns := item.config.getoption("--fail-slow-confirm")) > 0
+    ):
+        msg = confirm_slow(item, duration, reruns, load, msg)
+    durations = item.stash.setdefault(durations_key, {})
+    if msg is None and report.when == "teardown" and "call" in durations:
+        # The setup & call passed (and weren't too slow) as well
+        t = fixed_threshold(
+            item,
+            COMBINED,
+            list(PHASES),
+            sum(durations.values()) + duration,
+            load,
+        )
+        if t is not None and t.exceeded():
+            msg = t.message(COMBINED)
+    if msg is None and report.when == "call":
+        msg = check_memory(item)
+        if msg is None:
+            msg = check_blocking(item)
+        if msg is None and usage is not None:
+            msg = check_io_budgets(item, usage)
+    if msg is None:
+        msg = item.config.stash[fixture_timer_key].check(
+            item, report.when, PHASES[report.when].label
+        )
+    if msg is not None:
+        if (breakdown := format_breakdown(item, report.when)) is not None:
+            msg += "\n" + breakdown
+        if profiler is not None:
+            try:
+                path = save_profile(
+                    profiler,
+                    item.config.invocation_params.dir
+                    / item.config.getoption("--fail-slow-profile"),
+                    item.nodeid,
+                    report.when,
+                )
+            except OSError as e:
+                saved = f"could not be saved: {e}"
+            else:
+                saved = f"saved to {path}"
+            msg += "\n" + format_top(profiler, saved)
+        if samples is not None and samples[1]:
+            msg += "\n" + format_samples(
+                samples[1], samples[0], item.config.getoption("--fail-slow-sample")
             )
+        if gc_monitor is not None and gc_monitor.counts:
+            msg += "\n" + format_gc(gc_monitor, exclude_gc)
+        if usage is not None:
+            msg += "\n" + format_usage(usage)
+        fail_report(report, msg)
+        # For `SlowSummary`
+        if load is not None:
+            report.fail_slow_load = load  # type: ignore[attr-defined]
+        add_worker_id(item, report)
+    else:
+        durations[report.when] = duration
     return report
+
+
+def add_worker_id(item: pytest.Item, report: pytest.TestReport) -> None:
+    """Attach the ID of the current pytest-xdist worker, if any, to ``report``"""
+    if (workerinput := getattr(item.config, "workerinput", None)) is not None:
+        worker = workerinput["workerid"]
+        report.fail_slow_worker = worker  # type: ignore[attr-defined]
+
+
+def check_phase(
+    item: pytest.Item, when: str, duration: float, load: float | None = None
+) -> str | None:
+    """
+    Check the duration of a passed test phase against its thresholds, returning
+    a failure message if any are exceeded
+    """
+    for t in iter_thresholds(item, when, duration, load):
+        if t.exceeded():
+            return t.message(PHASES[when])
+    return None
+
+
+def iter_thresholds(
+    item: pytest.Item, when: str, duration: float, load: float | None = None
+) -> Iterator[Threshold]:
+    """
+    Yields the thresholds that apply to a passed test phase that took
+    ``duration`` seconds of wall-clock time, in the order in which they're
+    checked
+    """
+    phase = PHASES[when]
+    if (t := fixed_threshold(item, phase, [when], duration, load)) is not None:
+        yield t
+    if duration >= item.config.stash[relative_min_key]:
+        # Historical thresholds for very quick phases are dominated by noise
+        yield from history_thresholds(item, when, duration)
+
+
+def history_thresholds(
+    item: pytest.Item, when: str, duration: float
+) -> Iterator[Threshold]:
+    """
+    Yields the thresholds based on its history that apply to a test phase that
+    took ``duration`` seconds of wall-clock time
+    """
+    for name, factor in item.stash[PHASES[when].percentiles_key]:
+        value = get_history(item.config).quantile(item.nodeid, when, QUANTILES[name])
+        if value is not None:
+            yield Threshold(
+                "wall",
+                duration,
+                factor * value,
+                "history",
+                f"{factor}x {name} of {value}s",
+            )
+    factor = item.config.getoption("--fail-slow-regression")
+    if factor is not None:
+        baseline = get_history(item.config).baseline(item.nodeid, when)
+        if baseline is not None:
+            yield Threshold(
+                "wall",
+                duration,
+                factor * baseline,
+                "history",
+                f"{factor}x baseline of {baseline}s",
+            )
+
+
+def confirm_slow(
+    item: pytest.Item, duration: float, reruns: int, load: float | None, msg: str
+) -> str | None:
+    """
+    Re-run the call phase of a test that was too slow up to ``reruns`` times and
+    check the minimum or median of all of the runs' durations against the
+    test's thresholds, returning a failure message if they are still exceeded.
+    When judging by the minimum, re-running stops as soon as one run is fast
+    enough.
+    """
+    judge = item.config.getoption("--fail-slow-judge")
+    stat = min if judge == "min" else statistics.median
+    exclude_gc = item.config.getoption("--fail-slow-exclude-gc")
+    cpu_times = item.stash.get(cpu_times_key, {})
+    samples = [(duration, cpu_times.get("call", {}))]
+    capman = item.config.pluginmanager.getplugin("capturemanager")
+    for _ in range(reruns):
+        capture: AbstractContextManager[None]
+        if capman is not None:
+            capture = discard_capture(capman)
+        else:
+            capture = nullcontext()
+        gc_monitor = GCMonitor() if exclude_gc else None
+        start = perf_counter()
+        try:
+            with capture, measure_cpu(item, "call"), gc_monitor or nullcontext():
+                item.runtest()
+        except (Exit, KeyboardInterrupt):
+            # As in pytest's own runner, these stop the session
+            raise
+        except (Exception, OutcomeException) as exc:
+            # OutcomeException covers pytest.skip(), pytest.fail(), &
+            # pytest.xfail() being called by the re-run
+            return (
+                f"{msg}\nNot confirmed by re-running: re-run raised"
+                f" {type(exc).__name__}: {exc}"
+            )
+        rerun_duration = perf_counter() - start
+        if gc_monitor is not None:
+            rerun_duration -= gc_monitor.duration
+        cpu_times = item.stash.get(cpu_times_key, {})
+        samples.append((rerun_duration, cpu_times.get("call", {})))
+        if judge == "min" and check_sample(item, *samples[-1], load) is None:
+            break
+    judged = stat(d for d, _ in samples)
+    judged_cpu = {c: stat(cpu[c] for _, cpu in samples) for c in samples[0][1]}
+    result = check_sample(item, judged, judged_cpu, load)
+    if result is None:
+        return None
+    lines = [f"{result} ({judge} of {len(samples)} runs)", "Runs:"]
+    for d, cpu in samples:
+        line = f"    {d}s"
+        if cpu:
+            line += " (" + ", ".join(f"{CLOCKS[c]} {t}s" for c, t in cpu.items()) + ")"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@contextmanager
+def discard_capture(capman: CaptureManager) -> Iterator[None]:
+    """
+    Capture output like `CaptureManager.item_capture()` does, but discard it
+    instead of adding it to the test's report sections, so that each re-run of
+    a test doesn't add another "Captured stdout call" section
+    """
+    capman.resume_global_capture()
+    capman.activate_fixture()
+    try:
+        yield
+    finally:
+        capman.deactivate_fixture()
+        capman.suspend_global_capture(in_=False)
+        capman.read_global_capture()
+
+
+def check_sample(
+    item: pytest.Item, duration: float, cpu: dict[str, float], load: float | None
+) -> str | None:
+    """
+    Check a (re-)run of a test's call phase, with the given wall-clock duration
+    & CPU times, against its thresholds
+    """
+    if cpu:
+        item.stash[cpu_times_key]["call"] = cpu
+    return check_phase(item, "call", duration, load)
+
+
+def fixed_threshold(
+    item: pytest.Item,
+    phase: Phase,
+    whens: list[str],
+    duration: float,
+    load: float | None = None,
+) -> Threshold | None:
+    """
+    Returns ``phase``'s fixed threshold, if any, for the given test phases,
+    which took ``duration`` seconds of wall-clock time in total, measured on
+    the threshold's clock.  If ``load`` is given, a wall-clock threshold is
+    multiplied by it.
+    """
+    timeout = item.stash[phase.timeout_key]
+    if timeout is None:
+        return None
+    clock = item.stash[phase.clock_key]
+    source = item.stash[threshold_sources_key][phase.mark_name]
+    if clock != "wall":
+        cpu_times = item.stash[cpu_times_key]
+        measured = sum(cpu_times[w][clock] for w in whens)
+        return Threshold(clock, measured, timeout, source, f"duration {duration}s")
+    elif load is not None and load > 1:
+        return Threshold(
+            clock,
+            duration,
+            timeout * load,
+            source,
+            f"{timeout}s scaled {load:.2f}x for system load",
+        )
+    else:
+        return Threshold(clock, duration, timeout, source)
+
+
+def check_memory(item: pytest.Item) -> str | None:
+    """
+    Check the peak memory allocated by a passed test call against its memory
+    limit, returning a failure message if it is exceeded
+    """
+    limit = item.stash[memory_limit_key]
+    peak = item.stash.get(peak_memory_key, None)
+    if limit is None or peak is None or peak <= limit:
+        return None
+    return (
+        "Test passed but used too much memory:"
+        f" Peak allocation {peak} bytes > {round(limit)} bytes"
+    )
+
+
+def check_blocking(item: pytest.Item) -> str | None:
+    """
+    Check whether any asyncio callbacks blocked the event loop for longer than
+    the limit during a passed test call, returning a failure message listing
+    the worst offenders if so
+    """
+    monitor = item.stash.get(blocking_key, None)
+    if monitor is None or not monitor.over:
+        return None
+    return format_offenders(monitor)
+
+
+def check_io_budgets(item: pytest.Item, usage: dict[str, int]) -> str | None:
+    """
+    Check the resource usage of a passed test call against its resource
+    budgets, returning a failure message if any are exceeded.  Budgets for
+    counters that aren't available on the current platform are ignored.
+    """
+    values = budget_values(usage)
+    for name, budget in item.stash.get(io_budgets_key, {}).items():
+        if (value := values.get(name)) is not None and value > budget:
+            return (
+                "Test passed but exceeded its resource budget:"
+                f" {BUDGETS[name]} {value} > {round(budget)}"
+            )
+    return None
+
+
+def fail_report(report: pytest.TestReport, msg: str) -> None:
+    report.outcome = "failed"
+    report.longrepr = msg
+    # Lets history recording tell these reports apart from genuine failures;
+    # extra attributes survive serialization by pytest-xdist.
+    report.fail_slow_exceeded = True  # type: ignore[attr-defined]
@@ -0,0 +1,129 @@
+"""Measurement of how long asyncio callbacks block the event loop"""
+
+from __future__ import annotations
+import asyncio
+import heapq
+from itertools import count
+import os.path
+import threading
+from time import perf_counter
+from types import TracebackType
+from typing import Any
+
+#: Maximum number of blocking callbacks listed in failure messages
+TOP_OFFENDERS = 5
+
+
+class BlockingMonitor:
+    """
+    Context manager that, while active, times every callback run by an asyncio
+    event loop in the current thread (including the steps of tasks) by wrapping
+    `asyncio.Handle._run()`, and keeps the longest of those that take more than
+    ``limit`` seconds.  Event loops that don't run their callbacks via
+    `asyncio.Handle` (such as uvloop) are not covered.
+    """
+
+    def __init__(self, limit: float, rootdir: str) -> None:
+        self.limit = limit
+        self.rootdir = rootdir.rstrip(os.sep) + os.sep
+        #: Min-heap of the longest blocking callbacks as (duration, tiebreaker,
+        #: description) triples
+        self.offenders: list[tuple[float, int, str]] = []
+        #: Number of callbacks that took more than `limit`
+        self.over = 0
+        self.longest = 0.0
+        self.counter = count()
+
+    def __enter__(self) -> BlockingMonitor:
+        self.orig_run = run = asyncio.Handle._run
+        ident = threading.get_ident()
+        monitor = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            if threading.get_ident() != ident:
+                return run(handle)
+            start_line = task_line(handle)
+            start = perf_counter()
+            try:
+                return run(handle)
+            finally:
+                if (elapsed := perf_counter() - start) > monitor.limit:
+                    monitor.add(handle, elapsed, start_line)
+                monitor.longest = max(monitor.longest, elapsed)
+
+        asyncio.Handle._run = _run  # type: ignore[method-assign, assignment]
+        return self
+
+    def __exit__(
+        self,
+        _exc_type: type[BaseException] | None,
+        _exc_val: BaseException | None,
+        _exc_tb: TracebackType | None,
+    ) -> None:
+        asyncio.Handle._run = self.orig_run  # type: ignore[method-assign]
+
+    def add(
+        self, handle: asyncio.Handle, elapsed: float, start_line: int | None
+    ) -> None:
+        self.over += 1
+        entry = (elapsed, next(self.counter), self.describe(handle, start_line))
+        if len(self.offenders) < TOP_OFFENDERS:
+            heapq.heappush(self.offenders, entry)
+        else:
+            heapq.heappushpop(self.offenders, entry)
+
+    def describe(self, handle: asyncio.Handle, start_line: int | None) -> str:
+        """
+        Describe a callback: for a task step, the task's coroutine and the
+        lines at which it resumed and next suspended; otherwise, the handle's
+        repr
+        """
+        task = handle_task(handle)
+        if task is None:
+            return repr(handle)
+        coro: Any = task.get_coro()
+        if (code := getattr(coro, "cr_code", None)) is None:
+            return repr(task)
+        filename = code.co_filename
+        if filename.startswith(self.rootdir):
+            filename = filename[len(self.rootdir) :]
+        where = f"{filename}:{start_line or code.co_firstlineno}"
+        if (frame := coro.cr_frame) is not None:
+            where += f" to {frame.f_lineno}"
+        else:
+            where += " to return"
+        return f"task {task.get_name()!r} running {coro.__qualname__}() from {where}"
+
+    def top(self) -> list[tuple[float, str]]:
+        """Returns the longest blocking callbacks, longest first"""
+        return [(d, desc) for d, _, desc in sorted(self.offenders, reverse=True)]
+
+
+def handle_task(handle: asyncio.Handle) -> asyncio.Task[Any] | None:
+    task = getattr(handle._callback, "__self__", None)  # type: ignore[attr-defined]
+    if isinstance(task, asyncio.Task):
+        return task
+    return None
+
+
+def task_line(handle: asyncio.Handle) -> int | None:
+    """
+    Returns the line at which the coroutine of the task that ``handle`` steps,
+    if any, is currently suspended
+    """
+    if (task := handle_task(handle)) is not None:
+        frame = getattr(task.get_coro(), "cr_frame", None)
+        if frame is not None:
+            return int(frame.f_lineno)
+    return None
+
+
+def format_offenders(monitor: BlockingMonitor) -> str:
+    lines = [
+        "Test passed but blocked the event loop for too long: Longest callback"
+        f" {monitor.longest}s > {monitor.limit}s",
+        f"Blocking callbacks ({monitor.over} over the limit, longest first):",
+    ]
+    for duration, desc in monitor.top():
+        lines.append(f"    {duration}s: {desc}")
+    return "\n".join(lines)
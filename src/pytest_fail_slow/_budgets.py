@@ -0,0 +1,137 @@
+"""Per-test budgets configured by node ID patterns"""
+
+from __future__ import annotations
+from collections.abc import Callable, Sequence
+import re
+from typing import Any
+import pytest
+
+#: Separators at which a node ID can be cut by a prefix pattern
+SEPARATOR_RGX = re.compile(r"(/|::|\[)")
+
+WILDCARD_RGX = re.compile(r"(\*+|\?)")
+
+
+def split_nodeid(nodeid: str) -> list[str]:
+    """
+    Split a node ID (or prefix pattern) into path components, class & function
+    names, parameter IDs, and the separators between them
+    """
+    return [t for t in SEPARATOR_RGX.split(nodeid) if t]
+
+
+def glob_to_regex(pattern: str) -> str:
+    return "".join(
+        ".*" if t.startswith("*") else "." if t == "?" else re.escape(t)
+        for t in WILDCARD_RGX.split(pattern)
+        if t
+    )
+
+
+class BudgetIndex:
+    """
+    Index of the patterns that set a budget for one test phase, for finding the
+    budget that applies to a node ID without trying every pattern in turn.
+
+    A pattern without wildcards (or whose only wildcard is a trailing ``*`` or
+    ``**`` that follows a ``/``, ``::``, or ``[`` or makes up the whole
+    pattern) is a prefix, which matches a node ID if it is equal to the node ID
+    or to the part of it before a ``/``, ``::``, or ``[``.  Prefixes are stored
+    in a trie keyed by the components of the node ID.  The remaining patterns
+    are globs, in which ``*`` and ``**`` match any run of characters (including
+    ``/``), ``?`` matches any single character, and everything else (including
+    ``[``) matches itself; they are compiled together into a single regex.
+
+    When multiple patterns match a node ID, the one listed last wins.
+    """
+
+    def __init__(self, budgets: Sequence[tuple[str, float]]) -> None:
+        #: Trie nodes map components to child nodes; the `None` key of a node
+        #: holds the priority & budget of the prefix ending there, if any
+        self.trie: dict[Any, Any] = {}
+        globs: list[tuple[int, str, float]] = []
+        for priority, (pattern, budget) in enumerate(budgets):
+            prefix = re.sub(r"\*+$", "", pattern)
+            if WILDCARD_RGX.search(prefix) or (
+                # A trailing "*" after part of a component, as in
+                # "tests/test_db_*", has to be matched as a glob
+                prefix != pattern
+                and prefix
+                and not prefix.endswith(("/", "::", "["))
+            ):
+                globs.append((priority, pattern, budget))
+                continue
+            node = self.trie
+            for token in split_nodeid(prefix):
+                node = node.setdefault(token, {})
+            node[None] = (priority, budget)
+        #: Budgets of the glob patterns, keyed by regex group name
+        self.glob_budgets: dict[str, tuple[int, float]] = {}
+        alternatives = []
+        # Alternatives are tried in order, so the highest priority goes first
+        for priority, pattern, budget in reversed(globs):
+            group = f"g{priority}"
+            self.glob_budgets[group] = (priority, budget)
+            alternatives.append(f"(?P<{group}>{glob_to_regex(pattern)})")
+        self.glob_rgx: re.Pattern[str] | None = (
+            re.compile("|".join(alternatives), re.S) if alternatives else None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.trie) or self.glob_rgx is not None
+
+    def lookup(self, nodeid: str) -> float | None:
+        """Returns the budget for the given node ID, if any"""
+        best: tuple[int, float] | None = None
+        node = self.trie
+        for token in split_nodeid(nodeid):
+            if (found := node.get(None)) is not None:
+                best = found
+            child = node.get(token)
+            if child is None:
+                break
+            node = child
+        else:
+            if (found := node.get(None)) is not None:
+                best = found
+        if self.glob_rgx is not None and (
+            m := self.glob_rgx.fullmatch(nodeid)
+        ) is not None:
+            assert m.lastgroup is not None
+            found = self.glob_budgets[m.lastgroup]
+            if best is None or found[0] > best[0]:
+                best = found
+        return best[1] if best is not None else None
+
+
+def parse_budget_index(
+    config: pytest.Config,
+    ini_name: str,
+    phases: list[str],
+    parse: Callable[[str], float],
+) -> dict[str, BudgetIndex]:
+    """
+    Parse the lines of the given ini option, each of the form ``PATTERN =
+    DURATION`` (a budget for the call phase) or ``PATTERN = PHASE: DURATION,
+    ...``, into an index of budgets for each phase
+    """
+    budgets: dict[str, list[tuple[str, float]]] = {p: [] for p in phases}
+    for line in config.getini(ini_name):
+        pattern, eq, value = line.rpartition("=")
+        pattern = pattern.strip()
+        try:
+            if not eq or not pattern:
+                raise ValueError(line)
+            for part in value.split(","):
+                phase, colon, duration = part.rpartition(":")
+                phase = phase.strip() if colon else "call"
+                if phase not in budgets:
+                    raise ValueError(line)
+                budgets[phase].append((pattern, parse(duration.strip())))
+        except ValueError:
+            raise pytest.UsageError(
+                f"Invalid {ini_name} entry {line!r}; expected PATTERN = DURATION"
+                f" or PATTERN = PHASE: DURATION, ... (where PHASE is one of"
+                f" {', '.join(phases)})"
+            )
+    return {p: BudgetIndex(b) for p, b in budgets.items()}
@@ -0,0 +1,55 @@
+"""Calibration of thresholds to the speed of the current host"""
+
+from __future__ import annotations
+import platform
+import random
+from time import perf_counter
+import pytest
+
+#: Key under which benchmark timings are stored in pytest's cache, as a `dict`
+#: mapping hostnames to seconds
+CACHE_KEY = "fail-slow/calibration"
+
+#: Number of times the benchmark workload is run; the fastest run is used
+ROUNDS = 3
+
+
+def workload() -> int:
+    """A fixed mix of CPU- and memory-bound work"""
+    rng = random.Random(0)
+    data = [rng.random() for _ in range(100_000)]
+    data.sort()
+    table = {str(i): i for i in range(50_000)}
+    total = sum(table[str(i)] for i in range(0, 50_000, 3))
+    buf = bytearray(16_000_000)
+    for _ in range(4):
+        buf = bytearray(bytes(buf))
+    return total
+
+
+def run_benchmark() -> float:
+    """Returns the time taken by the fastest of several runs of `workload()`"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = perf_counter()
+        workload()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def get_benchmark_time(config: pytest.Config, rerun: bool = False) -> float:
+    """
+    Returns the benchmark time for the current host, as cached in pytest's
+    cache directory.  The benchmark is run if there is no cached time or if
+    ``rerun`` is true.
+    """
+    cache = getattr(config, "cache", None)
+    host = platform.node()
+    timings = cache.get(CACHE_KEY, {}) if cache is not None else {}
+    if not isinstance(timings, dict):
+        timings = {}
+    if rerun or not isinstance(timings.get(host), (int, float)):
+        timings[host] = run_benchmark()
+        if cache is not None:
+            cache.set(CACHE_KEY, timings)
+    return float(timings[host])
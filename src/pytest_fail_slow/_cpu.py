@@ -0,0 +1,43 @@
+"""Measurement of the CPU time used by test phases"""
+
+from __future__ import annotations
+from collections.abc import Callable
+import time
+
+try:
+    # Re-exported for use by `_resources`
+    import resource as resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows
+    resource = None  # type: ignore[assignment]
+
+#: Clocks that thresholds can be checked against, mapped to how they're
+#: described in failure messages
+CLOCKS = {
+    "wall": "Duration",
+    "cpu": "CPU time",
+    "thread": "Thread CPU time",
+}
+
+
+def get_clock(name: str, children: bool = False) -> Callable[[], float]:
+    """
+    Returns a function giving the current reading of the non-wall clock
+    ``name``.  If ``children`` is true, the ``"cpu"`` clock also counts CPU
+    time used by terminated child processes.
+    """
+    if name == "thread":
+        return time.thread_time
+    elif children:
+        return process_and_children_time
+    else:
+        return time.process_time
+
+
+def process_and_children_time() -> float:
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + ru.ru_utime + ru.ru_stime
+
+
+def children_supported() -> bool:
+    return resource is not None
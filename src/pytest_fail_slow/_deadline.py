@@ -0,0 +1,65 @@
+"""Skipping the rest of a session once its time budget has been spent"""
+
+from __future__ import annotations
+import os
+import time
+import pytest
+
+
+class SessionDeadline:
+    """
+    Plugin that, once the wall-clock time passes ``deadline`` (a `time.time()`
+    timestamp), reports each remaining test as skipped instead of running it,
+    and lists the number of tests not run in the terminal summary.  A test that
+    is already running when the deadline passes is run to completion.
+
+    Under xdist, each worker skips its own tests, using the deadline set by the
+    controller, and the controller counts the skipped tests from the
+    ``fail_slow_not_run`` attribute of their reports.
+    """
+
+    def __init__(self, deadline: float, budget: float) -> None:
+        self.deadline = deadline
+        self.budget = budget
+        self.not_run = 0
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item: pytest.Item) -> bool | None:
+        if time.time() < self.deadline:
+            return None
+        ihook = item.ihook
+        ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        path, lineno, _ = item.reportinfo()
+        report = pytest.TestReport(
+            item.nodeid,
+            item.location,
+            {k: 1 for k in item.keywords},
+            "skipped",
+            (
+                os.fspath(path),
+                (lineno or 0) + 1,
+                f"Skipped: fail-slow session budget of {self.budget}s spent",
+            ),
+            "setup",
+            fail_slow_not_run=True,
+        )
+        ihook.pytest_runtest_logreport(report=report)
+        ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if getattr(report, "fail_slow_not_run", False):
+            self.not_run += 1
+
+    def pytest_terminal_summary(
+        self, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        if not self.not_run:
+            return
+        terminalreporter.write_sep(
+            "=", "fail-slow session budget spent", yellow=True
+        )
+        terminalreporter.write_line(
+            f"{self.not_run} test{'s' if self.not_run != 1 else ''} not run"
+            f" after the session budget of {self.budget}s was spent"
+        )
@@ -0,0 +1,136 @@
+"""Timing of individual fixtures' setups & finalizers"""
+
+from __future__ import annotations
+from collections.abc import Callable, Generator
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, NamedTuple
+import pytest
+
+if TYPE_CHECKING:
+    from _pytest.fixtures import FixtureDef
+
+
+class FixtureTiming(NamedTuple):
+    #: The test phase during which the fixture was set up or torn down
+    when: str
+    #: ``"setup"`` or ``"teardown"``
+    action: str
+    name: str
+    scope: str
+    duration: float
+
+
+#: Fixture timings recorded during a test's phases
+fixture_timings_key = pytest.StashKey[list[FixtureTiming]]()
+
+
+class FixtureTimer:
+    """
+    Plugin that times each fixture's setup & finalization and records the
+    timings on the test during whose setup or teardown phase they occur.
+    Fixtures with budgets configured via the ``fail_slow_fixture_setup`` &
+    ``fail_slow_fixture_teardown`` ini options are checked by `check()`.
+    """
+
+    def __init__(
+        self, setup_budgets: dict[str, float], teardown_budgets: dict[str, float]
+    ) -> None:
+        self.budgets = {"setup": setup_budgets, "teardown": teardown_budgets}
+        self.timings: list[FixtureTiming] = []
+        self.when = "setup"
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        self.timings = item.stash[fixture_timings_key] = []
+        self.when = "setup"
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_call(self) -> None:
+        self.when = "call"
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_teardown(self) -> None:
+        self.when = "teardown"
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_fixture_setup(
+        self, fixturedef: FixtureDef[Any]
+    ) -> Generator[None, Any, Any]:
+        # Finalizers are run in LIFO order, so the one added before the fixture
+        # function runs is called after the fixture's own teardown code, and
+        # the one added afterwards is called before it.
+        teardown_start: list[float] = []
+        fixturedef.addfinalizer(self.teardown_ender(fixturedef, teardown_start))
+        start = perf_counter()
+        try:
+            return (yield)
+        finally:
+            self.add(fixturedef, "setup", perf_counter() - start)
+            fixturedef.addfinalizer(lambda: teardown_start.append(perf_counter()))
+
+    def teardown_ender(
+        self, fixturedef: FixtureDef[Any], teardown_start: list[float]
+    ) -> Callable[[], None]:
+        def end() -> None:
+            if teardown_start:
+                self.add(fixturedef, "teardown", perf_counter() - teardown_start[0])
+
+        return end
+
+    def add(
+        self, fixturedef: FixtureDef[Any], action: str, duration: float
+    ) -> None:
+        self.timings.append(
+            FixtureTiming(
+                self.when, action, fixturedef.argname, fixturedef.scope, duration
+            )
+        )
+
+    def check(self, item: pytest.Item, when: str, label: str) -> str | None:
+        """
+        Returns a failure message if any fixture set up or torn down during the
+        given phase of ``item`` exceeded its budget
+        """
+        for t in item.stash.get(fixture_timings_key, []):
+            if t.when != when:
+                continue
+            budget = self.budgets[t.action].get(t.name)
+            if budget is not None and t.duration > budget:
+                verb = "set up" if t.action == "setup" else "tear down"
+                return (
+                    f"{label} passed but fixture {t.name!r} took too long to"
+                    f" {verb}: Duration {t.duration}s > {budget}s"
+                )
+        return None
+
+
+def format_breakdown(item: pytest.Item, when: str) -> str | None:
+    """
+    Returns a listing of the fixtures set up or torn down during the given
+    phase of ``item``, most expensive first
+    """
+    timings = [t for t in item.stash.get(fixture_timings_key, []) if t.when == when]
+    if not timings:
+        return None
+    timings.sort(key=lambda t: t.duration, reverse=True)
+    lines = ["Fixture durations:"]
+    for t in timings:
+        lines.append(f"    {t.name} ({t.scope} {t.action}): {t.duration}s")
+    return "\n".join(lines)
+
+
+def parse_budgets(
+    config: pytest.Config, ini_name: str, parse: Callable[[str], float]
+) -> dict[str, float]:
+    budgets = {}
+    for line in config.getini(ini_name):
+        name, eq, duration = line.partition("=")
+        try:
+            if not eq or not name.strip():
+                raise ValueError(line)
+            budgets[name.strip()] = parse(duration.strip())
+        except ValueError:
+            raise pytest.UsageError(
+                f"Invalid {ini_name} entry {line!r}; expected NAME = DURATION"
+            )
+    return budgets
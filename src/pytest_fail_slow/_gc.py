@@ -0,0 +1,56 @@
+"""Accounting of the time test phases spend in garbage collection"""
+
+from __future__ import annotations
+from collections import Counter
+import gc
+from time import perf_counter
+from types import TracebackType
+from typing import Any
+
+
+class GCMonitor:
+    """
+    Context manager that, while active, counts the garbage collections of each
+    generation and adds up the time they take (including the time taken by any
+    finalizers they run) using `gc.callbacks`.  Collections in all threads are
+    counted, as they pause every thread that holds or waits for the GIL.
+    """
+
+    def __init__(self) -> None:
+        #: Numbers of collections, keyed by generation
+        self.counts: Counter[int] = Counter()
+        self.duration = 0.0
+        self.start: float | None = None
+
+    def __enter__(self) -> GCMonitor:
+        gc.callbacks.append(self.callback)
+        return self
+
+    def __exit__(
+        self,
+        _exc_type: type[BaseException] | None,
+        _exc_val: BaseException | None,
+        _exc_tb: TracebackType | None,
+    ) -> None:
+        gc.callbacks.remove(self.callback)
+
+    def callback(self, phase: str, info: dict[str, Any]) -> None:
+        if phase == "start":
+            self.start = perf_counter()
+        elif self.start is not None:
+            self.duration += perf_counter() - self.start
+            self.start = None
+            self.counts[info["generation"]] += 1
+
+
+def format_gc(monitor: GCMonitor, excluded: bool) -> str:
+    total = sum(monitor.counts.values())
+    msg = (
+        f"Garbage collection: {monitor.duration}s in {total} collection"
+        f"{'s' if total != 1 else ''} ("
+        + ", ".join(f"generation {g}: {n}" for g, n in sorted(monitor.counts.items()))
+        + ")"
+    )
+    if excluded:
+        msg += "; excluded from the duration checked against cutoffs"
+    return msg
@@ -0,0 +1,332 @@
+"""Per-test duration history persisted in pytest's cache directory"""
+
+from __future__ import annotations
+from array import array
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Callable
+import pytest
+from ._sketch import NMARKERS, P2Sketch
+
+#: Number of runs after which a test's baseline stops being a plain mean of its
+#: past durations and becomes an exponentially-weighted moving average
+WINDOW = 10
+
+#: Number of runs a test phase must have been recorded for before its
+#: percentile estimates are used
+MIN_SAMPLES = 5
+
+#: Test phases whose durations are recorded
+RECORDED_PHASES = ("setup", "call", "teardown")
+
+#: Typecode and number of values per test for each column of the history.
+#: Columns missing from a history file are filled with zeroes when loading,
+#: and columns not listed here are dropped.
+COLUMNS = {
+    **{f"{when}.mean": ("d", 1) for when in RECORDED_PHASES},
+    **{f"{when}.runs": ("H", 1) for when in RECORDED_PHASES},
+}
+
+#: Typecode and number of values per sketch for each column of the percentile
+#: sketches (see `P2Sketch`).  Sketches are only kept for the test phases that
+#: have been run with percentile thresholds, so these columns have one entry
+#: per sketch rather than per test, with ``test`` giving the index of the test
+#: that each sketch belongs to.
+SKETCH_COLUMNS = {
+    "test": ("I", 1),
+    "count": ("I", 1),
+    "heights": ("f", NMARKERS),
+    "positions": ("I", NMARKERS),
+}
+
+MAGIC = b"pytest-fail-slow history\n"
+
+
+def sketch_column(when: str, key: str) -> str:
+    return f"{when}.sketch.{key}"
+
+
+ALL_COLUMNS = {
+    **COLUMNS,
+    **{
+        sketch_column(when, key): spec
+        for when in RECORDED_PHASES
+        for key, spec in SKETCH_COLUMNS.items()
+    },
+}
+
+
+class DurationHistory:
+    """
+    Baseline durations and percentile sketches for test phases, keyed by node
+    ID.  A test's memory & disk footprint is constant regardless of how many
+    times it has been run, and sketches only take up space for the test phases
+    that have percentile thresholds.
+
+    The history is stored in a compact binary file: a magic line, a JSON
+    header line, the node IDs separated by NUL bytes, and then one packed array
+    per column, each holding the column's values for every test (or every
+    sketch) in order.  This keeps loading & saving fast even for very large
+    test suites.
+
+    Durations from the current session are buffered by `record()` and only
+    merged into the baselines by `save()`, which rewrites the file only if
+    anything was recorded.  When registered as a plugin, instances record
+    durations from test reports and save themselves at the end of the session.
+    """
+
+    VERSION = 2
+    FILENAME = "history.bin"
+
+    def __init__(
+        self,
+        path: Path | None,
+        nodeids: list[str] | None = None,
+        columns: dict[str, array] | None = None,
+    ) -> None:
+        self.path = path
+        self.nodeids = nodeids if nodeids is not None else []
+        self.index = {nodeid: i for i, nodeid in enumerate(self.nodeids)}
+        if columns is None:
+            columns = {}
+        for name, (typecode, width) in COLUMNS.items():
+            if name not in columns:
+                columns[name] = array(typecode, [0]) * (width * len(self.nodeids))
+        for when in RECORDED_PHASES:
+            names = [sketch_column(when, key) for key in SKETCH_COLUMNS]
+            if not all(name in columns for name in names):
+                for name, (typecode, _) in zip(names, SKETCH_COLUMNS.values()):
+                    columns[name] = array(typecode)
+        self.columns = columns
+        #: Mapping from phases to mappings from test indices to the indices of
+        #: the tests' sketches for that phase
+        self.slots = {
+            when: {
+                i: slot
+                for slot, i in enumerate(self.columns[sketch_column(when, "test")])
+            }
+            for when in RECORDED_PHASES
+        }
+        self.pending: dict[str, dict[str, tuple[float, bool]]] = {}
+
+    @classmethod
+    def load(cls, config: pytest.Config) -> DurationHistory:
+        cache = getattr(config, "cache", None)
+        if cache is None:
+            # The cacheprovider plugin has been disabled; history is kept for
+            # the current session only.
+            return cls(None)
+        path = cache.mkdir("fail-slow") / cls.FILENAME
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return cls(path)
+        try:
+            nodeids, columns = cls.parse(blob)
+        except (ValueError, KeyError, TypeError):
+            config.issue_config_time_warning(
+                pytest.PytestWarning(
+                    f"pytest-fail-slow: ignoring corrupt history file {path}"
+                ),
+                stacklevel=2,
+            )
+            return cls(path)
+        return cls(path, nodeids, columns)
+
+    @classmethod
+    def parse(cls, blob: bytes) -> tuple[list[str], dict[str, array]]:
+        if not blob.startswith(MAGIC):
+            raise ValueError("bad magic")
+        offset = len(MAGIC)
+        end = blob.index(b"\n", offset)
+        header = json.loads(blob[offset:end])
+        if header.get("version") != cls.VERSION:
+            # Outdated or unknown format; start over
+            return ([], {})
+        offset = end + 1
+        size = header["idsize"]
+        count = header["count"]
+        if count:
+            nodeids = blob[offset : offset + size].decode("utf-8").split("\0")
+        else:
+            nodeids = []
+        if len(nodeids) != count:
+            raise ValueError("node ID count mismatch")
+        offset += size
+        columns: dict[str, array] = {}
+        for name, typecode, width, rows in header["columns"]:
+            if name in COLUMNS and rows != count:
+                raise ValueError("column length mismatch")
+            arr = array(typecode)
+            nbytes = arr.itemsize * width * rows
+            if offset + nbytes > len(blob):
+                raise ValueError("truncated column")
+            arr.frombytes(blob[offset : offset + nbytes])
+            offset += nbytes
+            if header["byteorder"] != sys.byteorder:
+                arr.byteswap()
+            if ALL_COLUMNS.get(name) == (typecode, width):
+                columns[name] = arr
+        for when in RECORDED_PHASES:
+            names = [sketch_column(when, key) for key in SKETCH_COLUMNS]
+            if not all(name in columns for name in names):
+                continue
+            if len({len(columns[name]) // ALL_COLUMNS[name][1] for name in names}) > 1:
+                raise ValueError("sketch column length mismatch")
+            if any(i >= count for i in columns[names[0]]):
+                raise ValueError("sketch for unknown test")
+        return (nodeids, columns)
+
+    def baseline(self, nodeid: str, when: str) -> float | None:
+        i = self.index.get(nodeid)
+        if i is None or when not in RECORDED_PHASES:
+            return None
+        if not self.columns[f"{when}.runs"][i]:
+            return None
+        return float(self.columns[f"{when}.mean"][i])
+
+    def quantile(self, nodeid: str, when: str, p: float) -> float | None:
+        i = self.index.get(nodeid)
+        if i is None or when not in RECORDED_PHASES:
+            return None
+        slot = self.slots[when].get(i)
+        if slot is None:
+            return None
+        if self.columns[sketch_column(when, "count")][slot] < MIN_SAMPLES:
+            return None
+        return self.sketch(when, slot).quantile(p)
+
+    def sketch(self, when: str, slot: int) -> P2Sketch:
+        span = slice(slot * NMARKERS, (slot + 1) * NMARKERS)
+        return P2Sketch(
+            self.columns[sketch_column(when, "count")][slot],
+            self.columns[sketch_column(when, "heights")][span].tolist(),
+            self.columns[sketch_column(when, "positions")][span].tolist(),
+        )
+
+    def record(
+        self, nodeid: str, when: str, duration: float, sketch: bool = False
+    ) -> None:
+        """
+        Buffer a duration for merging by `save()`.  If ``sketch`` is true (i.e.,
+        the phase has percentile thresholds), the duration is also added to the
+        phase's sketch, which is created if it does not exist yet; phases that
+        already have sketches always have them updated.
+        """
+        self.pending.setdefault(when, {})[nodeid] = (duration, sketch)
+
+    def add_test(self, nodeid: str) -> int:
+        i = self.index[nodeid] = len(self.nodeids)
+        self.nodeids.append(nodeid)
+        for name, (_, width) in COLUMNS.items():
+            self.columns[name].extend([0] * width)
+        return i
+
+    def add_sketch(self, when: str, i: int) -> int:
+        slot = self.slots[when][i] = len(self.columns[sketch_column(when, "test")])
+        for key, (_, width) in SKETCH_COLUMNS.items():
+            self.columns[sketch_column(when, key)].extend([0] * width)
+        self.columns[sketch_column(when, "test")][slot] = i
+        return slot
+
+    def merge(self) -> None:
+        for when, durations in self.pending.items():
+            means = self.columns[f"{when}.mean"]
+            runs = self.columns[f"{when}.runs"]
+            slots = self.slots[when]
+            for nodeid, (duration, sketched) in durations.items():
+                i = self.index.get(nodeid)
+                if i is None:
+                    i = self.add_test(nodeid)
+                runs[i] = min(runs[i] + 1, WINDOW)
+                means[i] += (duration - means[i]) / runs[i]
+                slot = slots.get(i)
+                if slot is None:
+                    if not sketched:
+                        continue
+                    slot = self.add_sketch(when, i)
+                sketch = self.sketch(when, slot)
+                sketch.add(duration)
+                span = slice(slot * NMARKERS, (slot + 1) * NMARKERS)
+                self.columns[sketch_column(when, "count")][slot] = sketch.count
+                self.columns[sketch_column(when, "heights")][span] = array(
+                    "f", sketch.heights
+                )
+                self.columns[sketch_column(when, "positions")][span] = array(
+                    "I", sketch.positions
+                )
+        self.pending.clear()
+
+    def dump(self) -> bytes:
+        ids = "\0".join(self.nodeids).encode("utf-8")
+        header = {
+            "version": self.VERSION,
+            "count": len(self.nodeids),
+            "idsize": len(ids),
+            "byteorder": sys.byteorder,
+            "columns": [
+                [name, typecode, width, len(self.columns[name]) // width]
+                for name, (typecode, width) in ALL_COLUMNS.items()
+            ],
+        }
+        parts = [
+            MAGIC,
+            json.dumps(header, separators=(",", ":")).encode("utf-8"),
+            b"\n",
+            ids,
+        ]
+        parts.extend(self.columns[name].tobytes() for name in ALL_COLUMNS)
+        return b"".join(parts)
+
+    def save(self) -> None:
+        if not self.pending:
+            return
+        self.merge()
+        if self.path is None:
+            return
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(self.dump())
+        os.replace(tmp, self.path)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.when in RECORDED_PHASES and (
+            report.passed or getattr(report, "fail_slow_exceeded", False)
+        ):
+            self.record(
+                report.nodeid,
+                report.when,
+                report.duration,
+                getattr(report, "fail_slow_percentiles", False),
+            )
+
+    def pytest_sessionfinish(self) -> None:
+        self.save()
+
+
+class HistoryStarter:
+    """
+    Registered on the pytest-xdist controller, which does not collect tests &
+    so cannot tell in advance whether any have percentile thresholds.  Starts
+    recording durations (by calling ``start``) once a worker sends a report
+    for a test phase with percentile thresholds.
+    """
+
+    def __init__(
+        self,
+        config: pytest.Config,
+        start: Callable[[pytest.Config], DurationHistory],
+    ) -> None:
+        self.config = config
+        self.start = start
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if not getattr(report, "fail_slow_percentiles", False):
+            return
+        self.config.pluginmanager.unregister(self)
+        started = self.config.pluginmanager.has_plugin("fail-slow-history")
+        history = self.start(self.config)
+        if not started:
+            # The history was registered too late to receive this report
+            history.pytest_runtest_logreport(report)
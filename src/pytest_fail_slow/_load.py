@@ -0,0 +1,17 @@
+"""Scaling of thresholds by system load"""
+
+from __future__ import annotations
+import os
+
+
+def load_supported() -> bool:
+    return hasattr(os, "getloadavg")
+
+
+def load_factor() -> float:
+    """
+    Returns the system's one-minute load average divided by its number of
+    CPUs, or 1 if the CPUs are not oversubscribed.  Under pytest-xdist, this
+    goes up with the number of workers sharing the machine.
+    """
+    return max(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
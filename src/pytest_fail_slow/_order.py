@@ -0,0 +1,34 @@
+"""Ordering tests by their recorded durations"""
+
+from __future__ import annotations
+from collections.abc import Sequence
+import statistics
+from ._history import RECORDED_PHASES, DurationHistory
+
+
+def estimate_durations(history: DurationHistory, nodeids: Sequence[str]) -> list[float]:
+    """
+    Returns the expected duration of each test in ``nodeids``: the sum of the
+    baselines of its recorded phases, or, for tests with no recorded phases,
+    the median of the other tests' expected durations (or zero if no test has
+    been recorded)
+    """
+    estimates: list[float | None] = []
+    for nodeid in nodeids:
+        baselines = [
+            b
+            for when in RECORDED_PHASES
+            if (b := history.baseline(nodeid, when)) is not None
+        ]
+        estimates.append(sum(baselines) if baselines else None)
+    known = [e for e in estimates if e is not None]
+    default = statistics.median(known) if known else 0.0
+    return [default if e is None else e for e in estimates]
+
+
+def slowest_first(estimates: Sequence[float]) -> list[int]:
+    """
+    Returns the indices of ``estimates`` from the longest estimate to the
+    shortest, keeping tests with equal estimates in their original order
+    """
+    return sorted(range(len(estimates)), key=lambda i: -estimates[i])
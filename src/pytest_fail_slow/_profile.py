@@ -0,0 +1,78 @@
+"""Profiling of test phases that exceed their thresholds"""
+
+from __future__ import annotations
+import cProfile
+import hashlib
+from io import StringIO
+import os.path
+from pathlib import Path
+import pstats
+import re
+import _pytest
+import pluggy
+
+#: Number of functions listed in failure messages
+TOP_N = 10
+
+#: Maximum number of characters of a test's node ID kept in the names of its
+#: profile files
+MAX_NAME_LENGTH = 100
+
+#: Directories whose functions are left out of the listings in failure
+#: messages, as they only wrap the code under test
+INTERNAL_DIRS = tuple(
+    os.path.dirname(mod.__file__) + os.sep
+    for mod in (_pytest, pluggy)
+    if mod.__file__ is not None
+) + (os.path.dirname(__file__) + os.sep,)
+
+
+def start_profiler() -> cProfile.Profile | None:
+    """
+    Returns a new, enabled profiler, or `None` if another profiler is already
+    active
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def save_profile(
+    profiler: cProfile.Profile, directory: Path, nodeid: str, when: str
+) -> Path:
+    """
+    Saves the profile to a file in ``directory`` named after the node ID &
+    phase and returns the file's path.  As the node ID has to be shortened &
+    stripped of special characters to be usable as a filename, a hash of the
+    full node ID is included in the name to keep it unique.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r"[^\w.-]+", "_", nodeid).strip("_")[:MAX_NAME_LENGTH]
+    digest = hashlib.sha256(nodeid.encode("utf-8")).hexdigest()[:8]
+    path = directory / f"{name}-{digest}-{when}.pstats"
+    profiler.dump_stats(path)
+    return path
+
+
+def format_top(profiler: cProfile.Profile, saved: str) -> str:
+    """
+    Returns a listing of the `TOP_N` functions with the most cumulative time in
+    the profile, not counting pytest's own functions.  ``saved`` describes
+    where the profile was saved to (or why it could not be).
+    """
+    out = StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    for func in list(stats.stats):  # type: ignore[attr-defined]
+        if func[0].startswith(INTERNAL_DIRS):
+            del stats.stats[func]  # type: ignore[attr-defined]
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_N)
+    lines = out.getvalue().strip("\n").splitlines()
+    # Skip the call count & sort order summary that precedes the table
+    while lines and not lines[0].lstrip().startswith("ncalls"):
+        lines.pop(0)
+    return "\n".join(
+        [f"Profile (top {TOP_N} by cumulative time, {saved}):", *lines]
+    )
@@ -0,0 +1,125 @@
+"""Streaming export of per-test-phase timing records"""
+
+from __future__ import annotations
+from collections.abc import Iterator
+import json
+import math
+from pathlib import Path
+import struct
+from typing import IO, Any
+import pytest
+
+#: Number of records buffered in memory before being written out
+BATCH_SIZE = 1000
+
+MAGIC = b"pytest-fail-slow records 1\n"
+
+PHASE_CODES = {"setup": 0, "call": 1, "teardown": 2}
+OUTCOME_CODES = {"passed": 0, "failed": 1, "skipped": 2}
+
+#: Tag byte, string length
+STRING = struct.Struct("<BI")
+#: Tag byte, node ID index, phase, outcome, duration, threshold (NaN if none),
+#: worker ID index (`NO_WORKER` if none)
+RECORD = struct.Struct("<BIBBddI")
+STRING_TAG = 0
+RECORD_TAG = 1
+NO_WORKER = 0xFFFFFFFF
+
+
+class RecordWriter:
+    """
+    Plugin that writes a record for each test phase report to a file as the
+    tests are run.  Records are buffered and written out in batches of
+    `BATCH_SIZE`.
+
+    In the ``"jsonl"`` format, each record is a JSON object on a line of its
+    own.  In the ``"binary"`` format, the file starts with `MAGIC`, after which
+    each node ID or worker ID is written once as a `STRING` followed by its
+    UTF-8 encoding, and records (`RECORD`) refer to them by their index among
+    the strings.
+    """
+
+    def __init__(self, path: Path, fmt: str) -> None:
+        self.fmt = fmt
+        self.fh: IO[bytes] = path.open("wb")
+        self.buffer: list[bytes] = []
+        self.strings: dict[str, int] = {}
+        if fmt == "binary":
+            self.buffer.append(MAGIC)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        closest = getattr(report, "fail_slow_closest", None)
+        threshold = closest[2] if closest is not None else None
+        worker = getattr(report, "fail_slow_worker", None)
+        if self.fmt == "jsonl":
+            record = {
+                "nodeid": report.nodeid,
+                "phase": report.when,
+                "duration": report.duration,
+                "threshold": threshold,
+                "outcome": report.outcome,
+                "worker": worker,
+            }
+            self.buffer.append(json.dumps(record).encode("utf-8") + b"\n")
+        else:
+            self.buffer.append(
+                RECORD.pack(
+                    RECORD_TAG,
+                    self.intern(report.nodeid),
+                    PHASE_CODES[report.when],
+                    OUTCOME_CODES[report.outcome],
+                    report.duration,
+                    math.nan if threshold is None else threshold,
+                    NO_WORKER if worker is None else self.intern(worker),
+                )
+            )
+        if len(self.buffer) >= BATCH_SIZE:
+            self.flush()
+
+    def intern(self, s: str) -> int:
+        index = self.strings.get(s)
+        if index is None:
+            index = self.strings[s] = len(self.strings)
+            data = s.encode("utf-8")
+            self.buffer.append(STRING.pack(STRING_TAG, len(data)) + data)
+        return index
+
+    def flush(self) -> None:
+        self.fh.write(b"".join(self.buffer))
+        self.fh.flush()
+        self.buffer.clear()
+
+    def pytest_sessionfinish(self) -> None:
+        self.flush()
+        self.fh.close()
+
+
+def read_records(path: Path) -> Iterator[dict[str, Any]]:
+    """Read the records from a file written in the ``"binary"`` format"""
+    phases = list(PHASE_CODES)
+    outcomes = list(OUTCOME_CODES)
+    strings: list[str] = []
+    data = path.read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a pytest-fail-slow records file")
+    offset = len(MAGIC)
+    while offset < len(data):
+        if data[offset] == STRING_TAG:
+            _, size = STRING.unpack_from(data, offset)
+            offset += STRING.size
+            strings.append(data[offset : offset + size].decode("utf-8"))
+            offset += size
+        else:
+            _, nodeid, phase, outcome, duration, threshold, worker = (
+                RECORD.unpack_from(data, offset)
+            )
+            offset += RECORD.size
+            yield {
+                "nodeid": strings[nodeid],
+                "phase": phases[phase],
+                "duration": duration,
+                "threshold": None if math.isnan(threshold) else threshold,
+                "outcome": outcomes[outcome],
+                "worker": None if worker == NO_WORKER else strings[worker],
+            }
@@ -0,0 +1,110 @@
+"""Measurement of the I/O, context switches, & page faults of test phases"""
+
+from __future__ import annotations
+from ._cpu import resource
+
+#: Linux's per-process I/O counters
+PROC_IO = "/proc/self/io"
+
+#: Counters that can be given budgets with ``fail_slow_io``, mapped to how
+#: they're described in failure messages
+BUDGETS = {
+    "read": "Bytes read from storage",
+    "write": "Bytes written to storage",
+    "syscalls": "Read & write syscalls",
+    "block_in": "Block input operations",
+    "block_out": "Block output operations",
+    "switches": "Context switches",
+    "faults": "Major page faults",
+}
+
+#: Budget counters that are given as sizes rather than plain numbers
+SIZE_BUDGETS = {"read", "write"}
+
+
+def snapshot() -> dict[str, int]:
+    """
+    Returns the current readings of the process's resource counters: those of
+    ``/proc/self/io`` (Linux only) under their own names and those of
+    ``getrusage()`` (not available on Windows) under the names of their
+    ``ru_*`` fields minus the prefix
+    """
+    counters: dict[str, int] = {}
+    try:
+        with open(PROC_IO) as fp:
+            for line in fp:
+                name, _, value = line.partition(":")
+                counters[name] = int(value)
+    except (OSError, ValueError):
+        pass
+    if resource is not None:
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        counters["inblock"] = ru.ru_inblock
+        counters["oublock"] = ru.ru_oublock
+        counters["nvcsw"] = ru.ru_nvcsw
+        counters["nivcsw"] = ru.ru_nivcsw
+        counters["majflt"] = ru.ru_majflt
+        counters["minflt"] = ru.ru_minflt
+    return counters
+
+
+def usage_since(start: dict[str, int]) -> dict[str, int]:
+    """
+    Returns how much each resource counter has gone up since the given
+    `snapshot()` was taken
+    """
+    end = snapshot()
+    return {k: end[k] - v for k, v in start.items() if k in end}
+
+
+def budget_values(usage: dict[str, int]) -> dict[str, int]:
+    """
+    Returns the values of the `BUDGETS` counters that can be computed from the
+    given usage
+    """
+    parts = {
+        # Unlike rchar & wchar, these don't count I/O that's served from or
+        # absorbed by the page cache, or that's to pipes & sockets
+        "read": ["read_bytes"],
+        "write": ["write_bytes"],
+        "syscalls": ["syscr", "syscw"],
+        "block_in": ["inblock"],
+        "block_out": ["oublock"],
+        "switches": ["nvcsw", "nivcsw"],
+        "faults": ["majflt"],
+    }
+    return {
+        name: sum(usage[f] for f in fields)
+        for name, fields in parts.items()
+        if all(f in usage for f in fields)
+    }
+
+
+def format_usage(usage: dict[str, int]) -> str:
+    """Returns a line describing the given usage for failure messages"""
+    groups = []
+    if {"rchar", "wchar", "syscr", "syscw"} <= usage.keys():
+        groups.append(
+            f"{usage['rchar']} bytes read & {usage['wchar']} written in"
+            f" {usage['syscr']} & {usage['syscw']} syscalls"
+        )
+    if {"read_bytes", "write_bytes"} <= usage.keys():
+        groups.append(
+            f"{usage['read_bytes']} bytes read from & {usage['write_bytes']}"
+            " written to storage"
+        )
+    if {"inblock", "oublock"} <= usage.keys():
+        groups.append(
+            f"{usage['inblock']} block input & {usage['oublock']} output"
+            " operations"
+        )
+    if {"nvcsw", "nivcsw"} <= usage.keys():
+        groups.append(
+            f"{usage['nvcsw']} voluntary & {usage['nivcsw']} involuntary context"
+            " switches"
+        )
+    if {"majflt", "minflt"} <= usage.keys():
+        groups.append(
+            f"{usage['majflt']} major & {usage['minflt']} minor page faults"
+        )
+    return "Resources: " + ("; ".join(groups) or "not available on this platform")
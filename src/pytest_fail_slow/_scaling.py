@@ -0,0 +1,148 @@
+"""Checking how the durations of parametrized tests grow with a parameter"""
+
+from __future__ import annotations
+from collections.abc import Callable, Sequence
+import math
+import re
+from typing import Any, NamedTuple
+import pytest
+
+#: Supported complexity classes, mapped to the natural logs of their growth
+#: functions.  Logarithms are clamped to at least 1 so that sizes of 1 and
+#: below don't produce zero or negative growth.
+COMPLEXITIES: dict[str, Callable[[float], float]] = {
+    "O(1)": lambda _: 0.0,
+    "O(log n)": lambda n: math.log(max(math.log2(n), 1)),
+    "O(n)": math.log,
+    "O(n log n)": lambda n: math.log(n) + math.log(max(math.log2(n), 1)),
+    "O(n^2)": lambda n: 2 * math.log(n),
+    "O(n^3)": lambda n: 3 * math.log(n),
+    "O(2^n)": lambda n: n * math.log(2),
+}
+
+_NORMALIZED = {re.sub(r"\s+", "", k.lower()): k for k in COMPLEXITIES}
+
+
+def parse_complexity(s: str) -> str:
+    """
+    Returns the key of `COMPLEXITIES` for a complexity class like ``"O(n log
+    n)"``, ignoring whitespace, case, and the presence of the ``O()``, and
+    accepting ``**`` for exponentiation
+    """
+    norm = re.sub(r"\s+", "", s.lower()).replace("**", "^")
+    if not norm.startswith("o("):
+        norm = f"o({norm})"
+    try:
+        return _NORMALIZED[norm]
+    except KeyError:
+        raise ValueError(f"Unsupported complexity: {s!r}")
+
+
+def size_of(value: Any) -> float:
+    """
+    Returns the size represented by a parameter value: either the value itself,
+    if it is a number, or else its length, if it is a collection other than a
+    string
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        size = float(value)
+    elif isinstance(value, (str, bytes)):
+        raise TypeError(f"Not a size: {value!r}")
+    else:
+        size = float(len(value))
+    if not size > 0:
+        raise ValueError(f"Size must be positive: {value!r}")
+    return size
+
+
+def excess_growth(
+    samples: Sequence[tuple[float, float]], complexity: str
+) -> float:
+    """
+    Given pairs of sizes & durations, returns the exponent ``k`` of the power
+    of the size by which the durations grow faster than ``complexity`` allows,
+    as estimated by a least-squares fit in log-log space.  A value of zero or
+    less means that the durations grow no faster than ``complexity``.
+    """
+    growth = COMPLEXITIES[complexity]
+    xs = [math.log(n) for n, _ in samples]
+    ys = [math.log(max(d, 1e-9)) - growth(n) for n, d in samples]
+    xmean = sum(xs) / len(xs)
+    ymean = sum(ys) / len(ys)
+    sxx = sum((x - xmean) ** 2 for x in xs)
+    sxy = sum((x - xmean) * (y - ymean) for x, y in zip(xs, ys))
+    return sxy / sxx
+
+
+class ScalingGroup(NamedTuple):
+    """
+    How a test belongs to a group of parametrized tests whose call durations
+    are checked against a complexity class
+    """
+
+    #: Identifies the group: the node ID of the test's parent, the test
+    #: function's name, and the IDs of its other parameters
+    group: str
+    #: The name of the parameter that the durations scale with
+    param: str
+    #: A key of `COMPLEXITIES`
+    complexity: str
+    #: How much faster than `complexity` (as an exponent of the size) the
+    #: durations may grow
+    tolerance: float
+    #: The test's size, from its value of `param`
+    size: float
+    #: The number of tests in the group
+    n_tests: int
+
+
+class ScalingTracker:
+    """
+    Plugin that collects the call durations of the tests in each scaling group
+    and, once every test in a group has finished, fits their growth against
+    the group's complexity class.  If the durations grow too quickly, the call
+    report of the last test in the group is failed with the given function.
+
+    Under xdist, this is only registered on the controller, which can thus
+    check groups whose tests were spread across workers.
+    """
+
+    def __init__(self, fail: Callable[[pytest.TestReport, str], None]) -> None:
+        self.fail = fail
+        #: Nodes IDs, sizes, & durations of the passed calls in each group
+        self.samples: dict[str, list[tuple[str, float, float]]] = {}
+        #: Number of tests in each group that have finished
+        self.finished: dict[str, int] = {}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        # Attached as a plain tuple so that pytest-xdist can serialize it
+        attr = getattr(report, "fail_slow_scaling", None)
+        if attr is None:
+            return
+        sg = ScalingGroup(*attr)
+        if report.when == "call":
+            if report.passed:
+                self.samples.setdefault(sg.group, []).append(
+                    (report.nodeid, sg.size, report.duration)
+                )
+        elif not (report.when == "setup" and not report.passed):
+            return
+        # Tests whose setups fail or are skipped never report a call
+        self.finished[sg.group] = self.finished.get(sg.group, 0) + 1
+        if self.finished[sg.group] < sg.n_tests:
+            return
+        samples = self.samples.pop(sg.group, [])
+        if not report.passed or len({size for _, size, _ in samples}) < 2:
+            return
+        excess = excess_growth([(n, d) for _, n, d in samples], sg.complexity)
+        if excess > sg.tolerance:
+            lines = [
+                f"Tests passed but scaled worse than {sg.complexity} in"
+                f" {sg.param!r}: durations grew by a further n^{excess:.2f}"
+                f" (tolerance n^{sg.tolerance})",
+                "Durations:",
+            ]
+            for nodeid, size, duration in sorted(samples, key=lambda s: s[1]):
+                lines.append(f"    {sg.param}={size:.15g}: {duration}s ({nodeid})")
+            self.fail(report, "\n".join(lines))
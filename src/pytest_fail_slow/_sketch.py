@@ -0,0 +1,112 @@
+"""
+Constant-memory streaming quantile estimation using the extended P² algorithm
+of Raatikainen (1987), a generalization of Jain & Chlamtac's P² algorithm that
+tracks several quantiles with one set of markers
+"""
+
+from __future__ import annotations
+from collections.abc import Sequence
+
+#: The quantiles that can be used in ``pNN=`` marker arguments
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99}
+
+
+def marker_probabilities(quantiles: Sequence[float]) -> list[float]:
+    """
+    Returns the cumulative probabilities of the markers used to track
+    ``quantiles``: the minimum, the quantiles themselves, the midpoints between
+    consecutive quantiles (and between the outermost quantiles and the
+    extrema), and the maximum
+    """
+    qs = sorted(quantiles)
+    probs = [0.0, qs[0] / 2]
+    for q, nextq in zip(qs, qs[1:]):
+        probs.extend([q, (q + nextq) / 2])
+    probs.extend([qs[-1], (qs[-1] + 1) / 2, 1.0])
+    return probs
+
+
+MARKER_PROBS = marker_probabilities(list(QUANTILES.values()))
+
+#: Number of markers in each sketch, and thus the number of observations
+#: needed before the sketch starts estimating rather than storing them
+NMARKERS = len(MARKER_PROBS)
+
+
+class P2Sketch:
+    """
+    A quantile sketch of ``count`` observations.  Until there are `NMARKERS`
+    observations, ``heights`` holds the observations seen so far in sorted
+    order; afterwards, it holds the marker heights, and ``positions`` holds the
+    (1-based) marker positions.
+    """
+
+    def __init__(
+        self, count: int, heights: list[float], positions: list[int]
+    ) -> None:
+        self.count = count
+        self.heights = heights
+        self.positions = positions
+
+    @classmethod
+    def empty(cls) -> P2Sketch:
+        return cls(0, [0.0] * NMARKERS, [0] * NMARKERS)
+
+    def add(self, x: float) -> None:
+        h = self.heights
+        pos = self.positions
+        if self.count < NMARKERS:
+            i = self.count
+            while i > 0 and h[i - 1] > x:
+                h[i] = h[i - 1]
+                i -= 1
+            h[i] = x
+            self.count += 1
+            if self.count == NMARKERS:
+                pos[:] = range(1, NMARKERS + 1)
+            return
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[-1]:
+            h[-1] = x
+            k = NMARKERS - 2
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+        for i in range(k + 1, NMARKERS):
+            pos[i] += 1
+        self.count += 1
+        for i in range(1, NMARKERS - 1):
+            desired = 1 + (self.count - 1) * MARKER_PROBS[i]
+            delta = desired - pos[i]
+            if (delta >= 1 and pos[i + 1] - pos[i] > 1) or (
+                delta <= -1 and pos[i - 1] - pos[i] < -1
+            ):
+                d = 1 if delta > 0 else -1
+                hp = self._parabolic(i, d)
+                if not h[i - 1] < hp < h[i + 1]:
+                    hp = h[i] + d * (h[i + d] - h[i]) / (pos[i + d] - pos[i])
+                h[i] = hp
+                pos[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        h = self.heights
+        n = self.positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def quantile(self, p: float) -> float | None:
+        if self.count == 0:
+            return None
+        if self.count < NMARKERS:
+            rank = p * (self.count - 1)
+            lo = int(rank)
+            hi = min(lo + 1, self.count - 1)
+            return self.heights[lo] + (rank - lo) * (
+                self.heights[hi] - self.heights[lo]
+            )
+        return self.heights[MARKER_PROBS.index(p)]
@@ -0,0 +1,118 @@
+"""Consolidated listings of slow test phases"""
+
+from __future__ import annotations
+import heapq
+from itertools import count
+import math
+from typing import NamedTuple
+import pytest
+from ._cpu import CLOCKS
+
+
+class SlowPhase(NamedTuple):
+    nodeid: str
+    when: str
+    #: The first line of the failure message
+    message: str
+    #: The ID of the pytest-xdist worker that ran the test, if any
+    worker: str | None
+    #: The factor by which the phase's thresholds were scaled for system load,
+    #: if ``--fail-slow-normalize-load`` was given
+    load: float | None
+
+
+class SlowSummary:
+    """
+    Plugin that collects the test phases that failed for being too slow (or
+    too fat) and lists them together in the terminal summary.  Under xdist,
+    this is only registered on the controller, which receives the reports of
+    all workers along with the worker IDs & load factors attached to them.
+    """
+
+    def __init__(self) -> None:
+        self.slow: list[SlowPhase] = []
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if getattr(report, "fail_slow_exceeded", False):
+            self.slow.append(
+                SlowPhase(
+                    report.nodeid,
+                    report.when,
+                    str(report.longrepr).partition("\n")[0],
+                    getattr(report, "fail_slow_worker", None),
+                    getattr(report, "fail_slow_load", None),
+                )
+            )
+
+    def pytest_terminal_summary(
+        self, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        if not self.slow:
+            return
+        terminalreporter.write_sep("=", "fail-slow summary", yellow=True)
+        for s in self.slow:
+            extra = []
+            if s.worker is not None:
+                extra.append(f"on {s.worker}")
+            if s.load is not None:
+                extra.append(f"load {s.load:.2f}x")
+            suffix = f" [{', '.join(extra)}]" if extra else ""
+            terminalreporter.write_line(f"{s.nodeid} ({s.when}): {s.message}{suffix}")
+
+
+class Headroom(NamedTuple):
+    nodeid: str
+    when: str
+    #: The clock (a key of `CLOCKS`) on which `measured` was measured
+    clock: str
+    measured: float
+    limit: float
+    #: Where the threshold came from: ``"marker"``, ``"option"``, or
+    #: ``"history"``
+    source: str
+
+    @property
+    def ratio(self) -> float:
+        return self.measured / self.limit if self.limit > 0 else math.inf
+
+
+class HeadroomSummary:
+    """
+    Plugin that keeps track of the ``size`` test phases that came closest to
+    (or went furthest over) their thresholds and lists them in the terminal
+    summary.  Phases are read from the ``fail_slow_closest`` attribute of test
+    reports, and only the closest ones seen so far are kept, in a bounded heap.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        # Min-heap of (ratio, tiebreaker, Headroom), so that the phase furthest
+        # from its threshold is the one popped
+        self.heap: list[tuple[float, int, Headroom]] = []
+        self.counter = count()
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        info = getattr(report, "fail_slow_closest", None)
+        if info is None:
+            return
+        h = Headroom(report.nodeid, report.when, *info)
+        entry = (h.ratio, next(self.counter), h)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        else:
+            heapq.heappushpop(self.heap, entry)
+
+    def pytest_terminal_summary(
+        self, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        if not self.heap:
+            return
+        terminalreporter.write_sep(
+            "=", f"fail-slow headroom (top {len(self.heap)})"
+        )
+        for _, _, h in sorted(self.heap, key=lambda e: e[0], reverse=True):
+            terminalreporter.write_line(
+                f"{h.nodeid} ({h.when}): {CLOCKS[h.clock]} {h.measured:.3f}s of"
+                f" {h.limit:.3f}s, headroom {(1 - h.ratio) * 100:.1f}%"
+                f" [{h.source}]"
+            )
@@ -0,0 +1,62 @@
+"""Cumulative time budgets for groups of tests"""
+
+from __future__ import annotations
+from collections import defaultdict
+import pytest
+
+#: Key under which the session's total is tracked
+SESSION = ""
+
+
+class TotalsTracker:
+    """
+    Plugin that adds up the durations of all phases of all tests belonging to
+    each node with a total budget and reports the nodes that went over their
+    budgets.
+
+    Budgets are read from the ``fail_slow_containers`` attribute of test
+    reports, which is set when the report is made.  As reports are passed to
+    the xdist controller along with their attributes, this works the same with
+    or without xdist.
+    """
+
+    def __init__(self, session_budget: float | None, enforce: bool) -> None:
+        self.totals: defaultdict[str, float] = defaultdict(float)
+        self.budgets: dict[str, float] = {}
+        if session_budget is not None:
+            self.budgets[SESSION] = session_budget
+        self.enforce = enforce
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        self.totals[SESSION] += report.duration
+        for nodeid, budget in getattr(report, "fail_slow_containers", ()):
+            self.totals[nodeid] += report.duration
+            self.budgets[nodeid] = budget
+
+    def over_budget(self) -> list[tuple[str, float, float]]:
+        return [
+            (nodeid, self.totals[nodeid], budget)
+            for nodeid, budget in self.budgets.items()
+            if self.totals[nodeid] > budget
+        ]
+
+    def pytest_terminal_summary(
+        self, terminalreporter: pytest.TerminalReporter
+    ) -> None:
+        over = self.over_budget()
+        if not over:
+            return
+        terminalreporter.write_sep("=", "fail-slow total budgets exceeded", red=True)
+        for nodeid, total, budget in over:
+            terminalreporter.write_line(
+                f"{nodeid or 'session'}: Duration {total}s > {budget}s"
+            )
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if (
+            self.enforce
+            and session.exitstatus == pytest.ExitCode.OK
+            and self.over_budget()
+        ):
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
@@ -0,0 +1,106 @@
+"""Sampling of the stacks of test phases that run past their thresholds"""
+
+from __future__ import annotations
+from collections import Counter
+import os.path
+import sys
+import threading
+from time import monotonic
+from types import FrameType
+from ._profile import INTERNAL_DIRS
+
+#: Maximum number of distinct stacks listed in failure messages
+TOP_STACKS = 20
+
+
+class Watchdog:
+    """
+    Background thread that, once armed with a deadline for the current thread,
+    samples that thread's stack every ``interval`` seconds from the deadline
+    until it is disarmed.  Samples are tallied as collapsed stacks (frames
+    from outermost to innermost, joined by semicolons), the format read by
+    flame graph tools.
+
+    Only one thread can be watched at a time.
+    """
+
+    def __init__(self, interval: float, rootdir: str) -> None:
+        self.interval = interval
+        self.rootdir = rootdir.rstrip(os.sep) + os.sep
+        self.cond = threading.Condition()
+        #: Thread ID and `monotonic()` deadline of the thread being watched
+        self.target: tuple[int, float] | None = None
+        self.samples: Counter[str] = Counter()
+        self.closed = False
+        self.thread = threading.Thread(
+            target=self.run, name="fail-slow-watchdog", daemon=True
+        )
+        self.thread.start()
+
+    def arm(self, timeout: float) -> None:
+        with self.cond:
+            self.target = (threading.get_ident(), monotonic() + timeout)
+            self.samples = Counter()
+            self.cond.notify()
+
+    def disarm(self) -> Counter[str]:
+        """Stop sampling and return the samples taken since `arm()`"""
+        with self.cond:
+            self.target = None
+            samples, self.samples = self.samples, Counter()
+            return samples
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
+
+    def run(self) -> None:
+        with self.cond:
+            while not self.closed:
+                if self.target is None:
+                    self.cond.wait()
+                    continue
+                ident, deadline = self.target
+                if (delay := deadline - monotonic()) > 0:
+                    self.cond.wait(delay)
+                    continue
+                if (frame := sys._current_frames().get(ident)) is not None:
+                    self.samples[self.collapse(frame)] += 1
+                self.cond.wait(self.interval)
+
+    def collapse(self, frame: FrameType | None) -> str:
+        """
+        Returns the stack ending at ``frame``, starting from just below the
+        innermost pytest frame that calls into the code under test
+        """
+        frames: list[str] = []
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            internal = filename.startswith(INTERNAL_DIRS)
+            if internal and frames and not frames[-1].startswith(INTERNAL_DIRS):
+                break
+            frames.append(f"{filename}:{frame.f_lineno}({frame.f_code.co_name})")
+            frame = frame.f_back
+        return ";".join(
+            f[len(self.rootdir) :] if f.startswith(self.rootdir) else f
+            for f in reversed(frames)
+        )
+
+
+def format_samples(samples: Counter[str], timeout: float, interval: float) -> str:
+    """
+    Returns a listing of the most common collapsed stacks in ``samples``, one
+    per line followed by its count
+    """
+    total = sum(samples.values())
+    lines = [
+        f"Stack samples after {timeout}s (every {interval}s, {total} samples;"
+        " collapsed, outermost frame first):"
+    ]
+    for stack, count in samples.most_common(TOP_STACKS):
+        lines.append(f"    {stack} {count}")
+    if len(samples) > TOP_STACKS:
+        lines.append(f"    ... and {len(samples) - TOP_STACKS} more stacks")
+    return "\n".join(lines)
@@ -0,0 +1,75 @@
+"""pytest-xdist scheduling of tests by their recorded durations"""
+
+from __future__ import annotations
+from collections.abc import Callable, Sequence
+from itertools import cycle
+import pytest
+from xdist.remote import Producer
+from xdist.scheduler import LoadScheduling
+from xdist.workermanage import WorkerController
+from ._order import slowest_first
+
+
+class SlowestFirstScheduling(LoadScheduling):
+    """
+    Variant of xdist's ``load`` scheduling that balances the total duration of
+    the tests run by each worker using the longest-processing-time-first rule:
+    tests are handed out from slowest to fastest, each going to whichever
+    worker becomes free first.  Because tests are assigned as workers free up
+    instead of being packed into fixed shards up front, a test that runs
+    longer or shorter than estimated only delays the tests after it.
+
+    xdist workers only start a test once they know which test comes next, so
+    each worker is kept two tests ahead rather than one.
+
+    This relies on ``_send_tests()`` & ``_check_nodes_have_same_collection()``,
+    which are private helpers of `LoadScheduling` rather than part of xdist's
+    scheduler interface (last checked against xdist 3.8).  Reimplementing
+    them here would mean duplicating xdist's bookkeeping of pending tests and
+    its reporting of mismatched collections, so they're used as is; if they
+    change, ``--fail-slow-order=slowest-first`` will need updating.
+    """
+
+    #: Node IDs of the collected tests, once every worker has collected them
+    collection: list[str] | None
+
+    def __init__(
+        self,
+        config: pytest.Config,
+        log: Producer | None,
+        estimate: Callable[[Sequence[str]], list[float]],
+    ) -> None:
+        super().__init__(config, log)
+        self.estimate = estimate
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+        # Initial distribution already happened, reschedule on all nodes
+        if self.collection is not None:
+            for node in self.nodes:
+                self.check_schedule(node)
+            return
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+        collection = next(iter(self.node2collection.values()))
+        self.collection = collection
+        self.pending[:] = slowest_first(self.estimate(collection))
+        # Deal out the slowest tests one per worker, twice over
+        nodes = cycle(self.nodes)
+        for _ in range(min(len(self.pending), 2 * len(self.nodes))):
+            self._send_tests(next(nodes), 1)
+        if not self.pending:
+            for node in self.nodes:
+                node.shutdown()
+
+    def check_schedule(
+        self, node: WorkerController, duration: float = 0  # noqa: U100
+    ) -> None:
+        if node.shutting_down:
+            return
+        if self.pending:
+            self._send_tests(node, 2 - len(self.node2pending[node]))
+        else:
+            node.shutdown()
+        self.log("num items waiting for node:", len(self.pending))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import pytest
+
+CONFTEST = (
+    "from pathlib import Path\n"
+    "\n"
+    "def pytest_markeval_namespace(config):\n"
+    '    with Path("calls.txt").open("a") as fp:\n'
+    '        fp.write("x")\n'
+    '    return {"threshold_on": True}\n'
+)
+
+
+def test_condition_namespace_cached(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(2, enabled='threshold_on')\n"
+            "@pytest.mark.fail_slow_setup(2, enabled='threshold_on')\n"
+            "class TestClass:\n"
+            "    @pytest.mark.parametrize('x', range(5))\n"
+            "    def test_func(self, x):\n"
+            "        assert x < 5\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=5)
+    assert (pytester.path / "calls.txt").read_text() == "x"
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_condition_cache_opt_out(pytester: pytest.Pytester, cache: bool) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "SLOW_OK = False\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.5, enabled='not SLOW_OK', cache_condition={cache})\n"
+            "@pytest.mark.parametrize('x', range(3))\n"
+            "def test_func(x):\n"
+            "    global SLOW_OK\n"
+            "    if x == 1:\n"
+            "        SLOW_OK = True\n"
+            "    if x == 2:\n"
+            "        sleep(1)\n"
+        ).replace("{cache}", str(cache))
+    )
+    result = pytester.runpytest()
+    if cache:
+        result.assert_outcomes(passed=2, failed=1)
+        assert (pytester.path / "calls.txt").read_text() == "x"
+    else:
+        result.assert_outcomes(passed=3)
+        assert (pytester.path / "calls.txt").read_text() == "xxx"
+
+
+def test_condition_not_shared_across_modules(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(
+        "import pytest\n"
+        "\n"
+        "def pytest_collectstart(collector):\n"
+        "    if isinstance(collector, pytest.Session):\n"
+        "        collector.add_marker(\n"
+        "            pytest.mark.fail_slow(0.1, enabled='CHECK_SLOW')\n"
+        "        )\n"
+    )
+    for name, check in [("test_checked", True), ("test_unchecked", False)]:
+        (pytester.path / f"{name}.py").write_text(
+            "from time import sleep\n"
+            "\n"
+            f"CHECK_SLOW = {check}\n"
+            "\n"
+            "def test_func():\n"
+            "    sleep(0.3)\n"
+        )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["FAILED test_checked.py::test_func*"])
+
+
+def test_condition_error_reported_once(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(2, enabled='yes')\n"
+            "class TestClass:\n"
+            "    @pytest.mark.parametrize('x', range(5))\n"
+            "    def test_func(self, x):\n"
+            "        pass\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    assert result.stdout.str().count("NameError: name 'yes' is not defined") == 1
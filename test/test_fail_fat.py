@@ -0,0 +1,88 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "import pytest\n"
+    "\n"
+    "{decor}def test_func():\n"
+    "    data = bytearray(50_000_000)\n"
+    "    del data\n"
+)
+
+
+@pytest.mark.parametrize(
+    "args,decor,limitrgx",
+    [
+        (["--fail-fat=10MB"], "", r"10000000"),
+        (["--fail-fat=100MB"], "", None),
+        ([], "@pytest.mark.fail_fat('10 MiB')\n", r"10485760"),
+        ([], "@pytest.mark.fail_fat('10MB', enabled='1 == 1')\n", r"10000000"),
+        ([], "@pytest.mark.fail_fat('10MB', enabled=False)\n", None),
+        ([], "@pytest.mark.fail_fat('1GB')\n", None),
+        (["--fail-fat=1GB"], "@pytest.mark.fail_fat(1e7)\n", r"10000000"),
+        (["--fail-fat=10MB"], "@pytest.mark.fail_fat('1GB')\n", None),
+        (["--fail-slow=10"], "", None),
+    ],
+)
+def test_fail_fat(
+    pytester: pytest.Pytester, args: list[str], decor: str, limitrgx: str | None
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=decor))
+    result = pytester.runpytest(*args)
+    if limitrgx is None:
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*used too much memory*")
+    else:
+        result.assert_outcomes(failed=1)
+        result.stdout.re_match_lines(
+            [
+                r"_+ test_func _+$",
+                "Test passed but used too much memory:"
+                rf" Peak allocation 50\d{{6}} bytes > {limitrgx} bytes$",
+            ],
+            consecutive=True,
+        )
+
+
+def test_fail_fat_not_traced_without_limit(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import tracemalloc\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_fat('1GB')\n"
+            "def test_limited():\n"
+            "    assert tracemalloc.is_tracing()\n"
+            "\n"
+            "def test_unlimited():\n"
+            "    assert not tracemalloc.is_tracing()\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=2)
+
+
+@pytest.mark.parametrize(
+    "args,msg",
+    [
+        ("", "takes exactly one positional argument"),
+        ("'10 parsecs'", "invalid size '10 parsecs'"),
+        ("'10MB', p95=2", "does not support percentile thresholds"),
+        ("'10MB', clock='cpu'", "does not support percentile thresholds"),
+    ],
+)
+def test_fail_fat_marker_bad_args(
+    pytester: pytest.Pytester, args: str, msg: str
+) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            f"@pytest.mark.fail_fat({args})\n"
+            "def test_func():\n"
+            "    assert 2 + 2 == 4\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines([f"*UsageError: @pytest.mark.fail_fat*{msg}*"])
@@ -204,10 +204,7 @@ def test_fail_slow_bad_condition_syntax(pytester: pytest.Pytester) -> None:
     result.assert_outcomes(errors=1)
     result.stdout.re_match_lines(
         [
-            r"_+ ERROR at setup of test_func _+$",
-            r"(invalid syntax(?:\. Perhaps you forgot a comma\?)?|unexpected EOF while parsing) \(<fail_slow enabled>, line 1\)",
-            "",
-            "During handling of the above exception, another exception occurred:",
+            r"_+ ERROR collecting test_func\.py _+$",
             "Error evaluating 'fail_slow' condition",
             "    bad syntax",
             r" +\^",
@@ -232,10 +229,7 @@ def test_fail_slow_bad_condition(pytester: pytest.Pytester) -> None:
     result.assert_outcomes(errors=1)
     result.stdout.re_match_lines(
         [
-            r"_+ ERROR at setup of test_func _+$",
-            "name 'yes' is not defined",
-            "",
-            "During handling of the above exception, another exception occurred:",
+            r"_+ ERROR collecting test_func\.py _+$",
             "Error evaluating 'fail_slow' condition",
             "    yes",
             "NameError: name 'yes' is not defined",
@@ -243,3 +237,60 @@ def test_fail_slow_bad_condition(pytester: pytest.Pytester) -> None:
         consecutive=True,
     )
     assert not (pytester.path / "test.txt").exists()
+
+
+@pytest.mark.parametrize("duration", ["'5 fortnights'", "None"])
+def test_fail_slow_marker_bad_duration(pytester: pytest.Pytester, duration: str) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from pathlib import Path\n"
+            "import pytest\n"
+            "\n"
+            f"@pytest.mark.fail_slow({duration}, enabled=False)\n"
+            "def test_func():\n"
+            '    Path("test.txt").write_text("Tested\\n")\n'
+            "\n"
+            "def test_other():\n"
+            '    Path("other.txt").write_text("Tested\\n")\n'
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*UsageError: @pytest.mark.fail_slow(): invalid duration"
+            f" {duration}",
+            "*Interrupted: 1 error during collection*",
+        ]
+    )
+    assert not (pytester.path / "test.txt").exists()
+    assert not (pytester.path / "other.txt").exists()
+
+
+def test_fail_slow_class_marker(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "pytestmark = pytest.mark.fail_slow(3)\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.5)\n"
+            "class TestClass:\n"
+            "    def test_fast(self):\n"
+            "        pass\n"
+            "\n"
+            "    def test_slow(self):\n"
+            "        sleep(1)\n"
+            "\n"
+            "    @pytest.mark.fail_slow(2)\n"
+            "    def test_own_marker(self):\n"
+            "        sleep(1)\n"
+            "\n"
+            "def test_module_level():\n"
+            "    sleep(1)\n"
+        )
+    )
+    result = pytester.runpytest("-v")
+    result.assert_outcomes(passed=3, failed=1)
+    result.stdout.fnmatch_lines(["*::TestClass::test_slow FAILED*"])
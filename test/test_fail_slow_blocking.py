@@ -0,0 +1,98 @@
+from __future__ import annotations
+import asyncio
+import pytest
+
+SRC = (
+    "import asyncio\n"
+    "import time\n"
+    "import pytest\n"
+    "\n"
+    "async def blocker(n):\n"
+    "    time.sleep(0.1 * n)\n"
+    "    await asyncio.sleep(0)\n"
+    "\n"
+    "async def polite():\n"
+    "    for _ in range(5):\n"
+    "        time.sleep(0.01)\n"
+    "        await asyncio.sleep(0)\n"
+    "\n"
+    "{decor}def test_blocks():\n"
+    "    async def main():\n"
+    "        await asyncio.gather(blocker(1), blocker(2))\n"
+    "        asyncio.get_running_loop().call_soon(time.sleep, 0.15)\n"
+    "        await asyncio.sleep(0.2)\n"
+    "    asyncio.run(main())\n"
+    "\n"
+    "{decor}def test_polite():\n"
+    "    asyncio.run(polite())\n"
+)
+
+
+@pytest.mark.parametrize(
+    "args,decor",
+    [
+        ([], "@pytest.mark.fail_slow_blocking('50ms')\n"),
+        (["--fail-slow-blocking=50ms"], ""),
+    ],
+)
+def test_fail_slow_blocking(
+    pytester: pytest.Pytester, args: list[str], decor: str
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=decor))
+    run = asyncio.Handle._run
+    result = pytester.runpytest(*args)
+    assert asyncio.Handle._run is run
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_blocks _+$",
+            "Test passed but blocked the event loop for too long: Longest"
+            r" callback 0\.2\d*s > 0\.05s$",
+            r"Blocking callbacks \(3 over the limit, longest first\):$",
+            r"    0\.2\d*s: task 'Task-\d+' running blocker\(\) from"
+            r" test_func\.py:5 to 7$",
+            r"    0\.1\d*s: <Handle sleep\(0\.15\)>$",
+            r"    0\.1\d*s: task 'Task-\d+' running blocker\(\) from"
+            r" test_func\.py:5 to 7$",
+        ],
+        consecutive=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "args,decor",
+    [
+        ([], ""),
+        ([], "@pytest.mark.fail_slow_blocking('1s')\n"),
+        (
+            ["--fail-slow-blocking=50ms"],
+            "@pytest.mark.fail_slow_blocking('50ms', enabled=False)\n",
+        ),
+    ],
+)
+def test_fail_slow_blocking_pass(
+    pytester: pytest.Pytester, args: list[str], decor: str
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=decor))
+    result = pytester.runpytest(*args)
+    result.assert_outcomes(passed=2)
+
+
+def test_fail_slow_blocking_bad_args(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow_blocking('50ms', clock='cpu')\n"
+            "def test_func():\n"
+            "    pass\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*UsageError: @pytest.mark.fail_slow_blocking() does not support"
+            " percentile thresholds or the 'clock' argument"
+        ]
+    )
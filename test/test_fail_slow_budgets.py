@@ -0,0 +1,132 @@
+from __future__ import annotations
+import pytest
+from pytest_fail_slow._budgets import BudgetIndex
+
+BUDGETS = [
+    ("tests", 1),
+    ("tests/integration/**", 2),
+    ("tests/integration/test_db.py::TestSlow", 3),
+    ("*::test_big_*[large-*]", 4),
+    ("tests/unit/test_?.py::test_func", 5),
+    ("tests/integration/test_db.py::test_func[1]", 6),
+    ("tests/test_db_*", 7),
+    ("tests/unit/test_c.py::test_param[*", 8),
+]
+
+
+@pytest.mark.parametrize(
+    "nodeid,budget",
+    [
+        ("tests/test_foo.py::test_func", 1),
+        ("tests", 1),
+        ("tests2/test_foo.py::test_func", None),
+        ("test_foo.py::test_func", None),
+        ("tests/integration/test_db.py::test_other", 2),
+        ("tests/integration/test_db.py::TestSlow::test_func", 3),
+        ("tests/integration/test_db.py::TestSlower::test_func", 2),
+        ("tests/integration/test_db.py::TestSlow::test_big_thing[large-1]", 4),
+        ("tests/integration/test_db.py::TestSlow::test_big_thing[small]", 3),
+        ("test_foo.py::test_big_thing[large-x-y]", 4),
+        ("test_foo.py::test_big_thing[large]", None),
+        ("tests/unit/test_a.py::test_func", 5),
+        ("tests/unit/test_ab.py::test_func", 1),
+        ("tests/unit/test_a.py::test_func[x]", 1),
+        ("tests/integration/test_db.py::test_func[1]", 6),
+        ("tests/integration/test_db.py::test_func[10]", 2),
+        ("tests/test_db_users.py::test_func", 7),
+        ("tests/test_db_.py::test_func", 7),
+        ("tests/test_dbx.py::test_func", 1),
+        ("tests/unit/test_c.py::test_param[x-y]", 8),
+        ("tests/unit/test_c.py::test_param", 1),
+    ],
+)
+def test_budget_index(nodeid: str, budget: float | None) -> None:
+    assert BudgetIndex(BUDGETS).lookup(nodeid) == budget
+
+
+def test_budget_index_empty() -> None:
+    index = BudgetIndex([])
+    assert not index
+    assert index.lookup("test_foo.py::test_func") is None
+
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def slow_fixture():\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "@pytest.mark.parametrize('size', ['small', 'large-1'])\n"
+    "def test_big_thing(size):\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "def test_setup(slow_fixture):\n"
+    "    pass\n"
+    "\n"
+    "@pytest.mark.fail_slow(2)\n"
+    "def test_marked():\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "@pytest.mark.fail_slow(2, enabled=False)\n"
+    "def test_disabled():\n"
+    "    sleep(0.5)\n"
+)
+
+
+def test_fail_slow_budgets(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    pytester.makeini(
+        "[pytest]\n"
+        "fail_slow_budgets =\n"
+        "    test_func.py = 0.25\n"
+        "    *::test_big_*[large-*] = 2s\n"
+        "    test_func.py::test_setup = setup: 250ms, call: 2s\n"
+    )
+    result = pytester.runpytest("-v", "--fail-slow=0.25")
+    result.assert_outcomes(passed=3, failed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at setup of test_setup _+$",
+            r"Setup passed but took too long to run: Duration \d+\.\d+s > 0\.25s$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_big_thing\[small\] _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.25s$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "test_func.py::test_big_thing[[]large-1[]] PASSED*",
+            "test_func.py::test_marked PASSED*",
+            "test_func.py::test_disabled PASSED*",
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "test_func.py",
+        "= 1s",
+        "test_func.py = 1x",
+        "test_func.py = combined: 1s",
+    ],
+)
+def test_fail_slow_bad_budgets(pytester: pytest.Pytester, line: str) -> None:
+    pytester.makepyfile(test_func="def test_func():\n    pass\n")
+    pytester.makeini(f"[pytest]\nfail_slow_budgets =\n    {line}\n")
+    result = pytester.runpytest()
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(
+        [
+            f"ERROR: Invalid fail_slow_budgets entry {line!r}; expected PATTERN ="
+            " DURATION or PATTERN = PHASE: DURATION, ... (where PHASE is one of"
+            " setup, call, teardown)"
+        ]
+    )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import platform
+import pytest
+from pytest_fail_slow import _calibrate
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.5)\n"
+    "def test_marked():\n"
+    "    sleep(0.75)\n"
+    "\n"
+    "def test_unmarked():\n"
+    "    sleep(0.75)\n"
+)
+
+
+@pytest.fixture
+def bench_time(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    # Records the number of benchmark runs & lets tests pick the result
+    times = [0.1]
+
+    def fake_benchmark() -> float:
+        times.append(times[0])
+        return times[0]
+
+    monkeypatch.setattr(_calibrate, "run_benchmark", fake_benchmark)
+    return times
+
+
+@pytest.mark.parametrize(
+    "bench,outcomes,limitrgx",
+    [
+        (0.1, {"failed": 2}, r"0\.5s"),
+        (0.05, {"failed": 2}, r"0\.25s"),
+        (0.2, {"passed": 2}, None),
+    ],
+)
+def test_calibrate(
+    pytester: pytest.Pytester,
+    bench_time: list[float],
+    bench: float,
+    outcomes: dict[str, int],
+    limitrgx: str | None,
+) -> None:
+    bench_time[0] = bench
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest(
+        "--fail-slow-calibrate",
+        "--fail-slow=0.5",
+        "-o",
+        "fail_slow_calibration_reference=100ms",
+    )
+    result.assert_outcomes(**outcomes)
+    result.stdout.fnmatch_lines(
+        [
+            f"fail-slow: host benchmark time {bench:.3f}s; duration thresholds"
+            f" scaled {bench / 0.1:.2f}x"
+        ]
+    )
+    if limitrgx is not None:
+        result.stdout.re_match_lines(
+            [
+                r"_+ test_marked _+$",
+                "Test passed but took too long to run:"
+                rf" Duration \d+\.\d+s > {limitrgx}$",
+            ],
+            consecutive=True,
+        )
+
+
+def test_calibration_cached(
+    pytester: pytest.Pytester, bench_time: list[float]
+) -> None:
+    bench_time[0] = 0.2
+    pytester.makepyfile(test_func=SRC)
+    pytester.makeini(
+        "[pytest]\n"
+        "fail_slow_calibrate = true\n"
+        "fail_slow_calibration_reference = 50ms\n"
+    )
+    result = pytester.runpytest("--fail-slow=0.5")
+    result.assert_outcomes(passed=2)
+    assert len(bench_time) == 2
+    bench_time[0] = 0.01
+    result = pytester.runpytest("--fail-slow=0.5")
+    result.assert_outcomes(passed=2)
+    assert len(bench_time) == 2
+    result.stdout.fnmatch_lines(["fail-slow: * scaled 4.00x"])
+    cached = pytester.path / ".pytest_cache" / "v" / "fail-slow" / "calibration"
+    assert cached.exists()
+    assert platform.node() in cached.read_text()
+    result = pytester.runpytest("--fail-slow=0.5", "--fail-slow-calibrate")
+    result.assert_outcomes(failed=2)
+    assert len(bench_time) == 3
+
+
+def test_calibrate_budgets(
+    pytester: pytest.Pytester, bench_time: list[float]
+) -> None:
+    bench_time[0] = 0.2
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.fixture\n"
+            "def slow_fixture():\n"
+            "    sleep(0.3)\n"
+            "\n"
+            "def test_func(slow_fixture):\n"
+            "    sleep(0.3)\n"
+        )
+    )
+    pytester.makeini(
+        "[pytest]\n"
+        "fail_slow_calibrate = true\n"
+        "fail_slow_calibration_reference = 100ms\n"
+        "fail_slow_fixture_setup = slow_fixture = 0.25s\n"
+        "fail_slow_total = test_func.py = 0.5s\n"
+    )
+    result = pytester.runpytest("--fail-slow-session=0.5s")
+    result.assert_outcomes(passed=1)
+    result.stdout.no_fnmatch_line("*exceeded*")
+    result.stdout.no_fnmatch_line("*took too long*")
+
+
+def test_calibrate_no_reference(
+    pytester: pytest.Pytester, bench_time: list[float]
+) -> None:
+    bench_time[0] = 0.15
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-calibrate")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(
+        [
+            "*fail_slow_calibrate requires fail_slow_calibration_reference to be"
+            " set to the benchmark time on the machine for which thresholds were"
+            " written (the benchmark time on this host is 0.150s)"
+        ]
+    )
+
+
+def test_no_calibration(pytester: pytest.Pytester, bench_time: list[float]) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow=0.5")
+    result.assert_outcomes(failed=2)
+    result.stdout.no_fnmatch_line("fail-slow: *")
+    assert len(bench_time) == 1
+
+
+def test_run_benchmark() -> None:
+    assert _calibrate.run_benchmark() > 0
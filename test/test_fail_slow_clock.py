@@ -0,0 +1,146 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "import subprocess\n"
+    "import sys\n"
+    "from time import process_time, sleep\n"
+    "import pytest\n"
+    "\n"
+    "def busy(seconds):\n"
+    "    end = process_time() + seconds\n"
+    "    while process_time() < end:\n"
+    "        pass\n"
+    "\n"
+    "{decor}def test_func():\n"
+    "    {body}\n"
+)
+
+BUSY_CHILD = (
+    "subprocess.run([sys.executable, '-c',"
+    " 'from time import process_time as p\\n"
+    "e = p() + 1\\n"
+    "while p() < e: pass'])"
+)
+
+
+@pytest.mark.parametrize(
+    "args,decor,body,msgrgx",
+    [
+        (["--fail-slow=0.5"], "", "sleep(1)", r"Duration \d+\.\d+s > 0\.5s"),
+        (["--fail-slow=0.5", "--fail-slow-clock=cpu"], "", "sleep(1)", None),
+        (
+            ["--fail-slow=0.5", "--fail-slow-clock=cpu"],
+            "",
+            "busy(1)",
+            r"CPU time \d+\.\d+s > 0\.5s \(duration \d+\.\d+s\)",
+        ),
+        (
+            [],
+            "@pytest.mark.fail_slow(0.5, clock='cpu')\n",
+            "busy(1)",
+            r"CPU time \d+\.\d+s > 0\.5s \(duration \d+\.\d+s\)",
+        ),
+        ([], "@pytest.mark.fail_slow(0.5, clock='cpu')\n", "sleep(1)", None),
+        (
+            ["--fail-slow-clock=cpu"],
+            "@pytest.mark.fail_slow(0.5, clock='wall')\n",
+            "sleep(1)",
+            r"Duration \d+\.\d+s > 0\.5s",
+        ),
+        (
+            [],
+            "@pytest.mark.fail_slow(0.5, clock='thread')\n",
+            "busy(1)",
+            r"Thread CPU time \d+\.\d+s > 0\.5s \(duration \d+\.\d+s\)",
+        ),
+        (["--fail-slow=0.5", "--fail-slow-clock=cpu"], "", BUSY_CHILD, None),
+        (
+            [
+                "--fail-slow=0.5",
+                "--fail-slow-clock=cpu",
+                "--fail-slow-cpu-children",
+            ],
+            "",
+            BUSY_CHILD,
+            r"CPU time \d+\.\d+s > 0\.5s \(duration \d+\.\d+s\)",
+        ),
+    ],
+)
+def test_fail_slow_clock(
+    pytester: pytest.Pytester,
+    args: list[str],
+    decor: str,
+    body: str,
+    msgrgx: str | None,
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=decor, body=body))
+    result = pytester.runpytest(*args)
+    if msgrgx is None:
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*passed but took too long to run*")
+    else:
+        result.assert_outcomes(failed=1)
+        result.stdout.re_match_lines(
+            [
+                r"_+ test_func _+$",
+                f"Test passed but took too long to run: {msgrgx}$",
+            ],
+            consecutive=True,
+        )
+
+
+def test_fail_slow_clock_setup_and_combined(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import process_time, sleep\n"
+            "import pytest\n"
+            "\n"
+            "def busy(seconds):\n"
+            "    end = process_time() + seconds\n"
+            "    while process_time() < end:\n"
+            "        pass\n"
+            "\n"
+            "@pytest.fixture\n"
+            "def fixture():\n"
+            "    busy(0.4)\n"
+            "    sleep(1)\n"
+            "    yield\n"
+            "    busy(0.4)\n"
+            "\n"
+            "@pytest.mark.fail_slow_setup(0.7, clock='cpu')\n"
+            "@pytest.mark.fail_slow_combined(1.2, clock='cpu')\n"
+            "def test_func(fixture):\n"
+            "    busy(0.4)\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at teardown of test_func _+$",
+            "Setup, call, and teardown passed but took too long to run:"
+            r" CPU time 1\.\d+s > 1\.2s \(duration \d+\.\d+s\)$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_bad_clock(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(1, clock='sundial')\n"
+            "def test_func():\n"
+            "    assert 2 + 2 == 4\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*UsageError: @pytest.mark.fail_slow(): invalid clock 'sundial';"
+            " supported clocks are wall, cpu, thread"
+        ]
+    )
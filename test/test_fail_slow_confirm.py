@@ -0,0 +1,242 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "calls = []\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.5)\n"
+    "def test_func():\n"
+    "    sleeps = {sleeps!r}\n"
+    "    calls.append(None)\n"
+    "    print('Run', len(calls))\n"
+    "    sleep(sleeps[min(len(calls), len(sleeps)) - 1])\n"
+    "\n"
+    "def test_runs():\n"
+    "    assert len(calls) == {runs}\n"
+)
+
+
+@pytest.mark.parametrize(
+    "args,sleeps,runs,judged",
+    [
+        ([], [1, 0], 1, "fail"),
+        (["--fail-slow-confirm=2"], [1, 0], 2, "pass"),
+        (["--fail-slow-confirm=2"], [1], 3, "min of 3 runs"),
+        (
+            ["--fail-slow-confirm=2", "--fail-slow-judge=median"],
+            [1, 0, 1],
+            3,
+            "median of 3 runs",
+        ),
+        (
+            ["--fail-slow-confirm=2", "--fail-slow-judge=median"],
+            [1, 0, 0],
+            3,
+            "pass",
+        ),
+        (
+            ["--fail-slow-confirm=3", "--fail-slow-judge=median"],
+            [1, 0, 0, 0],
+            4,
+            "pass",
+        ),
+        (["--fail-slow-confirm=2"], [0], 1, "pass"),
+    ],
+)
+def test_fail_slow_confirm(
+    pytester: pytest.Pytester,
+    args: list[str],
+    sleeps: list[int],
+    runs: int,
+    judged: str,
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(sleeps=sleeps, runs=runs))
+    result = pytester.runpytest(*args)
+    if judged == "pass":
+        result.assert_outcomes(passed=2)
+    else:
+        result.assert_outcomes(passed=1, failed=1)
+        msgrgx = r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.5s"
+        if judged == "fail":
+            result.stdout.re_match_lines([rf"{msgrgx}$"])
+            result.stdout.no_fnmatch_line("Runs:")
+        else:
+            result.stdout.re_match_lines(
+                [
+                    r"_+ test_func _+$",
+                    rf"{msgrgx} \({judged}\)$",
+                    "Runs:",
+                    *([r"    \d+\.\d+(e-\d+)?s$"] * runs),
+                ],
+                consecutive=True,
+            )
+    result.stdout.no_fnmatch_line("Run 2")
+
+
+def test_fail_slow_confirm_cpu(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import process_time\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.3, clock='cpu')\n"
+            "def test_func():\n"
+            "    end = process_time() + 0.5\n"
+            "    while process_time() < end:\n"
+            "        pass\n"
+        )
+    )
+    result = pytester.runpytest("--fail-slow-confirm=1")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            r"Test passed but took too long to run: CPU time 0\.\d+s > 0\.3s"
+            r" \(duration \d+\.\d+s\) \(min of 2 runs\)$",
+            "Runs:",
+            r"    \d+\.\d+s \(CPU time 0\.\d+s\)$",
+            r"    \d+\.\d+s \(CPU time 0\.\d+s\)$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_confirm_rerun_error(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "calls = []\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.5)\n"
+            "def test_func():\n"
+            "    calls.append(None)\n"
+            "    assert len(calls) == 1\n"
+            "    sleep(1)\n"
+        )
+    )
+    result = pytester.runpytest("--fail-slow-confirm=2")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.5s$",
+            "Not confirmed by re-running: re-run raised AssertionError: .*",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_confirm_rerun_skip(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "calls = []\n"
+            "\n"
+            "@pytest.mark.fail_slow('0.05s')\n"
+            "def test_func():\n"
+            "    calls.append(None)\n"
+            "    if len(calls) > 1:\n"
+            "        pytest.skip('Skipped on re-run')\n"
+            "    sleep(0.2)\n"
+        )
+    )
+    result = pytester.runpytest("--fail-slow-confirm=2")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.05s$",
+            "Not confirmed by re-running: re-run raised Skipped: Skipped on re-run$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.no_fnmatch_line("*INTERNALERROR*")
+
+
+def test_fail_slow_confirm_rerun_exit(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "calls = []\n"
+            "\n"
+            "@pytest.mark.fail_slow('0.05s')\n"
+            "def test_func():\n"
+            "    calls.append(None)\n"
+            "    if len(calls) > 1:\n"
+            "        pytest.exit('stop now')\n"
+            "    sleep(0.2)\n"
+            "\n"
+            "def test_after():\n"
+            "    pass\n"
+        )
+    )
+    # pytest 7's old-style hookwrappers make pluggy warn about the Exit
+    # passing through them
+    result = pytester.runpytest(
+        "--fail-slow-confirm=2",
+        "-W",
+        "ignore:A plugin raised an exception during an old-style hookwrapper",
+    )
+    assert result.ret == pytest.ExitCode.INTERRUPTED
+    result.stdout.fnmatch_lines(["*Exit: stop now*"])
+    result.stdout.no_fnmatch_line("*re-run raised*")
+    result.stdout.no_fnmatch_line("*passed*")
+
+
+def test_fail_slow_confirm_capture(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(
+        "from pathlib import Path\n"
+        "\n"
+        "def pytest_runtest_logreport(report):\n"
+        "    if report.nodeid.endswith('::test_func') and report.when == 'teardown':\n"
+        "        Path('sections.txt').write_text(\n"
+        "            '\\n'.join(name for name, _ in report.sections) + '\\n'\n"
+        "        )\n"
+    )
+    pytester.makepyfile(test_func=SRC.format(sleeps=[1], runs=3))
+    result = pytester.runpytest("--fail-slow-confirm=2")
+    result.assert_outcomes(passed=1, failed=1)
+    assert (pytester.path / "sections.txt").read_text() == "Captured stdout call\n"
+    result.stdout.fnmatch_lines(["Run 1"])
+    result.stdout.no_fnmatch_line("Run 2")
+
+
+def test_fail_slow_confirm_exclude_gc(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import gc\n"
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "calls = []\n"
+            "\n"
+            "def slow_gc(phase, info):\n"
+            "    if phase == 'start':\n"
+            "        sleep(0.5)\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.3)\n"
+            "def test_func():\n"
+            "    calls.append(None)\n"
+            "    if len(calls) == 1:\n"
+            "        sleep(0.5)\n"
+            "    else:\n"
+            "        gc.callbacks.append(slow_gc)\n"
+            "        try:\n"
+            "            gc.collect()\n"
+            "        finally:\n"
+            "            gc.callbacks.remove(slow_gc)\n"
+        )
+    )
+    result = pytester.runpytest("--fail-slow-confirm=1")
+    result.assert_outcomes(failed=1)
+    result = pytester.runpytest("--fail-slow-confirm=1", "--fail-slow-exclude-gc")
+    result.assert_outcomes(passed=1)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.fixture(scope='session')\n"
+    "def db():\n"
+    "    sleep(1)\n"
+    "    yield\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def quick():\n"
+    "    yield\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def slow_teardown():\n"
+    "    yield\n"
+    "    sleep(1)\n"
+    "\n"
+    "{decor}def test_first(db, quick):\n"
+    "    pass\n"
+    "\n"
+    "def test_second(db, slow_teardown):\n"
+    "    pass\n"
+)
+
+
+def test_fixture_breakdown(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=SRC.format(decor="@pytest.mark.fail_slow_setup(0.5)\n")
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at setup of test_first _+$",
+            r"Setup passed but took too long to run: Duration \d+\.\d+s > 0\.5s$",
+            "Fixture durations:",
+            r"    db \(session setup\): 1\.\d+s$",
+            r"    quick \(function setup\): \d+\.\d+(e-\d+)?s$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fixture_breakdown_teardown(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=""))
+    result = pytester.runpytest("--fail-slow-teardown=1.2")
+    result.assert_outcomes(passed=2, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at teardown of test_second _+$",
+            r"Teardown passed but took too long to run: Duration \d+\.\d+s > 1\.2s$",
+            "Fixture durations:",
+            r"    slow_teardown \(function teardown\): 1\.\d+s$",
+            r"    db \(session teardown\): 0\.\d+s$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fixture_setup_budget(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=""))
+    pytester.makeini("[pytest]\nfail_slow_fixture_setup =\n    db = 0.5s\n")
+    result = pytester.runpytest()
+    # The session fixture is only set up once, during the setup of test_first
+    result.assert_outcomes(passed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at setup of test_first _+$",
+            r"Setup passed but fixture 'db' took too long to set up:"
+            r" Duration \d+\.\d+s > 0\.5s$",
+            "Fixture durations:",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fixture_teardown_budget(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=""))
+    pytester.makeini(
+        "[pytest]\n"
+        "fail_slow_fixture_setup =\n"
+        "    db = 5s\n"
+        "fail_slow_fixture_teardown =\n"
+        "    slow_teardown = 0.5\n"
+        "    db = 1m\n"
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=2, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at teardown of test_second _+$",
+            r"Teardown passed but fixture 'slow_teardown' took too long to tear"
+            r" down: Duration \d+\.\d+s > 0\.5s$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fixture_budget_dynamic_request(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.fixture\n"
+            "def lazy():\n"
+            "    sleep(1)\n"
+            "\n"
+            "def test_func(request):\n"
+            "    request.getfixturevalue('lazy')\n"
+        )
+    )
+    pytester.makeini("[pytest]\nfail_slow_fixture_setup = lazy = 0.5\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            r"Test passed but fixture 'lazy' took too long to set up:"
+            r" Duration \d+\.\d+s > 0\.5s$",
+            "Fixture durations:",
+            r"    lazy \(function setup\): 1\.\d+s$",
+        ],
+        consecutive=True,
+    )
+
+
+@pytest.mark.parametrize("entry", ["db", "db = forever", "= 5s"])
+def test_bad_fixture_budget(pytester: pytest.Pytester, entry: str) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=""))
+    pytester.makeini(f"[pytest]\nfail_slow_fixture_setup =\n    {entry}\n")
+    result = pytester.runpytest()
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(
+        [
+            f"*Invalid fail_slow_fixture_setup entry {entry!r};"
+            " expected NAME = DURATION"
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "args,registered",
+    [
+        ([], False),
+        (["--fail-slow-setup=1m"], True),
+        (["-o", "fail_slow_fixture_setup=db = 1m"], True),
+    ],
+)
+def test_fixture_timer_registered(
+    pytester: pytest.Pytester, args: list[str], registered: bool
+) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "def test_func(request):\n"
+            "    plugin = request.config.pluginmanager.get_plugin(\n"
+            "        'fail-slow-fixture-timer'\n"
+            "    )\n"
+            f"    assert (plugin is not None) is {registered}\n"
+        )
+    )
+    result = pytester.runpytest(*args)
+    result.assert_outcomes(passed=1)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "import gc\n"
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "class Slow:\n"
+    "    def __del__(self):\n"
+    "        sleep(0.5)\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.3)\n"
+    "def test_gc():\n"
+    "    a = Slow()\n"
+    "    a.cycle = a\n"
+    "    del a\n"
+    "    gc.collect()\n"
+)
+
+
+def test_fail_slow_gc(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"^_+ test_gc _+$",
+            r"^Test passed but took too long to run: Duration \d+\.\d+s > 0\.3s$",
+            r"^Garbage collection: 0\.[5-9]\d*s in \d+ collections? \(.*generation"
+            r" 2: [1-9]\d*\)$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.no_fnmatch_line("*excluded from the duration*")
+
+
+def test_fail_slow_no_gc(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import gc\n"
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.1)\n"
+            "def test_slow():\n"
+            "    gc.disable()\n"
+            "    try:\n"
+            "        sleep(0.3)\n"
+            "    finally:\n"
+            "        gc.enable()\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.no_fnmatch_line("Garbage collection:*")
+
+
+def test_fail_slow_exclude_gc(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-exclude-gc")
+    result.assert_outcomes(passed=1)
+
+
+def test_fail_slow_exclude_gc_still_slow(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import gc\n"
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.1)\n"
+            "def test_slow():\n"
+            "    gc.collect()\n"
+            "    sleep(0.3)\n"
+        )
+    )
+    result = pytester.runpytest("--fail-slow-exclude-gc")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"^Test passed but took too long to run: Duration \d+\.\d+s > 0\.1s$",
+            r"^Garbage collection: \d+(\.\d+)?(e-\d+)?s in \d+ collections? \(.*\);"
+            r" excluded from the duration checked against cutoffs$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_gc_setup(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import gc\n"
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "class Slow:\n"
+            "    def __del__(self):\n"
+            "        sleep(0.5)\n"
+            "\n"
+            "@pytest.fixture\n"
+            "def garbage():\n"
+            "    a = Slow()\n"
+            "    a.cycle = a\n"
+            "    del a\n"
+            "    gc.collect()\n"
+            "\n"
+            "@pytest.mark.fail_slow_setup(0.3)\n"
+            "def test_gc(garbage):\n"
+            "    pass\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.re_match_lines(
+        [r"^Garbage collection: 0\.[5-9]\d*s in \d+ collections? \(.*\)$"]
+    )
+    result = pytester.runpytest("--fail-slow-exclude-gc")
+    result.assert_outcomes(passed=1)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.25)\n"
+    "def test_over():\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "@pytest.mark.fail_slow(1)\n"
+    "def test_close():\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "def test_far():\n"
+    "    sleep(0.2)\n"
+    "\n"
+    "def test_quick():\n"
+    "    pass\n"
+)
+
+
+def test_fail_slow_headroom(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-headroom=3", "--fail-slow=10")
+    result.assert_outcomes(passed=3, failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"=+ fail-slow headroom \(top 3\) =+$",
+            r"test_func\.py::test_over \(call\): Duration 0\.\d{3}s of 0\.250s,"
+            r" headroom -\d+\.\d% \[marker\]$",
+            r"test_func\.py::test_close \(call\): Duration 0\.\d{3}s of 1\.000s,"
+            r" headroom \d+\.\d% \[marker\]$",
+            r"test_func\.py::test_far \(call\): Duration 0\.\d{3}s of 10\.000s,"
+            r" headroom 9\d\.\d% \[option\]$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.no_fnmatch_line("*test_quick*headroom*")
+
+
+def test_fail_slow_headroom_history(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-regression=4")
+    result.assert_outcomes(passed=3, failed=1)
+    result = pytester.runpytest("--fail-slow-regression=4", "--fail-slow-headroom=2")
+    result.assert_outcomes(passed=3, failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"=+ fail-slow headroom \(top 2\) =+$",
+            r"test_func\.py::test_over \(call\): Duration 0\.\d{3}s of 0\.250s,"
+            r" headroom -\d+\.\d% \[marker\]$",
+            r"test_func\.py::test_close \(call\): Duration 0\.\d{3}s of 1\.000s,"
+            r" headroom \d+\.\d% \[marker\]$",
+        ],
+        consecutive=True,
+    )
+    result = pytester.runpytest("--fail-slow-regression=2", "--fail-slow-headroom=5")
+    result.stdout.re_match_lines(
+        [
+            r"test_func\.py::test_far \(call\): Duration 0\.\d{3}s of 0\.\d{3}s,"
+            r" headroom -?\d+\.\d% \[history\]$",
+        ]
+    )
+
+
+def test_fail_slow_no_headroom(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-headroom=3")
+    result.assert_outcomes(passed=3, failed=1)
+    result.stdout.re_match_lines([r"=+ fail-slow headroom \(top 2\) =+$"])
+    result = pytester.runpytest("--fail-slow=10")
+    result.stdout.no_fnmatch_line("*fail-slow headroom*")
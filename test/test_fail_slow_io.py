@@ -0,0 +1,169 @@
+from __future__ import annotations
+import os
+import sys
+import pytest
+
+needs_proc_io = pytest.mark.skipif(
+    not os.path.exists("/proc/self/io"), reason="Requires /proc/self/io"
+)
+
+needs_getrusage = pytest.mark.skipif(
+    sys.platform == "win32", reason="getrusage() is not available on Windows"
+)
+
+# The file is synced to storage and then evicted from the page cache so that
+# reading it back has to go to storage as well
+SRC = (
+    "import os\n"
+    "import pytest\n"
+    "\n"
+    "{decor}def test_func():\n"
+    "    with open('data.bin', 'wb') as fp:\n"
+    "        fp.write(bytes(2_000_000))\n"
+    "        fp.flush()\n"
+    "        os.fsync(fp.fileno())\n"
+    "        os.posix_fadvise(fp.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)\n"
+    "    with open('data.bin', 'rb') as fp:\n"
+    "        assert len(fp.read()) == 2_000_000\n"
+)
+
+
+def write_bytes() -> int:
+    with open("/proc/self/io") as fp:
+        for line in fp:
+            name, _, value = line.partition(":")
+            if name == "write_bytes":
+                return int(value)
+    return 0
+
+
+@pytest.fixture
+def storage_io(pytester: pytest.Pytester) -> None:
+    # Filesystems like tmpfs that aren't backed by storage don't count towards
+    # read_bytes & write_bytes
+    start = write_bytes()
+    with (pytester.path / "probe.bin").open("wb") as fp:
+        fp.write(bytes(100_000))
+        fp.flush()
+        os.fsync(fp.fileno())
+    if write_bytes() == start:
+        pytest.skip("Writes to the test directory are not counted as storage I/O")
+
+
+@needs_proc_io
+@pytest.mark.parametrize(
+    "decor,failure",
+    [
+        (
+            "@pytest.mark.fail_slow_io(write='1MB')\n",
+            r"Bytes written to storage 2\d{6} > 1000000",
+        ),
+        (
+            "@pytest.mark.fail_slow_io(write='10MB', read='1 MiB')\n",
+            r"Bytes read from storage 2\d{6} > 1048576",
+        ),
+        ("@pytest.mark.fail_slow_io(write='10MB', read='10MB')\n", None),
+        ("@pytest.mark.fail_slow_io(write='1MB', enabled=False)\n", None),
+        ("", None),
+    ],
+)
+@pytest.mark.usefixtures("storage_io")
+def test_fail_slow_io(
+    pytester: pytest.Pytester, decor: str, failure: str | None
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=decor))
+    result = pytester.runpytest()
+    if failure is None:
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*exceeded its resource budget*")
+    else:
+        result.assert_outcomes(failed=1)
+        result.stdout.re_match_lines(
+            [
+                r"_+ test_func _+$",
+                rf"Test passed but exceeded its resource budget: {failure}$",
+                r"Resources: 2\d{6} bytes read & 2\d{6} written in \d+ & \d+"
+                r" syscalls; 2\d{6} bytes read from & 2\d{6} written to storage;"
+                r" .*"
+                r" context switches; .* page faults$",
+            ],
+            consecutive=True,
+        )
+
+
+@needs_getrusage
+def test_fail_slow_io_switches(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow_io(switches=0)\n"
+            "def test_func():\n"
+            "    sleep(0.05)\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [r"Test passed but exceeded its resource budget: Context switches \d+ > 0$"]
+    )
+
+
+@needs_getrusage
+def test_fail_slow_resources(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.1)\n"
+            "def test_func():\n"
+            "    sleep(0.3)\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.no_fnmatch_line("Resources:*")
+    result = pytester.runpytest("--fail-slow-resources")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.1s$",
+            r"Resources: .*\d+ voluntary & \d+ involuntary context switches;"
+            r" \d+ major & \d+ minor page faults$",
+        ],
+        consecutive=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "args,msg",
+    [
+        ("'1MB'", "@pytest.mark.fail_slow_io() takes no positional arguments"),
+        ("", "@pytest.mark.fail_slow_io() requires at least one budget"),
+        (
+            "reads='1MB'",
+            "@pytest.mark.fail_slow_io(): unknown budget 'reads'; supported"
+            " budgets are read, write, syscalls, block_in, block_out, switches,"
+            " faults",
+        ),
+        ("read='1 parsec'", "@pytest.mark.fail_slow_io(): invalid read budget '1 parsec'"),
+        ("switches='10'", "@pytest.mark.fail_slow_io(): invalid switches budget '10'"),
+        ("faults=-1", "@pytest.mark.fail_slow_io(): invalid faults budget -1"),
+    ],
+)
+def test_fail_slow_io_bad_args(pytester: pytest.Pytester, args: str, msg: str) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            f"@pytest.mark.fail_slow_io({args})\n"
+            "def test_func():\n"
+            "    pass\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines([f"*UsageError: {msg}"])
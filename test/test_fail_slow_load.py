@@ -0,0 +1,85 @@
+from __future__ import annotations
+import os
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.5)\n"
+    "def test_func():\n"
+    "    sleep(1)\n"
+)
+
+
+@pytest.mark.parametrize(
+    "load,msgrgx",
+    [
+        (0.5, r"Duration \d+\.\d+s > 0\.5s"),
+        (1.5, r"Duration \d+\.\d+s > 0\.75s \(0\.5s scaled 1\.50x for system load\)"),
+        (3, None),
+    ],
+)
+def test_fail_slow_normalize_load(
+    monkeypatch: pytest.MonkeyPatch,
+    pytester: pytest.Pytester,
+    load: float,
+    msgrgx: str | None,
+) -> None:
+    cpus = os.cpu_count() or 1
+    monkeypatch.setattr(os, "getloadavg", lambda: (load * cpus, 0.0, 0.0))
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-normalize-load")
+    if msgrgx is None:
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*fail-slow summary*")
+    else:
+        result.assert_outcomes(failed=1)
+        result.stdout.re_match_lines(
+            [
+                r"_+ test_func _+$",
+                f"Test passed but took too long to run: {msgrgx}$",
+            ],
+            consecutive=True,
+        )
+        result.stdout.re_match_lines(
+            [
+                r"=+ fail-slow summary =+$",
+                r"test_func\.py::test_func \(call\): Test passed but took too"
+                rf" long to run: {msgrgx} \[load {max(load, 1):.2f}x\]$",
+            ],
+            consecutive=True,
+        )
+
+
+def test_fail_slow_summary_xdist(pytester: pytest.Pytester) -> None:
+    pytest.importorskip("xdist")
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.5)\n"
+            "def test_first():\n"
+            "    sleep(1)\n"
+            "\n"
+            "@pytest.mark.fail_slow_setup(0.5)\n"
+            "def test_second(slow):\n"
+            "    pass\n"
+            "\n"
+            "@pytest.fixture\n"
+            "def slow():\n"
+            "    sleep(1)\n"
+        )
+    )
+    result = pytester.runpytest("-n", "2")
+    result.assert_outcomes(failed=1, errors=1)
+    result.stdout.re_match_lines_random(
+        [
+            r"=+ fail-slow summary =+$",
+            r"test_func\.py::test_first \(call\): Test passed but took too long"
+            r" to run: Duration \d+\.\d+s > 0\.5s \[on gw\d\]$",
+            r"test_func\.py::test_second \(setup\): Setup passed but took too long"
+            r" to run: Duration \d+\.\d+s > 0\.5s \[on gw\d\]$",
+        ]
+    )
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import re
+import pytest
+from pytest_fail_slow._history import DurationHistory
+from pytest_fail_slow._order import estimate_durations, slowest_first
+
+SRC = "".join(
+    f"def test_{name}():\n    pass\n\n"
+    for name in ["fast", "slow", "new", "medium", "slower"]
+)
+
+
+def seed_history(pytester: pytest.Pytester, durations: dict[str, float]) -> None:
+    path = pytester.path / ".pytest_cache" / "d" / "fail-slow" / "history.bin"
+    path.parent.mkdir(parents=True)
+    history = DurationHistory(path)
+    for name, duration in durations.items():
+        history.record(f"test_func.py::test_{name}", "call", duration)
+    history.save()
+
+
+def test_estimate_durations() -> None:
+    history = DurationHistory(None)
+    history.record("test_a.py::test_x", "setup", 1.0)
+    history.record("test_a.py::test_x", "call", 2.0)
+    history.record("test_a.py::test_y", "call", 5.0)
+    history.record("test_a.py::test_z", "teardown", 0.5)
+    history.save()
+    estimates = estimate_durations(
+        history,
+        ["test_a.py::test_x", "test_a.py::test_new", "test_a.py::test_y"],
+    )
+    # Unrecorded tests are estimated at the median of the recorded ones
+    assert estimates == [3.0, 4.0, 5.0]
+    assert estimate_durations(DurationHistory(None), ["test_a.py::test_x"]) == [0.0]
+
+
+def test_slowest_first() -> None:
+    assert slowest_first([1.0, 3.0, 2.0, 3.0, 0.0]) == [1, 3, 2, 0, 4]
+
+
+def test_order_slowest_first(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    seed_history(pytester, {"fast": 0.1, "slow": 2.0, "medium": 1.0, "slower": 3.0})
+    result = pytester.runpytest("-v", "--fail-slow-order=slowest-first")
+    result.assert_outcomes(passed=5)
+    result.stdout.fnmatch_lines(
+        [
+            "test_func.py::test_slower PASSED*",
+            "test_func.py::test_slow PASSED*",
+            "test_func.py::test_new PASSED*",
+            "test_func.py::test_medium PASSED*",
+            "test_func.py::test_fast PASSED*",
+        ],
+        consecutive=True,
+    )
+
+
+def test_order_none(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    seed_history(pytester, {"fast": 0.1, "slow": 2.0, "medium": 1.0, "slower": 3.0})
+    result = pytester.runpytest("-v")
+    result.assert_outcomes(passed=5)
+    result.stdout.fnmatch_lines(
+        [
+            "test_func.py::test_fast PASSED*",
+            "test_func.py::test_slow PASSED*",
+            "test_func.py::test_new PASSED*",
+            "test_func.py::test_medium PASSED*",
+            "test_func.py::test_slower PASSED*",
+        ],
+        consecutive=True,
+    )
+
+
+def test_order_records_history(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-order=slowest-first")
+    result.assert_outcomes(passed=5)
+    path = pytester.path / ".pytest_cache" / "d" / "fail-slow" / "history.bin"
+    nodeids, _ = DurationHistory.parse(path.read_bytes())
+    assert sorted(nodeids) == [
+        "test_func.py::test_fast",
+        "test_func.py::test_medium",
+        "test_func.py::test_new",
+        "test_func.py::test_slow",
+        "test_func.py::test_slower",
+    ]
+
+
+def test_order_xdist(pytester: pytest.Pytester) -> None:
+    pytest.importorskip("xdist")
+    pytester.makepyfile(
+        test_func="".join(
+            f"def test_{name}():\n    pass\n\n"
+            for name in ["slow1", "slow2", "fast1", "fast2", "fast3", "fast4"]
+        )
+    )
+    seed_history(
+        pytester,
+        {
+            "slow1": 10.0,
+            "slow2": 10.0,
+            "fast1": 0.1,
+            "fast2": 0.1,
+            "fast3": 0.1,
+            "fast4": 0.1,
+        },
+    )
+    # Without reordering, xdist would send the first two tests to the same
+    # worker.
+    result = pytester.runpytest("-v", "-n", "2", "--fail-slow-order=slowest-first")
+    result.assert_outcomes(passed=6)
+    workers = {
+        m[2]: m[1]
+        for m in re.finditer(
+            r"^\[(gw\d+)\].* PASSED test_func\.py::test_(\w+)",
+            str(result.stdout),
+            flags=re.M,
+        )
+    }
+    assert len(workers) == 6
+    assert workers["slow1"] != workers["slow2"]
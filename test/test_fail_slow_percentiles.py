@@ -0,0 +1,161 @@
+from __future__ import annotations
+from pathlib import Path
+import random
+import pytest
+from pytest_fail_slow._history import DurationHistory
+from pytest_fail_slow._sketch import NMARKERS, QUANTILES, P2Sketch
+
+SRC = (
+    "from pathlib import Path\n"
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "{decor}def test_func():\n"
+    '    sleep(float(Path("delay.txt").read_text()))\n'
+)
+
+
+def test_sketch_small() -> None:
+    sketch = P2Sketch.empty()
+    assert sketch.quantile(0.5) is None
+    for x in [3.0, 1.0, 2.0]:
+        sketch.add(x)
+    assert sketch.count == 3
+    assert sketch.quantile(0.5) == 2.0
+    assert sketch.quantile(0.9) == pytest.approx(2.8)
+
+
+def test_sketch_accuracy() -> None:
+    rng = random.Random(42)
+    xs = [rng.expovariate(1.0) for _ in range(10_000)]
+    sketch = P2Sketch.empty()
+    for x in xs:
+        sketch.add(x)
+    assert sketch.count == len(xs)
+    assert len(sketch.heights) == len(sketch.positions) == NMARKERS
+    xs.sort()
+    for p in QUANTILES.values():
+        exact = xs[int(p * (len(xs) - 1))]
+        estimate = sketch.quantile(p)
+        assert estimate == pytest.approx(exact, rel=0.05)
+
+
+def test_fail_slow_percentile(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=SRC.format(decor="@pytest.mark.fail_slow(p95=2)\n")
+    )
+    (pytester.path / "delay.txt").write_text("0.1\n")
+    for _ in range(4):
+        result = pytester.runpytest()
+        result.assert_outcomes(passed=1)
+    (pytester.path / "delay.txt").write_text("1\n")
+    # Only four runs so far, so percentiles aren't used yet:
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    (pytester.path / "delay.txt").write_text("0.1\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    (pytester.path / "delay.txt").write_text("2\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            "Test passed but took too long to run:"
+            r" Duration \d+\.\d+s > \d+\.\d+s \(2\.0x p95 of \d+\.\d+s\)$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_percentile_xdist(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "def test_plain():\n"
+            "    pass\n"
+            "\n"
+            "@pytest.mark.fail_slow(p95=2)\n"
+            "def test_percentile():\n"
+            "    pass\n"
+        )
+    )
+    history = pytester.path / ".pytest_cache" / "d" / "fail-slow" / "history.bin"
+    result = pytester.runpytest("-n", "2", "-k", "test_plain")
+    result.assert_outcomes(passed=1)
+    assert not history.exists()
+    for _ in range(2):
+        result = pytester.runpytest("-n", "2")
+        result.assert_outcomes(passed=2)
+    nodeids, columns = DurationHistory.parse(history.read_bytes())
+    hist = DurationHistory(history, nodeids, columns)
+    i = hist.index["test_func.py::test_percentile"]
+    assert hist.columns["call.sketch.count"][hist.slots["call"][i]] == 2
+    assert hist.slots["setup"] == {}
+
+
+def test_history_sketches(tmp_path: Path) -> None:
+    path = tmp_path / "history.bin"
+    history = DurationHistory(path)
+    for x in range(1, 7):
+        history.record("test_a.py::test_plain", "call", x)
+        history.record("test_a.py::test_sketched", "setup", x)
+        history.record("test_a.py::test_sketched", "call", x, sketch=x > 1)
+        history.save()
+        nodeids, columns = DurationHistory.parse(path.read_bytes())
+        history = DurationHistory(path, nodeids, columns)
+    assert history.nodeids == ["test_a.py::test_plain", "test_a.py::test_sketched"]
+    assert history.slots == {"setup": {}, "call": {1: 0}, "teardown": {}}
+    assert len(history.columns["call.sketch.heights"]) == NMARKERS
+    assert history.quantile("test_a.py::test_plain", "call", 0.5) is None
+    assert history.quantile("test_a.py::test_sketched", "setup", 0.5) is None
+    assert history.quantile("test_a.py::test_sketched", "call", 0.5) == 4.0
+    # Once a phase has a sketch, it keeps being updated:
+    history.record("test_a.py::test_sketched", "call", 7)
+    history.save()
+    assert history.columns["call.sketch.count"][0] == 6
+
+
+def test_fail_slow_percentile_with_duration(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=SRC.format(decor="@pytest.mark.fail_slow(0.5, p50='10x')\n")
+    )
+    (pytester.path / "delay.txt").write_text("1\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.5s$"]
+    )
+
+
+def test_fail_slow_percentile_disabled(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=SRC.format(decor="@pytest.mark.fail_slow(p50=1, enabled=False)\n")
+    )
+    (pytester.path / "delay.txt").write_text("0\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    assert not (pytester.path / ".pytest_cache" / "d" / "fail-slow").exists()
+
+
+@pytest.mark.parametrize(
+    "args,msg",
+    [
+        (
+            "p75=2",
+            "@pytest.mark.fail_slow(): unsupported percentile 'p75'; supported"
+            " percentiles are p50, p90, p95, p99",
+        ),
+        ("p95='fast'", "@pytest.mark.fail_slow(): invalid factor 'fast' for p95"),
+        ("p95=0", "@pytest.mark.fail_slow(): invalid factor 0 for p95"),
+        ("1, 2, p95=2", "@pytest.mark.fail_slow() takes at most one positional argument"),
+    ],
+)
+def test_fail_slow_percentile_bad_args(
+    pytester: pytest.Pytester, args: str, msg: str
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=f"@pytest.mark.fail_slow({args})\n"))
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines([f"*UsageError: {msg}"])
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import pstats
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "def snooze():\n"
+    "    sleep(0.5)\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def slow_fixture():\n"
+    "    snooze()\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.25)\n"
+    "def test_slow():\n"
+    "    snooze()\n"
+    "\n"
+    "@pytest.mark.fail_slow_setup(0.25)\n"
+    "def test_slow_setup(slow_fixture):\n"
+    "    pass\n"
+    "\n"
+    "@pytest.mark.fail_slow(1)\n"
+    "def test_fast():\n"
+    "    snooze()\n"
+    "\n"
+    "def test_unlimited():\n"
+    "    snooze()\n"
+)
+
+
+def test_fail_slow_profile(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-profile=profiles")
+    result.assert_outcomes(passed=2, failed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_slow _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.25s$",
+            r"Profile \(top 10 by cumulative time, saved to .*"
+            r"test_func\.py_test_slow-ad898845-call\.pstats\):$",
+            r"\s+ncalls\s+tottime\s+percall\s+cumtime\s+percall"
+            r" filename:lineno\(function\)$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.fnmatch_lines(["*test_func.py:*(snooze)"])
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at setup of test_slow_setup _+$",
+            r"Setup passed but took too long to run: Duration \d+\.\d+s > 0\.25s$",
+            "Fixture durations:",
+            r"    slow_fixture \(function setup\): \d+\.\d+s$",
+            r"Profile \(top 10 by cumulative time, saved to .*"
+            r"test_func\.py_test_slow_setup-ae0369b5-setup\.pstats\):$",
+        ],
+        consecutive=True,
+    )
+    profiles = pytester.path / "profiles"
+    assert sorted(p.name for p in profiles.iterdir()) == [
+        "test_func.py_test_slow-ad898845-call.pstats",
+        "test_func.py_test_slow_setup-ae0369b5-setup.pstats",
+    ]
+    stats = pstats.Stats(
+        str(profiles / "test_func.py_test_slow-ad898845-call.pstats")
+    )
+    assert any(func == "snooze" for _, _, func in stats.stats)  # type: ignore[attr-defined]
+
+
+def test_fail_slow_no_profile(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=2, failed=1, errors=1)
+    result.stdout.no_fnmatch_line("Profile *")
+    assert not (pytester.path / "profiles").exists()
+
+
+def test_fail_slow_profile_names(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "from time import sleep\n"
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow(0.1)\n"
+            "@pytest.mark.parametrize(\n"
+            "    'x', ['a b', 'a_b', 'a/b', 'x' * 300], ids=lambda x: x\n"
+            ")\n"
+            "def test_func(x):\n"
+            "    sleep(0.2)\n"
+        )
+    )
+    result = pytester.runpytest("--fail-slow-profile=profiles")
+    result.assert_outcomes(failed=4)
+    names = [p.name for p in (pytester.path / "profiles").iterdir()]
+    assert len(names) == 4
+    assert all(name.endswith("-call.pstats") for name in names)
+    assert max(map(len, names)) < 150
+    assert sum(name.startswith("test_func.py_test_func_a_b-") for name in names) == 3
+
+
+def test_fail_slow_profile_unwritable(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    # A file where the directory should be makes the save fail
+    (pytester.path / "profiles").write_text("")
+    result = pytester.runpytest("--fail-slow-profile=profiles")
+    result.assert_outcomes(passed=2, failed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"Profile \(top 10 by cumulative time, could not be saved: .*\):$",
+            r"\s+ncalls\s+tottime\s+percall\s+cumtime\s+percall"
+            r" filename:lineno\(function\)$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.no_fnmatch_line("*INTERNALERROR*")
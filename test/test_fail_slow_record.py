@@ -0,0 +1,100 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+import pytest
+from pytest_fail_slow import _record
+
+SRC = (
+    "from pathlib import Path\n"
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.1)\n"
+    "def test_slow():\n"
+    "    sleep(0.2)\n"
+    "\n"
+    "@pytest.mark.skip\n"
+    "def test_skipped():\n"
+    "    pass\n"
+    "\n"
+    "def test_streamed():\n"
+    "    assert Path('records.out').stat().st_size > 0\n"
+)
+
+
+def read_jsonl(path: Path) -> list[dict]:
+    with path.open() as fp:
+        return [json.loads(line) for line in fp]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_fail_slow_record(
+    monkeypatch: pytest.MonkeyPatch, pytester: pytest.Pytester, fmt: str
+) -> None:
+    monkeypatch.setattr(_record, "BATCH_SIZE", 2)
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest(
+        "--fail-slow-record=records.out",
+        f"--fail-slow-record-format={fmt}",
+        "--fail-slow-setup=5",
+    )
+    result.assert_outcomes(passed=1, failed=1, skipped=1)
+    path = pytester.path / "records.out"
+    if fmt == "jsonl":
+        records = read_jsonl(path)
+    else:
+        records = list(_record.read_records(path))
+    assert [(r["nodeid"], r["phase"], r["outcome"]) for r in records] == [
+        ("test_func.py::test_slow", "setup", "passed"),
+        ("test_func.py::test_slow", "call", "failed"),
+        ("test_func.py::test_slow", "teardown", "passed"),
+        ("test_func.py::test_skipped", "setup", "skipped"),
+        ("test_func.py::test_skipped", "teardown", "passed"),
+        ("test_func.py::test_streamed", "setup", "passed"),
+        ("test_func.py::test_streamed", "call", "passed"),
+        ("test_func.py::test_streamed", "teardown", "passed"),
+    ]
+    assert [r["threshold"] for r in records] == [
+        5,
+        0.1,
+        None,
+        None,
+        None,
+        5,
+        None,
+        None,
+    ]
+    assert records[1]["duration"] > 0.2
+    assert all(r["worker"] is None for r in records)
+
+
+def test_fail_slow_record_invocation_dir(pytester: pytest.Pytester) -> None:
+    # The path is relative to the directory pytest was invoked from, even if
+    # the working directory is changed before the file is opened
+    (pytester.path / "sub").mkdir()
+    pytester.makeconftest("import os\n\nos.chdir('sub')\n")
+    pytester.makepyfile(test_func="def test_func():\n    pass\n")
+    result = pytester.runpytest("--fail-slow-record=records.out")
+    result.assert_outcomes(passed=1)
+    assert len(read_jsonl(pytester.path / "records.out")) == 3
+    assert not (pytester.path / "sub" / "records.out").exists()
+
+
+def test_fail_slow_record_xdist(pytester: pytest.Pytester) -> None:
+    pytest.importorskip("xdist")
+    # Records are written by the controller, so they aren't necessarily on
+    # disk yet when later tests run
+    pytester.makepyfile(test_func=SRC.split("def test_streamed")[0])
+    result = pytester.runpytest("-n", "2", "--fail-slow-record=records.out")
+    result.assert_outcomes(failed=1, skipped=1)
+    records = read_jsonl(pytester.path / "records.out")
+    assert len(records) == 5
+    assert {r["worker"] for r in records} <= {"gw0", "gw1"}
+    assert all(r["worker"] is not None for r in records)
+
+
+def test_read_records_bad_file(tmp_path: Path) -> None:
+    path = tmp_path / "records.out"
+    path.write_text('{"nodeid": "test_func.py::test_func"}\n')
+    with pytest.raises(ValueError):
+        list(_record.read_records(path))
@@ -0,0 +1,180 @@
+from __future__ import annotations
+from pathlib import Path
+import pytest
+from pytest_fail_slow import parse_factor
+from pytest_fail_slow._history import DurationHistory
+
+SRC = (
+    "from pathlib import Path\n"
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def setup_delay():\n"
+    '    sleep(float(Path("setup_delay.txt").read_text()))\n'
+    "\n"
+    "def test_func(setup_delay):\n"
+    '    sleep(float(Path("delay.txt").read_text()))\n'
+)
+
+
+def read_history_file(path: Path) -> DurationHistory:
+    nodeids, columns = DurationHistory.parse(path.read_bytes())
+    return DurationHistory(path, nodeids, columns)
+
+
+def read_history(pytester: pytest.Pytester) -> DurationHistory:
+    return read_history_file(
+        pytester.path / ".pytest_cache" / "d" / "fail-slow" / "history.bin"
+    )
+
+
+def history_entry(history: DurationHistory, nodeid: str, when: str) -> tuple:
+    i = history.index[nodeid]
+    return (history.columns[f"{when}.mean"][i], history.columns[f"{when}.runs"][i])
+
+
+@pytest.mark.parametrize(
+    "s,factor",
+    [("3", 3.0), ("3x", 3.0), ("2.5X", 2.5), (" 1.5 × ", 1.5), (4, 4.0)],
+)
+def test_parse_factor(s: str | int, factor: float) -> None:
+    assert parse_factor(s) == factor
+
+
+@pytest.mark.parametrize("s", ["x", "0", "-2x", "3y"])
+def test_parse_bad_factor(s: str) -> None:
+    with pytest.raises(ValueError):
+        parse_factor(s)
+
+
+def test_fail_slow_regression(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    (pytester.path / "setup_delay.txt").write_text("0\n")
+    (pytester.path / "delay.txt").write_text("0.2\n")
+    # No history yet, so nothing to regress from:
+    result = pytester.runpytest("--fail-slow-regression=3x")
+    result.assert_outcomes(passed=1)
+    baseline, runs = history_entry(
+        read_history(pytester), "test_func.py::test_func", "call"
+    )
+    assert 0.2 <= baseline < 0.6
+    assert runs == 1
+    (pytester.path / "delay.txt").write_text("1.5\n")
+    result = pytester.runpytest("--fail-slow-regression=3x")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            "Test passed but took too long to run:"
+            r" Duration \d+\.\d+s > \d+\.\d+s \(3\.0x baseline of \d+\.\d+s\)$",
+        ],
+        consecutive=True,
+    )
+    # Durations of tests that were too slow still count toward the baseline:
+    baseline2, runs = history_entry(
+        read_history(pytester), "test_func.py::test_func", "call"
+    )
+    assert baseline2 > baseline
+    assert runs == 2
+
+
+def test_fail_slow_regression_setup(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    (pytester.path / "setup_delay.txt").write_text("0.2\n")
+    (pytester.path / "delay.txt").write_text("0\n")
+    pytester.makeini("[pytest]\nfail_slow_history = true\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    (pytester.path / "setup_delay.txt").write_text("1.5\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    (pytester.path / "setup_delay.txt").write_text("3\n")
+    result = pytester.runpytest("--fail-slow-regression=2")
+    result.assert_outcomes(errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at setup of test_func _+$",
+            "Setup passed but took too long to run:"
+            r" Duration \d+\.\d+s > \d+\.\d+s \(2\.0x baseline of \d+\.\d+s\)$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_regression_fixed_threshold_first(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    (pytester.path / "setup_delay.txt").write_text("0\n")
+    (pytester.path / "delay.txt").write_text("0.1\n")
+    result = pytester.runpytest("--fail-slow-regression=2")
+    result.assert_outcomes(passed=1)
+    (pytester.path / "delay.txt").write_text("1.5\n")
+    result = pytester.runpytest("--fail-slow-regression=2", "--fail-slow=1")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_func _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 1\.0s$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_no_history_by_default(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    (pytester.path / "setup_delay.txt").write_text("0\n")
+    (pytester.path / "delay.txt").write_text("0\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1)
+    assert not (pytester.path / ".pytest_cache" / "d" / "fail-slow").exists()
+
+
+def test_history_not_recorded_for_failures(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "def test_pass():\n"
+            "    pass\n"
+            "\n"
+            "def test_fail():\n"
+            "    assert False\n"
+        )
+    )
+    pytester.makeini("[pytest]\nfail_slow_history = true\n")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, failed=1)
+    history = read_history(pytester)
+    assert history.baseline("test_func.py::test_pass", "setup") is not None
+    assert history.baseline("test_func.py::test_fail", "setup") is not None
+    assert history.baseline("test_func.py::test_pass", "call") is not None
+    assert history.baseline("test_func.py::test_fail", "call") is None
+
+
+def test_history_round_trip(tmp_path: Path) -> None:
+    history = DurationHistory(tmp_path / "history.bin")
+    history.record("test_a.py::test_x[ü]", "call", 2.0)
+    history.record("test_a.py::test_y", "setup", 1.0)
+    history.save()
+    history = read_history_file(tmp_path / "history.bin")
+    assert history.nodeids == ["test_a.py::test_x[ü]", "test_a.py::test_y"]
+    assert history.baseline("test_a.py::test_x[ü]", "call") == 2.0
+    assert history.baseline("test_a.py::test_x[ü]", "setup") is None
+    assert history.baseline("test_a.py::test_y", "setup") == 1.0
+    history.record("test_a.py::test_x[ü]", "call", 4.0)
+    history.save()
+    history = read_history_file(tmp_path / "history.bin")
+    assert history.baseline("test_a.py::test_x[ü]", "call") == 3.0
+    assert history.baseline("test_a.py::test_y", "setup") == 1.0
+
+
+def test_corrupt_history(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func="def test_func():\n    pass\n")
+    pytester.makeini("[pytest]\nfail_slow_history = true\n")
+    path = pytester.path / ".pytest_cache" / "d" / "fail-slow" / "history.bin"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"garbage")
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, warnings=1)
+    result.stdout.fnmatch_lines(
+        ["*PytestWarning: pytest-fail-slow: ignoring corrupt history file*"]
+    )
+    assert read_history(pytester).nodeids == ["test_func.py::test_func"]
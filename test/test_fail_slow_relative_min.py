@@ -0,0 +1,36 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from pathlib import Path\n"
+    "from time import sleep\n"
+    "\n"
+    "def test_func():\n"
+    '    sleep(float(Path("delay.txt").read_text()))\n'
+)
+
+
+@pytest.mark.parametrize("relative_min,failed", [(None, False), ("5ms", True)])
+def test_fail_slow_relative_min(
+    pytester: pytest.Pytester, relative_min: str | None, failed: bool
+) -> None:
+    pytester.makepyfile(test_func=SRC)
+    if relative_min is not None:
+        pytester.makeini(f"[pytest]\nfail_slow_relative_min = {relative_min}\n")
+    (pytester.path / "delay.txt").write_text("0.01\n")
+    result = pytester.runpytest("--fail-slow-regression=2")
+    result.assert_outcomes(passed=1)
+    (pytester.path / "delay.txt").write_text("0.08\n")
+    result = pytester.runpytest("--fail-slow-regression=2")
+    if failed:
+        result.assert_outcomes(failed=1)
+    else:
+        result.assert_outcomes(passed=1)
+
+
+def test_bad_relative_min(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func="def test_func():\n    pass\n")
+    pytester.makeini("[pytest]\nfail_slow_relative_min = soon\n")
+    result = pytester.runpytest()
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*Invalid fail_slow_relative_min duration: 'soon'"])
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "def snooze():\n"
+    "    for _ in range(10):\n"
+    "        sleep(0.05)\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def slow_fixture():\n"
+    "    snooze()\n"
+    "\n"
+    "@pytest.mark.fail_slow(0.2)\n"
+    "def test_slow():\n"
+    "    snooze()\n"
+    "\n"
+    "@pytest.mark.fail_slow_setup(0.2)\n"
+    "def test_slow_setup(slow_fixture):\n"
+    "    pass\n"
+    "\n"
+    "@pytest.mark.fail_slow(2)\n"
+    "def test_fast():\n"
+    "    snooze()\n"
+)
+
+
+def test_fail_slow_sample(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("--fail-slow-sample=50ms")
+    result.assert_outcomes(passed=1, failed=1, errors=1)
+    result.stdout.re_match_lines(
+        [
+            r"_+ test_slow _+$",
+            r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.2s$",
+            r"Stack samples after 0\.2s \(every 0\.05s, \d+ samples; collapsed,"
+            r" outermost frame first\):$",
+            r"    test_func\.py:14\(test_slow\);test_func\.py:6\(snooze\) \d+$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.re_match_lines(
+        [
+            r"_+ ERROR at setup of test_slow_setup _+$",
+            r"Setup passed but took too long to run: Duration \d+\.\d+s > 0\.2s$",
+            "Fixture durations:",
+            r"    slow_fixture \(function setup\): \d+\.\d+s$",
+            r"Stack samples after 0\.2s .*:$",
+            r"    test_func\.py:10\(slow_fixture\);test_func\.py:6\(snooze\) \d+$",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_no_sample(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=1, failed=1, errors=1)
+    result.stdout.no_fnmatch_line("Stack samples *")
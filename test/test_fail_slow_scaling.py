@@ -0,0 +1,194 @@
+from __future__ import annotations
+import pytest
+from pytest_fail_slow._scaling import excess_growth, parse_complexity, size_of
+
+SRC = (
+    "import pytest\n"
+    "\n"
+    "@pytest.mark.fail_slow_scaling('size', {complexity!r}{extra})\n"
+    "@pytest.mark.parametrize('kind', ['a', 'b'])\n"
+    "@pytest.mark.parametrize('size', [1, 2, 4, 8])\n"
+    "def test_func(size, kind):\n"
+    "    pass\n"
+)
+
+# Gives each test a call duration that grows quadratically with its size, so
+# that checks don't depend on how precisely sleeps are timed
+CONFTEST = (
+    "import pytest\n"
+    "\n"
+    "@pytest.hookimpl(wrapper=True)\n"
+    "def pytest_runtest_makereport(item, call):\n"
+    "    report = yield\n"
+    "    if report.when == 'call':\n"
+    "        report.duration = 0.01 * item.callspec.params['size'] ** 2\n"
+    "    return report\n"
+)
+
+
+@pytest.mark.parametrize(
+    "s,complexity",
+    [
+        ("O(1)", "O(1)"),
+        ("O(n log n)", "O(n log n)"),
+        ("n log n", "O(n log n)"),
+        ("o(N LOG N)", "O(n log n)"),
+        ("O(n**2)", "O(n^2)"),
+        ("2^n", "O(2^n)"),
+    ],
+)
+def test_parse_complexity(s: str, complexity: str) -> None:
+    assert parse_complexity(s) == complexity
+
+
+def test_parse_bad_complexity() -> None:
+    with pytest.raises(ValueError):
+        parse_complexity("O(n!)")
+
+
+@pytest.mark.parametrize(
+    "complexity,excess",
+    [("O(1)", 2), ("O(n)", 1), ("O(n^2)", 0), ("O(n^3)", -1)],
+)
+def test_excess_growth(complexity: str, excess: float) -> None:
+    samples = [(n, 0.001 * n * n) for n in (10, 100, 1000, 10000)]
+    assert excess_growth(samples, complexity) == pytest.approx(excess)
+
+
+@pytest.mark.parametrize("args", [[], ["-n", "3"]])
+def test_fail_slow_scaling(pytester: pytest.Pytester, args: list[str]) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(test_func=SRC.format(complexity="O(n)", extra=""))
+    result = pytester.runpytest(*args)
+    result.assert_outcomes(passed=6, failed=2)
+    for kind in ["a", "b"]:
+        result.stdout.re_match_lines(
+            [
+                rf"_+ test_func\[\d-{kind}\] _+$",
+                r"Tests passed but scaled worse than O\(n\) in 'size': durations"
+                r" grew by a further n\^1\.00 \(tolerance n\^0\.5\)$",
+                "Durations:",
+                *(
+                    rf"    size={n}: {0.01 * n**2}s"
+                    rf" \(test_func\.py::test_func\[{n}-{kind}\]\)$"
+                    for n in [1, 2, 4, 8]
+                ),
+            ]
+        )
+
+
+@pytest.mark.parametrize(
+    "complexity,extra",
+    [
+        ("n^2", ""),
+        ("O(n^3)", ""),
+        ("O(n)", ", tolerance=2"),
+        ("O(1)", ", enabled=False"),
+        ("O(1)", ", enabled='1 == 2'"),
+    ],
+)
+def test_fail_slow_scaling_ok(
+    pytester: pytest.Pytester, complexity: str, extra: str
+) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(test_func=SRC.format(complexity=complexity, extra=extra))
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=8)
+
+
+def test_fail_slow_scaling_deselected(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(test_func=SRC.format(complexity="O(n)", extra=""))
+    result = pytester.runpytest(
+        "-k", "not b", "--deselect", "test_func.py::test_func[1-a]"
+    )
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines(["FAILED test_func.py::test_func[[]8-a[]]*"])
+
+
+def test_fail_slow_scaling_failed_test(pytester: pytest.Pytester) -> None:
+    pytester.makeconftest(CONFTEST)
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "@pytest.mark.fail_slow_scaling('size', 'O(n)')\n"
+            "@pytest.mark.parametrize('size', [1, 2, 4, 8, 16])\n"
+            "def test_func(size):\n"
+            "    if size == 16:\n"
+            "        pytest.skip('Too big')\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=4, skipped=1)
+
+
+@pytest.mark.parametrize(
+    "decor,params,msg",
+    [
+        (
+            "@pytest.mark.fail_slow_scaling('size')",
+            "[1, 2]",
+            "takes exactly two positional arguments",
+        ),
+        (
+            "@pytest.mark.fail_slow_scaling('size', 'O(n!)')",
+            "[1, 2]",
+            "unsupported complexity 'O(n!)'; supported complexities are O(1),"
+            " O(log n), O(n), O(n log n), O(n^2), O(n^3), O(2^n)",
+        ),
+        (
+            "@pytest.mark.fail_slow_scaling('size', 'O(n)', tolerance=-1)",
+            "[1, 2]",
+            "invalid tolerance -1",
+        ),
+        (
+            "@pytest.mark.fail_slow_scaling('length', 'O(n)')",
+            "[1, 2]",
+            "test is not parametrized by 'length'",
+        ),
+        (
+            "@pytest.mark.fail_slow_scaling('size', 'O(n)')",
+            "[1, 'big']",
+            "invalid size 'big' for 'size'",
+        ),
+        (
+            "@pytest.mark.fail_slow_scaling('size', 'O(n)')",
+            "[1, 0]",
+            "invalid size 0 for 'size'",
+        ),
+    ],
+)
+def test_fail_slow_scaling_bad_args(
+    pytester: pytest.Pytester, decor: str, params: str, msg: str
+) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            f"{decor}\n"
+            f"@pytest.mark.parametrize('size', {params})\n"
+            "def test_func(size):\n"
+            "    pass\n"
+        )
+    )
+    result = pytester.runpytest()
+    assert result.ret == pytest.ExitCode.INTERRUPTED
+    result.stdout.fnmatch_lines(
+        [f"*UsageError: @pytest.mark.fail_slow_scaling(): {msg}"]
+        if not msg.startswith("takes")
+        else [f"*UsageError: @pytest.mark.fail_slow_scaling() {msg}"]
+    )
+
+
+@pytest.mark.parametrize(
+    "value,size", [(10, 10), (2.5, 2.5), ([0] * 100, 100), (range(5), 5)]
+)
+def test_size_of(value: object, size: float) -> None:
+    assert size_of(value) == size
+
+
+@pytest.mark.parametrize("value", [0, -1, True, "abc", b"abc", [], None])
+def test_size_of_invalid(value: object) -> None:
+    with pytest.raises((TypeError, ValueError)):
+        size_of(value)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+import pytest
+
+# The first test spends the session budget by moving the deadline into the
+# past, so that the outcome doesn't depend on how long anything takes
+SPEND_BUDGET = (
+    "    plugin = request.config.pluginmanager.get_plugin('fail-slow-deadline')\n"
+    "    plugin.deadline = 0\n"
+)
+
+SRC = (
+    "def test_0(request):\n"
+    + SPEND_BUDGET
+    + "".join(f"\ndef test_{i}():\n    pass\n" for i in range(1, 4))
+)
+
+
+def test_fail_slow_session_budget(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC)
+    result = pytester.runpytest("-rs", "--fail-slow-session-budget=1h")
+    result.assert_outcomes(passed=1, skipped=3)
+    assert result.ret == pytest.ExitCode.OK
+    result.stdout.fnmatch_lines(
+        [
+            "SKIPPED [[]1[]] test_func.py:5: fail-slow session budget of 3600.0s"
+            " spent",
+            "SKIPPED [[]1[]] test_func.py:8: fail-slow session budget of 3600.0s"
+            " spent",
+            "SKIPPED [[]1[]] test_func.py:11: fail-slow session budget of 3600.0s"
+            " spent",
+        ]
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "=* fail-slow session budget spent =*",
+            "3 tests not run after the session budget of 3600.0s was spent",
+        ],
+        consecutive=True,
+    )
+
+
+def test_fail_slow_session_budget_not_spent(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC.replace(SPEND_BUDGET, "    pass\n"))
+    result = pytester.runpytest("--fail-slow-session-budget=1h")
+    result.assert_outcomes(passed=4)
+    result.stdout.no_fnmatch_line("*fail-slow session budget*")
+
+
+def test_fail_slow_session_budget_fixture_teardown(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "@pytest.fixture(scope='module')\n"
+            "def resource():\n"
+            "    yield\n"
+            "    print('Tearing down')\n"
+            "\n"
+            "def test_first(request, resource):\n"
+            + SPEND_BUDGET
+            + "\n"
+            "def test_second(resource):\n"
+            "    pass\n"
+        )
+    )
+    result = pytester.runpytest("-s", "--fail-slow-session-budget=1h")
+    result.assert_outcomes(passed=1, skipped=1)
+    result.stdout.fnmatch_lines(["*Tearing down*"])
+
+
+def test_fail_slow_session_budget_xdist(pytester: pytest.Pytester) -> None:
+    pytest.importorskip("xdist")
+    # With a budget of zero, the deadline has passed before any worker starts
+    # a test
+    pytester.makepyfile(test_func=SRC.replace(SPEND_BUDGET, "    pass\n"))
+    result = pytester.runpytest("-n", "2", "--fail-slow-session-budget=0s")
+    result.assert_outcomes(skipped=4)
+    result.stdout.fnmatch_lines(
+        [
+            "=* fail-slow session budget spent =*",
+            "4 tests not run after the session budget of 0.0s was spent",
+        ],
+        consecutive=True,
+    )
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def slow_teardown():\n"
+    "    yield\n"
+    "    sleep(2)\n"
+    "\n"
+    "{decor}def test_func(slow_teardown):\n"
+    "    assert 2 + 2 == 4\n"
+)
+
+
+@pytest.mark.parametrize(
+    "args,decor,limitrgx",
+    [
+        (["--fail-slow-teardown=1"], "", r"1\.\d+s"),
+        (["--fail-slow-teardown=0.0166m"], "", r"0\.9\d+s"),
+        (["--fail-slow-teardown=10"], "", None),
+        ([], "@pytest.mark.fail_slow_teardown(1)\n", r"1s"),
+        ([], "@pytest.mark.fail_slow_teardown(1, enabled='1 == 1')\n", r"1s"),
+        ([], "@pytest.mark.fail_slow_teardown(1, enabled=False)\n", None),
+        (
+            ["--fail-slow-teardown=1"],
+            "@pytest.mark.fail_slow_teardown(1, enabled=False)\n",
+            None,
+        ),
+        ([], "@pytest.mark.fail_slow_teardown(10)\n", None),
+        (["--fail-slow-teardown=30"], "@pytest.mark.fail_slow_teardown(1)\n", r"1s"),
+        (["--fail-slow-teardown=1"], "@pytest.mark.fail_slow_teardown(10)\n", None),
+        (["--fail-slow=1", "--fail-slow-setup=1"], "", None),
+    ],
+)
+def test_fail_slow_teardown_threshold(
+    pytester: pytest.Pytester, args: list[str], decor: str, limitrgx: str | None
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(decor=decor))
+    result = pytester.runpytest(*args)
+    if limitrgx is None:
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*Teardown passed but took too long to run*")
+    else:
+        result.assert_outcomes(passed=1, errors=1)
+        result.stdout.re_match_lines(
+            [
+                r"_+ ERROR at teardown of test_func _+$",
+                "Teardown passed but took too long to run:"
+                rf" Duration \d+\.\d+s > {limitrgx}$",
+            ],
+            consecutive=True,
+        )
+
+
+@pytest.mark.parametrize(
+    "args", ["", "42, 'foo'", "enabled=False", "42, 'foo', enabled=False"]
+)
+def test_fail_slow_teardown_marker_bad_args(
+    pytester: pytest.Pytester, args: str
+) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            f"@pytest.mark.fail_slow_teardown({args})\n"
+            "def test_func():\n"
+            "    assert 2 + 2 == 4\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*UsageError: @pytest.mark.fail_slow_teardown() takes exactly one"
+            " positional argument"
+        ]
+    )
+
+
+COMBINED_SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "@pytest.fixture\n"
+    "def fixture():\n"
+    "    sleep(0.7)\n"
+    "    yield\n"
+    "    sleep(0.7)\n"
+    "\n"
+    "{decor}def test_func(fixture):\n"
+    "    sleep(0.7)\n"
+)
+
+
+@pytest.mark.parametrize(
+    "args,decor,limitrgx",
+    [
+        (["--fail-slow-combined=2"], "", r"2\.\d+s"),
+        (["--fail-slow-combined=5"], "", None),
+        ([], "@pytest.mark.fail_slow_combined(2)\n", r"2s"),
+        ([], "@pytest.mark.fail_slow_combined(2, enabled=False)\n", None),
+        (["--fail-slow-combined=1"], "@pytest.mark.fail_slow_combined(5)\n", None),
+    ],
+)
+def test_fail_slow_combined(
+    pytester: pytest.Pytester, args: list[str], decor: str, limitrgx: str | None
+) -> None:
+    pytester.makepyfile(test_func=COMBINED_SRC.format(decor=decor))
+    result = pytester.runpytest(*args)
+    if limitrgx is None:
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*took too long to run*")
+    else:
+        result.assert_outcomes(passed=1, errors=1)
+        result.stdout.re_match_lines(
+            [
+                r"_+ ERROR at teardown of test_func _+$",
+                "Setup, call, and teardown passed but took too long to run:"
+                rf" Duration \d+\.\d+s > {limitrgx}$",
+            ],
+            consecutive=True,
+        )
+
+
+def test_fail_slow_combined_after_slow_call(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=COMBINED_SRC.format(decor=""))
+    result = pytester.runpytest("--fail-slow=0.5", "--fail-slow-combined=1")
+    result.assert_outcomes(failed=1)
+    result.stdout.re_match_lines(
+        [r"Test passed but took too long to run: Duration \d+\.\d+s > 0\.5s$"]
+    )
+    result.stdout.no_fnmatch_line("*Setup, call, and teardown passed*")
+
+
+def test_fail_slow_combined_no_percentiles(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=COMBINED_SRC.format(decor="@pytest.mark.fail_slow_combined(p95=2)\n")
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*UsageError: @pytest.mark.fail_slow_combined() does not support"
+            " percentile thresholds"
+        ]
+    )
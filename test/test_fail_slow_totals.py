@@ -0,0 +1,130 @@
+from __future__ import annotations
+import pytest
+
+SRC = (
+    "from time import sleep\n"
+    "import pytest\n"
+    "\n"
+    "{pytestmark}"
+    "\n"
+    "{decor}class TestSlow:\n"
+    "    def test_first(self):\n"
+    "        sleep(0.3)\n"
+    "\n"
+    "    def test_second(self):\n"
+    "        sleep(0.3)\n"
+    "\n"
+    "def test_third():\n"
+    "    sleep(0.3)\n"
+)
+
+
+@pytest.mark.parametrize(
+    "args,pytestmark,decor,over",
+    [
+        ([], "", "", []),
+        (
+            [],
+            "pytestmark = pytest.mark.fail_slow_total(0.75)\n",
+            "",
+            [r"test_func\.py: Duration 0\.9\d*s > 0\.75s"],
+        ),
+        ([], "pytestmark = pytest.mark.fail_slow_total(5)\n", "", []),
+        (
+            [],
+            "",
+            "@pytest.mark.fail_slow_total(0.5)\n",
+            [r"test_func\.py::TestSlow: Duration 0\.6\d*s > 0\.5s"],
+        ),
+        (
+            [],
+            "pytestmark = pytest.mark.fail_slow_total(0.75)\n",
+            "@pytest.mark.fail_slow_total(0.5)\n",
+            [
+                r"test_func\.py: Duration 0\.9\d*s > 0\.75s",
+                r"test_func\.py::TestSlow: Duration 0\.6\d*s > 0\.5s",
+            ],
+        ),
+        (
+            [],
+            "",
+            "@pytest.mark.fail_slow_total(0.5, enabled='1 == 2')\n",
+            [],
+        ),
+        (
+            ["--fail-slow-session=0.75"],
+            "",
+            "",
+            [r"session: Duration 0\.9\d*s > 0\.75s"],
+        ),
+    ],
+)
+def test_fail_slow_total(
+    pytester: pytest.Pytester,
+    args: list[str],
+    pytestmark: str,
+    decor: str,
+    over: list[str],
+) -> None:
+    pytester.makepyfile(test_func=SRC.format(pytestmark=pytestmark, decor=decor))
+    result = pytester.runpytest(*args)
+    result.assert_outcomes(passed=3)
+    assert result.ret == 0
+    if over:
+        result.stdout.re_match_lines(
+            [r"=+ fail-slow total budgets exceeded =+$", *over], consecutive=True
+        )
+    else:
+        result.stdout.no_fnmatch_line("*fail-slow total budgets exceeded*")
+
+
+def test_fail_slow_total_ini(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(test_func=SRC.format(pytestmark="", decor=""))
+    pytester.makeini(
+        "[pytest]\n"
+        "fail_slow_total =\n"
+        "    test_func.py = 0.75\n"
+        "    test_func.py::TestSlow = 10\n"
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(passed=3)
+    result.stdout.re_match_lines(
+        [
+            r"=+ fail-slow total budgets exceeded =+$",
+            r"test_func\.py: Duration 0\.9\d*s > 0\.75s$",
+        ],
+        consecutive=True,
+    )
+    result.stdout.no_fnmatch_line("*TestSlow: Duration*")
+
+
+@pytest.mark.parametrize("over", [False, True])
+def test_fail_slow_strict_totals(pytester: pytest.Pytester, over: bool) -> None:
+    pytester.makepyfile(test_func=SRC.format(pytestmark="", decor=""))
+    result = pytester.runpytest(
+        "--fail-slow-strict-totals",
+        "--fail-slow-session=0.5" if over else "--fail-slow-session=5",
+    )
+    result.assert_outcomes(passed=3)
+    assert result.ret == (pytest.ExitCode.TESTS_FAILED if over else 0)
+
+
+def test_fail_slow_total_bad_args(pytester: pytest.Pytester) -> None:
+    pytester.makepyfile(
+        test_func=(
+            "import pytest\n"
+            "\n"
+            "pytestmark = pytest.mark.fail_slow_total(p95=2)\n"
+            "\n"
+            "def test_func():\n"
+            "    assert 2 + 2 == 4\n"
+        )
+    )
+    result = pytester.runpytest()
+    result.assert_outcomes(errors=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*UsageError: @pytest.mark.fail_slow_total() does not support"
+            " percentile thresholds"
+        ]
+    )
@@ -67,6 +67,9 @@ def test_parse_duration(number: str, unit: str, mul: float) -> None:
         "500n s",
         "123cm",
         "500u",
+        "infs",
+        "nanms",
+        "5 m s",
     ],
 )
 def test_parse_bad_duration(s: str) -> None:
@@ -0,0 +1,37 @@
+import pytest
+from pytest_fail_slow import parse_size
+
+
+@pytest.mark.parametrize(
+    "unit,mul",
+    [
+        ("", 1),
+        ("b", 1),
+        ("k", 1000),
+        ("kb", 1000),
+        ("ki", 1024),
+        ("kib", 1024),
+        ("m", 1000**2),
+        ("mb", 1000**2),
+        ("mi", 1024**2),
+        ("mib", 1024**2),
+        ("g", 1000**3),
+        ("gb", 1000**3),
+        ("gi", 1024**3),
+        ("gib", 1024**3),
+    ],
+)
+@pytest.mark.parametrize("number", ["42", "42.", "42.0", "3.14", "2e4", ".5"])
+def test_parse_size(number: str, unit: str, mul: int) -> None:
+    assert parse_size(number + unit) == float(number) * mul
+    assert parse_size(number + " " + unit) == float(number) * mul
+    assert parse_size(number + unit + " ") == float(number) * mul
+    assert parse_size(number + unit.upper()) == float(number) * mul
+
+
+@pytest.mark.parametrize(
+    "s", ["", "MB", "10x", "10 bytes", "5ib", "1tb", "infMB", "nan", "5 M B"]
+)
+def test_parse_bad_size(s: str) -> None:
+    with pytest.raises(ValueError):
+        parse_size(s)